@@ -0,0 +1,28 @@
+"""add itinerary (visibility, id) index for the public feed
+
+Revision ID: 8b1f3c2d9a47
+Revises: 4322f59c5016
+Create Date: 2026-10-18 09:12:04.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1f3c2d9a47'
+down_revision: Union[str, Sequence[str], None] = '4322f59c5016'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Backs the keyset-paginated public feed (visibility = 'public' ORDER BY id DESC)
+    op.create_index('ix_itinerary_visibility_id', 'itinerary', ['visibility', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_itinerary_visibility_id', table_name='itinerary')
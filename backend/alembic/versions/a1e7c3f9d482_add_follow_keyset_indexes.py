@@ -0,0 +1,30 @@
+"""add follow keyset indexes
+
+Revision ID: a1e7c3f9d482
+Revises: f8d2b5e7a914
+Create Date: 2026-10-18 20:48:16.220871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1e7c3f9d482'
+down_revision: Union[str, Sequence[str], None] = 'f8d2b5e7a914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pages of followers / following: WHERE following_id = :user AND id < :after ORDER BY id DESC
+    op.create_index('ix_follow_following_id_id', 'follow', ['following_id', 'id'], unique=False)
+    op.create_index('ix_follow_follower_id_id', 'follow', ['follower_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_follow_follower_id_id', table_name='follow')
+    op.drop_index('ix_follow_following_id_id', table_name='follow')
@@ -0,0 +1,52 @@
+"""add itinerary_lineage fork closure table
+
+Revision ID: a3d6f1c8e902
+Revises: f2b7d9e04a61
+Create Date: 2026-10-18 15:02:44.870216
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d6f1c8e902'
+down_revision: Union[str, Sequence[str], None] = 'f2b7d9e04a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'itinerary_lineage',
+        sa.Column('ancestor_id', sa.Integer(), sa.ForeignKey('itinerary.id'), nullable=False),
+        sa.Column('descendant_id', sa.Integer(), sa.ForeignKey('itinerary.id'), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+    )
+    op.create_index('ix_itinerary_lineage_ancestor_depth', 'itinerary_lineage', ['ancestor_id', 'depth', 'descendant_id'], unique=False)
+    op.create_index('ix_itinerary_lineage_descendant_depth', 'itinerary_lineage', ['descendant_id', 'depth'], unique=False)
+
+    # Backfill every (ancestor, descendant) pair by walking parent_id upwards
+    op.execute(
+        """
+        WITH RECURSIVE chain(ancestor_id, descendant_id, depth) AS (
+            SELECT parent_id, id, 1 FROM itinerary WHERE parent_id IS NOT NULL
+            UNION ALL
+            SELECT i.parent_id, c.descendant_id, c.depth + 1
+            FROM chain c JOIN itinerary i ON i.id = c.ancestor_id
+            WHERE i.parent_id IS NOT NULL
+        )
+        INSERT INTO itinerary_lineage (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, descendant_id, depth FROM chain
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_itinerary_lineage_descendant_depth', table_name='itinerary_lineage')
+    op.drop_index('ix_itinerary_lineage_ancestor_depth', table_name='itinerary_lineage')
+    op.drop_table('itinerary_lineage')
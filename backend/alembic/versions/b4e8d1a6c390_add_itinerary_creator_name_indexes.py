@@ -0,0 +1,32 @@
+"""add itinerary (creator_id, slug|title) prefix indexes
+
+Revision ID: b4e8d1a6c390
+Revises: d7a3f0c2b518
+Create Date: 2026-10-18 23:12:40.518337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8d1a6c390'
+down_revision: Union[str, Sequence[str], None] = 'd7a3f0c2b518'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Free slug/title lookups: WHERE creator_id = :c AND slug|title LIKE :prefix || '%'.
+    # The unique constraints lead with slug/title and default-collation btrees can't serve LIKE,
+    # so that query scanned; text_pattern_ops turns the prefix into an index range on Postgres.
+    op.create_index('ix_itinerary_creator_id_slug', 'itinerary', ['creator_id', 'slug'], unique=False, postgresql_ops={'slug': 'text_pattern_ops'})
+    op.create_index('ix_itinerary_creator_id_title', 'itinerary', ['creator_id', 'title'], unique=False, postgresql_ops={'title': 'text_pattern_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_itinerary_creator_id_title', table_name='itinerary')
+    op.drop_index('ix_itinerary_creator_id_slug', table_name='itinerary')
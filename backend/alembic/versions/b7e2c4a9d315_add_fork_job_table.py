@@ -0,0 +1,43 @@
+"""add fork_job table
+
+Revision ID: b7e2c4a9d315
+Revises: a3d6f1c8e902
+Create Date: 2026-10-18 16:12:30.447153
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c4a9d315'
+down_revision: Union[str, Sequence[str], None] = 'a3d6f1c8e902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Background forks (POST /itineraries/{id}/fork?mode=job)
+    op.create_table(
+        'fork_job',
+        sa.Column('id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('source_itinerary_id', sa.Integer(), sa.ForeignKey('itinerary.id'), nullable=False),
+        sa.Column('creator_id', sa.Integer(), sa.ForeignKey('user.id'), nullable=False),
+        sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('progress', sa.Integer(), nullable=False),
+        sa.Column('result_itinerary_id', sa.Integer(), sa.ForeignKey('itinerary.id'), nullable=True),
+        sa.Column('error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_fork_job_creator_id'), 'fork_job', ['creator_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_fork_job_creator_id'), table_name='fork_job')
+    op.drop_table('fork_job')
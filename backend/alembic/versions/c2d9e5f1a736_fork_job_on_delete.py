@@ -0,0 +1,49 @@
+"""fork_job foreign keys: ON DELETE SET NULL / CASCADE
+
+Revision ID: c2d9e5f1a736
+Revises: a1e7c3f9d482
+Create Date: 2026-10-18 22:05:41.102937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d9e5f1a736'
+down_revision: Union[str, Sequence[str], None] = 'a1e7c3f9d482'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# b7e2c4a9d315 left the foreign keys unnamed: Postgres named them <table>_<column>_fkey, SQLite not at all.
+# Batch mode (SQLite recreates the table) names the reflected ones the Postgres way, so one set of
+# names drops them on both dialects.
+NAMING_CONVENTION = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Deleting an itinerary nulls the ids of jobs naming it; deleting a user drops their jobs.
+    # Without this, Postgres rejects the DELETE of any itinerary or user a job row points at.
+    with op.batch_alter_table('fork_job', naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.alter_column('source_itinerary_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.drop_constraint('fork_job_source_itinerary_id_fkey', type_='foreignkey')
+        batch_op.drop_constraint('fork_job_result_itinerary_id_fkey', type_='foreignkey')
+        batch_op.drop_constraint('fork_job_creator_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('fork_job_source_itinerary_id_fkey', 'itinerary', ['source_itinerary_id'], ['id'], ondelete='SET NULL')
+        batch_op.create_foreign_key('fork_job_result_itinerary_id_fkey', 'itinerary', ['result_itinerary_id'], ['id'], ondelete='SET NULL')
+        batch_op.create_foreign_key('fork_job_creator_id_fkey', 'user', ['creator_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM fork_job WHERE source_itinerary_id IS NULL")
+    with op.batch_alter_table('fork_job', naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint('fork_job_creator_id_fkey', type_='foreignkey')
+        batch_op.drop_constraint('fork_job_result_itinerary_id_fkey', type_='foreignkey')
+        batch_op.drop_constraint('fork_job_source_itinerary_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('fork_job_creator_id_fkey', 'user', ['creator_id'], ['id'])
+        batch_op.create_foreign_key('fork_job_result_itinerary_id_fkey', 'itinerary', ['result_itinerary_id'], ['id'])
+        batch_op.create_foreign_key('fork_job_source_itinerary_id_fkey', 'itinerary', ['source_itinerary_id'], ['id'])
+        batch_op.alter_column('source_itinerary_id', existing_type=sa.Integer(), nullable=False)
@@ -0,0 +1,28 @@
+"""add itinerary version counter
+
+Revision ID: c5e2a7d41b93
+Revises: 8b1f3c2d9a47
+Create Date: 2026-10-18 10:03:41.552910
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e2a7d41b93'
+down_revision: Union[str, Sequence[str], None] = '8b1f3c2d9a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Monotonic per-itinerary version, bumped by every write; keys the detail response cache
+    op.add_column('itinerary', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('itinerary', 'version')
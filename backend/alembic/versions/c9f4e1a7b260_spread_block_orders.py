@@ -0,0 +1,41 @@
+"""spread itinerary block orders into gapped ranks
+
+Revision ID: c9f4e1a7b260
+Revises: b7e2c4a9d315
+Create Date: 2026-10-18 17:05:52.183604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9f4e1a7b260'
+down_revision: Union[str, Sequence[str], None] = 'b7e2c4a9d315'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ORDER_GAP = 1024  # crud.ORDER_GAP
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Dense 1..n block orders become 1024, 2048, ... so inserts/moves can take a midpoint.
+    # Negate first so UNIQUE(day_group_id, order) never sees a transient duplicate.
+    op.execute('UPDATE itineraryblock SET "order" = -"order"')
+    op.execute(f'UPDATE itineraryblock SET "order" = -"order" * {ORDER_GAP}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Back to dense per-day ranks 1..n
+    op.execute('UPDATE itineraryblock SET "order" = -"order"')
+    op.execute(
+        """
+        UPDATE itineraryblock SET "order" = (
+            SELECT COUNT(*) FROM itineraryblock b
+            WHERE b.day_group_id = itineraryblock.day_group_id AND b."order" >= itineraryblock."order"
+        )
+        """
+    )
@@ -0,0 +1,42 @@
+"""add itinerary change log
+
+Revision ID: d4a8b2f6c173
+Revises: c9f4e1a7b260
+Create Date: 2026-10-18 18:20:13.605921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8b2f6c173'
+down_revision: Union[str, Sequence[str], None] = 'c9f4e1a7b260'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'itinerary_change',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('itinerary_id', sa.Integer(), sa.ForeignKey('itinerary.id'), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('entity', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_itinerary_change_itinerary_version', 'itinerary_change', ['itinerary_id', 'version'], unique=False)
+    # Nothing is logged before this migration: deltas start from each itinerary's current version
+    op.add_column('itinerary', sa.Column('changes_floor', sa.Integer(), nullable=False, server_default='1'))
+    op.execute('UPDATE itinerary SET changes_floor = version')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('itinerary', 'changes_floor')
+    op.drop_index('ix_itinerary_change_itinerary_version', table_name='itinerary_change')
+    op.drop_table('itinerary_change')
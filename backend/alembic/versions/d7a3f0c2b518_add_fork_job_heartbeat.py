@@ -0,0 +1,30 @@
+"""add fork_job.heartbeat_at
+
+Revision ID: d7a3f0c2b518
+Revises: c2d9e5f1a736
+Create Date: 2026-10-18 22:31:09.554210
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3f0c2b518'
+down_revision: Union[str, Sequence[str], None] = 'c2d9e5f1a736'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Refreshed by the process holding a queued/running job; jobs whose heartbeat stops are failed as orphaned
+    with op.batch_alter_table('fork_job') as batch_op:
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('fork_job') as batch_op:
+        batch_op.drop_column('heartbeat_at')
@@ -0,0 +1,48 @@
+"""add normalized itinerary_tag table
+
+Revision ID: d81f0b6e2c55
+Revises: c5e2a7d41b93
+Create Date: 2026-10-18 11:26:17.904412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f0b6e2c55'
+down_revision: Union[str, Sequence[str], None] = 'c5e2a7d41b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    tag_table = op.create_table(
+        'itinerary_tag',
+        sa.Column('itinerary_id', sa.Integer(), sa.ForeignKey('itinerary.id'), nullable=False),
+        sa.Column('tag', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('itinerary_id', 'tag'),
+    )
+    op.create_index('ix_itinerary_tag_tag_itinerary_id', 'itinerary_tag', ['tag', 'itinerary_id'], unique=False)
+
+    # Backfill from the JSON column (same normalization as crud.normalize_tags)
+    bind = op.get_bind()
+    itineraries = sa.table('itinerary', sa.column('id', sa.Integer()), sa.column('tags', sa.JSON()))
+    rows = []
+    for itin_id, tags in bind.execute(sa.select(itineraries.c.id, itineraries.c.tags)):
+        seen = {}
+        for t in tags or []:
+            t = str(t).strip().lower()
+            if t:
+                seen.setdefault(t, None)
+        rows.extend({'itinerary_id': itin_id, 'tag': t} for t in seen)
+    if rows:
+        op.bulk_insert(tag_table, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_itinerary_tag_tag_itinerary_id', table_name='itinerary_tag')
+    op.drop_table('itinerary_tag')
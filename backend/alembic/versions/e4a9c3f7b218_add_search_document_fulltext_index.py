@@ -0,0 +1,64 @@
+"""add search_document full-text index
+
+Revision ID: e4a9c3f7b218
+Revises: d81f0b6e2c55
+Create Date: 2026-10-18 13:40:52.671093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c3f7b218'
+down_revision: Union[str, Sequence[str], None] = 'd81f0b6e2c55'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # tsvector is generated from body, so writers only ever touch plain text
+        op.execute("""
+            CREATE TABLE search_document (
+                doc_key      TEXT PRIMARY KEY,
+                itinerary_id INTEGER NOT NULL REFERENCES itinerary(id) ON DELETE CASCADE,
+                day_group_id INTEGER,
+                body         TEXT NOT NULL,
+                tsv          tsvector GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED
+            )
+        """)
+        op.execute("CREATE INDEX ix_search_document_tsv ON search_document USING GIN (tsv)")
+        op.create_index('ix_search_document_itinerary_id', 'search_document', ['itinerary_id'], unique=False)
+        op.create_index('ix_search_document_day_group_id', 'search_document', ['day_group_id'], unique=False)
+    else:
+        # Local SQLite runs use FTS5 with the same column names
+        op.execute("""
+            CREATE VIRTUAL TABLE search_document USING fts5(
+                doc_key UNINDEXED, itinerary_id UNINDEXED, day_group_id UNINDEXED, body,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """)
+
+    # Backfill: one document per itinerary (title + description) and per text block.
+    # FTS5 rows get the rowid app.search looks them up by: the block id, or minus the itinerary id.
+    rowid = bind.dialect.name != 'postgresql'
+    op.execute(f"""
+        INSERT INTO search_document (doc_key, itinerary_id, day_group_id, body{", rowid" if rowid else ""})
+        SELECT 'itinerary:' || id, id, NULL, title || ' ' || COALESCE(description, ''){", -id" if rowid else ""}
+        FROM itinerary
+    """)
+    op.execute(f"""
+        INSERT INTO search_document (doc_key, itinerary_id, day_group_id, body{", rowid" if rowid else ""})
+        SELECT 'block:' || b.id, d.itinerary_id, b.day_group_id, b.content{", b.id" if rowid else ""}
+        FROM itineraryblock b JOIN day_group d ON d.id = b.day_group_id
+        WHERE b.type = 'text'
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE search_document")
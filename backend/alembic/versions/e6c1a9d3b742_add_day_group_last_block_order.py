@@ -0,0 +1,31 @@
+"""add day_group last_block_order
+
+Revision ID: e6c1a9d3b742
+Revises: d4a8b2f6c173
+Create Date: 2026-10-18 19:02:41.517203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6c1a9d3b742'
+down_revision: Union[str, Sequence[str], None] = 'd4a8b2f6c173'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # High-water mark of end-of-day block orders handed out (crud.allocate_block_orders);
+    # NULL until the day's first allocation, which starts from MAX(order)
+    with op.batch_alter_table('day_group') as batch_op:
+        batch_op.add_column(sa.Column('last_block_order', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('day_group') as batch_op:
+        batch_op.drop_column('last_block_order')
@@ -0,0 +1,43 @@
+"""add copy-on-write fork columns
+
+Revision ID: f2b7d9e04a61
+Revises: e4a9c3f7b218
+Create Date: 2026-10-18 14:21:07.318442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7d9e04a61'
+down_revision: Union[str, Sequence[str], None] = 'e4a9c3f7b218'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A copy-on-write fork reads its days from `days_source_id` until its first structural edit,
+    # and a materialized day reads its blocks from `blocks_source_day_id` until its first block edit
+    with op.batch_alter_table('itinerary') as batch_op:
+        batch_op.add_column(sa.Column('days_source_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_itinerary_days_source_id', ['days_source_id'])
+        batch_op.create_foreign_key('fk_itinerary_days_source_id', 'itinerary', ['days_source_id'], ['id'])
+    with op.batch_alter_table('day_group') as batch_op:
+        batch_op.add_column(sa.Column('blocks_source_day_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_day_group_blocks_source_day_id', ['blocks_source_day_id'])
+        batch_op.create_foreign_key('fk_day_group_blocks_source_day_id', 'day_group', ['blocks_source_day_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('day_group') as batch_op:
+        batch_op.drop_constraint('fk_day_group_blocks_source_day_id', type_='foreignkey')
+        batch_op.drop_index('ix_day_group_blocks_source_day_id')
+        batch_op.drop_column('blocks_source_day_id')
+    with op.batch_alter_table('itinerary') as batch_op:
+        batch_op.drop_constraint('fk_itinerary_days_source_id', type_='foreignkey')
+        batch_op.drop_index('ix_itinerary_days_source_id')
+        batch_op.drop_column('days_source_id')
@@ -0,0 +1,52 @@
+"""add user stat counters
+
+Revision ID: f8d2b5e7a914
+Revises: e6c1a9d3b742
+Create Date: 2026-10-18 20:11:53.904126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8d2b5e7a914'
+down_revision: Union[str, Sequence[str], None] = 'e6c1a9d3b742'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = ('trips_count', 'saved_count', 'followers_count', 'following_count')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Denormalized profile header counters (see crud.bump_user_stats / recount_user_stats)
+    with op.batch_alter_table('user') as batch_op:
+        for name in COUNTERS:
+            batch_op.add_column(sa.Column(name, sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from the source tables
+    user = sa.table('user', sa.column('id', sa.Integer), *(sa.column(name, sa.Integer) for name in COUNTERS))
+    itinerary = sa.table('itinerary', sa.column('id', sa.Integer), sa.column('creator_id', sa.Integer))
+    bookmark = sa.table('bookmark', sa.column('id', sa.Integer), sa.column('user_id', sa.Integer))
+    follow = sa.table('follow', sa.column('id', sa.Integer), sa.column('follower_id', sa.Integer), sa.column('following_id', sa.Integer))
+
+    def count_of(table, column):
+        return sa.select(sa.func.count(table.c.id)).where(column == user.c.id).scalar_subquery()
+
+    op.execute(
+        user.update().values(
+            trips_count=count_of(itinerary, itinerary.c.creator_id),
+            saved_count=count_of(bookmark, bookmark.c.user_id),
+            followers_count=count_of(follow, follow.c.following_id),
+            following_count=count_of(follow, follow.c.follower_id),
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('user') as batch_op:
+        for name in reversed(COUNTERS):
+            batch_op.drop_column(name)
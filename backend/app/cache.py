@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from app.settings import settings
+
+
+class VersionedLRUCache:
+    """
+    Small thread-safe LRU with a TTL, keyed by (object_id, version).
+    - Holds already-serialized response bytes, so a hit skips the DB tree load and Pydantic entirely.
+    - Storing a new version of an object drops the older one; a bumped version is never served stale.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[tuple[Hashable, int], tuple[float, bytes]]" = OrderedDict()
+        self._latest: dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, object_id: Hashable, version: int) -> Optional[bytes]:
+        key = (object_id, version)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._pop(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, object_id: Hashable, version: int, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        key = (object_id, version)
+        with self._lock:
+            prev = self._latest.get(object_id)
+            if prev is not None and prev != version:
+                if prev > version:
+                    return  # a newer version is already cached; don't regress
+                self._pop((object_id, prev))
+            self._data[key] = (time.monotonic() + self.ttl_seconds, body)
+            self._data.move_to_end(key)
+            self._latest[object_id] = version
+            while len(self._data) > self.max_entries:
+                self._pop(next(iter(self._data)))
+
+    def _pop(self, key: tuple[Hashable, int]) -> None:
+        self._data.pop(key, None)
+        if self._latest.get(key[0]) == key[1]:
+            del self._latest[key[0]]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._latest.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+            }
+
+
+# Serialized ItineraryRead bytes for GET /itineraries/{id}
+itinerary_cache = VersionedLRUCache(
+    max_entries=settings.itinerary_cache_max_entries,
+    ttl_seconds=settings.itinerary_cache_ttl_seconds,
+)
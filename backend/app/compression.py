@@ -0,0 +1,163 @@
+import gzip
+import threading
+from typing import Callable, Dict, Optional
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.cache import VersionedLRUCache
+from app.settings import settings
+
+# Optional codecs: fall back to gzip-only if the wheels aren't installed
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+
+try:
+    import brotli
+except Exception:
+    brotli = None
+
+
+def _compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    """Available encodings in server preference order (best ratio/CPU first)."""
+    out: Dict[str, Callable[[bytes], bytes]] = {}
+    if zstandard is not None:
+        # a ZstdCompressor must not be shared between threads: one per worker thread
+        local = threading.local()
+
+        def zstd(body: bytes) -> bytes:
+            if not hasattr(local, "zctx"):
+                local.zctx = zstandard.ZstdCompressor(level=settings.compression_zstd_level)
+            return local.zctx.compress(body)
+
+        out["zstd"] = zstd
+    if brotli is not None:
+        out["br"] = lambda body: brotli.compress(body, quality=settings.compression_brotli_level)
+    out["gzip"] = lambda body: gzip.compress(body, compresslevel=settings.compression_gzip_level, mtime=0)
+    return out
+
+
+def negotiate_encoding(accept_encoding: str, available) -> Optional[str]:
+    """
+    Pick an encoding from an Accept-Encoding header.
+    Highest q-value wins; ties go to server preference (the order of `available`). q=0 excludes.
+    """
+    if not accept_encoding:
+        return None
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[token] = q
+
+    best, best_q = None, 0.0
+    for enc in available:
+        q = qualities.get(enc, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+# Compressed bodies of ETagged responses, keyed by (etag, encoding).
+# A strong ETag pins the exact body, so cached itinerary/profile hits are compressed once, not per request.
+compressed_cache = VersionedLRUCache(
+    max_entries=settings.compression_cache_max_entries,
+    ttl_seconds=settings.compression_cache_ttl_seconds,
+)
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """Text-like media types worth compressing; images, archives and other binary bodies are already dense."""
+    media_type = (content_type or "").split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in ("application/json", "application/javascript", "image/svg+xml")
+        or media_type.endswith("+json")
+    )
+
+
+class CompressionMiddleware:
+    """
+    Negotiated response compression (zstd / br / gzip) with a minimum-size threshold.
+    - Only single-chunk bodies are compressed; streamed responses (static files) pass through.
+    - Responses that already carry Content-Encoding, are below `minimum_size` or aren't of a text-like
+      content type (is_compressible) are left alone.
+    - Bodies of at least `thread_min_size` are compressed in a worker thread, keeping the event loop free.
+    - Adds `Vary: Accept-Encoding`; a strong ETag is weakened, since the bytes differ from the identity body.
+      Once an encoding is negotiated every single-chunk response is weakened (304s and small bodies too),
+      so a 304 always repeats the validator the 200 carried.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None, thread_min_size: Optional[int] = None) -> None:
+        self.app = app
+        self.minimum_size = settings.compression_minimum_size if minimum_size is None else minimum_size
+        self.thread_min_size = settings.compression_thread_min_size if thread_min_size is None else thread_min_size
+        self.compressors = _compressors()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.compressors)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message = {}
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if message.get("more_body", False) or "content-encoding" in headers:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+            headers.add_vary_header("Accept-Encoding")
+            # a 304 carries no content type, so the ETag is weakened above regardless
+            if len(body) < self.minimum_size or not is_compressible(headers.get("content-type")):
+                await send(start)
+                await send(message)
+                return
+
+            cached = compressed_cache.get((etag, encoding), 0) if etag else None
+            if cached is None:
+                compress = self.compressors[encoding]
+                if len(body) >= self.thread_min_size:
+                    cached = await anyio.to_thread.run_sync(compress, body)
+                else:
+                    cached = compress(body)
+                if etag:
+                    compressed_cache.put((etag, encoding), 0, cached)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(cached))
+            await send(start)
+            await send({"type": "http.response.body", "body": cached})
+
+        await self.app(scope, receive, send_compressed)
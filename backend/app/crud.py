@@ -1,14 +1,18 @@
-from typing import List, Optional
+from itertools import chain, count
+from typing import Callable, Iterator, List, Optional
 from datetime import date, datetime, timezone, timedelta
-from sqlmodel import Session, select
+from sqlmodel import Session, delete, insert, select, update
 from slugify import slugify
 from fastapi import HTTPException, status
+from sqlalchemy import case, event, func, literal, null, or_, tuple_, union_all
+from sqlalchemy.orm import aliased
 from sqlalchemy.exc import IntegrityError
 
 import uuid
 
-from .models import User, Itinerary, ItineraryBlock, DayGroup, RefreshToken
+from .models import User, Itinerary, ItineraryBlock, ItineraryChange, ItineraryLineage, ItineraryTag, DayGroup, RefreshToken, Bookmark, Follow
 from .schemas import UserCreate, DayGroupCreate, ItineraryCreate, ItineraryUpdate
+from . import search
 from app.security import (hash_password, verify_password, create_access_token, REFRESH_TOKEN_EXPIRE_DAYS)
 
 # ----------------------------------
@@ -40,13 +44,24 @@ def delete_user(session: Session, user_id: int) -> bool:
         if not user:
             return False
         
-        # First, delete all itineraries owned by this user
+        owned_ids = select(Itinerary.id).where(Itinerary.creator_id == user_id)
+        # Other users whose profile counters change with this user's rows (recounted before commit)
+        affected = set(session.exec(select(Bookmark.user_id).where(Bookmark.itinerary_id.in_(owned_ids))).all())
+        affected |= set(session.exec(select(Follow.following_id).where(Follow.follower_id == user_id)).all())
+        affected |= set(session.exec(select(Follow.follower_id).where(Follow.following_id == user_id)).all())
+        affected.discard(user_id)
+        session.exec(delete(Bookmark).where(or_(Bookmark.user_id == user_id, Bookmark.itinerary_id.in_(owned_ids))))
+
+        # First, delete all itineraries owned by this user (and their search documents)
+        search.unindex_itineraries(session, select(Itinerary.id).where(Itinerary.creator_id == user_id))
+        session.exec(delete(ItineraryChange).where(ItineraryChange.itinerary_id.in_(select(Itinerary.id).where(Itinerary.creator_id == user_id))))
         itineraries = session.exec(select(Itinerary).where(Itinerary.creator_id == user_id)).all()
         for itinerary in itineraries:
+            detach_dependents(session, itinerary_id=itinerary.id, with_blocks=True)
+            remove_from_lineage(session, itinerary)
             session.delete(itinerary)
         
         # Delete follow relationships where this user is the follower
-        from .models import Follow
         follows = session.exec(select(Follow).where(Follow.follower_id == user_id)).all()
         for follow in follows:
             session.delete(follow)
@@ -64,6 +79,9 @@ def delete_user(session: Session, user_id: int) -> bool:
         
         # Then delete the user
         session.delete(user)
+        session.flush()
+        if affected:
+            recount_user_stats(session, list(affected))
         session.commit()
         return True
     except Exception as e:
@@ -71,123 +89,719 @@ def delete_user(session: Session, user_id: int) -> bool:
         # Log error without exposing details in production
         return False
 
+# ----------------------------------
+# Profile counters (User.trips_count / saved_count / followers_count / following_count)
+# ----------------------------------
+def bump_user_stats(session: Session, user_ids, **deltas: int) -> None:
+    """
+    Atomically add `deltas` (e.g. trips_count=1) to the counters of `user_ids` (an id, a list or a select).
+    Call inside the write's transaction so the counter commits (or rolls back) with the row it counts.
+    """
+    ids = [user_ids] if isinstance(user_ids, int) else user_ids
+    session.exec(
+        update(User)
+        .where(User.id.in_(ids))
+        .values({getattr(User, name): getattr(User, name) + delta for name, delta in deltas.items()})
+        .execution_options(synchronize_session=False)
+    )
+
+def recount_user_stats(session: Session, user_ids: Optional[List[int]] = None) -> int:
+    """
+    Re-derive the counters from the source tables for `user_ids` (default: every user) in one UPDATE,
+    writing only rows that drifted; returns how many did. Caller commits.
+    """
+    counts = {
+        User.trips_count: select(func.count(Itinerary.id)).where(Itinerary.creator_id == User.id).scalar_subquery(),
+        User.saved_count: select(func.count(Bookmark.id)).where(Bookmark.user_id == User.id).scalar_subquery(),
+        User.followers_count: select(func.count(Follow.id)).where(Follow.following_id == User.id).scalar_subquery(),
+        User.following_count: select(func.count(Follow.id)).where(Follow.follower_id == User.id).scalar_subquery(),
+    }
+    stmt = update(User).where(or_(*(column != actual for column, actual in counts.items()))).values(counts)
+    if user_ids is not None:
+        stmt = stmt.where(User.id.in_(user_ids))
+    return session.exec(stmt.execution_options(synchronize_session=False)).rowcount
+
+def add_bookmark(session: Session, user_id: int, itinerary_id: int) -> None:
+    """Save a trip for a user; already saved is a no-op (the unique constraint rejects the duplicate)."""
+    try:
+        with session.begin_nested():
+            session.add(Bookmark(user_id=user_id, itinerary_id=itinerary_id))
+            session.flush()
+    except IntegrityError:
+        return
+    bump_user_stats(session, user_id, saved_count=1)
+    session.commit()
+
+def remove_bookmark(session: Session, user_id: int, itinerary_id: int) -> None:
+    """Unsave a trip; a missing bookmark is a no-op."""
+    removed = session.exec(delete(Bookmark).where(Bookmark.user_id == user_id, Bookmark.itinerary_id == itinerary_id)).rowcount
+    if removed:
+        bump_user_stats(session, user_id, saved_count=-removed)
+        session.commit()
+
+def follow_user(session: Session, follower_id: int, target_id: int) -> None:
+    """Make `follower_id` follow `target_id`; already following is a no-op."""
+    try:
+        with session.begin_nested():
+            session.add(Follow(follower_id=follower_id, following_id=target_id))
+            session.flush()
+    except IntegrityError:
+        return
+    bump_user_stats(session, follower_id, following_count=1)
+    bump_user_stats(session, target_id, followers_count=1)
+    session.commit()
+
+def unfollow_user(session: Session, follower_id: int, target_id: int) -> None:
+    """Stop following; not following is a no-op."""
+    removed = session.exec(delete(Follow).where(Follow.follower_id == follower_id, Follow.following_id == target_id)).rowcount
+    if removed:
+        bump_user_stats(session, follower_id, following_count=-removed)
+        bump_user_stats(session, target_id, followers_count=-removed)
+        session.commit()
+
+def list_follow_page(session: Session, user_id: int, *, followers: bool, after: Optional[int] = None, limit: int = 20) -> tuple[List[User], Optional[int]]:
+    """
+    Keyset page of a user's followers (`followers=True`) or of the users they follow, most recent follow first.
+    - One query: the Follow rows joined to the listed users, whose stats are their own counter columns.
+    - `after` is the last follow id the client has seen (the cursor); costs stay flat however deep the page,
+      via the (following_id, id) / (follower_id, id) indexes.
+    - Returns (users, next_after); next_after is None on the last page.
+    """
+    mine, theirs = (Follow.following_id, Follow.follower_id) if followers else (Follow.follower_id, Follow.following_id)
+    stmt = select(Follow.id, User).join(User, User.id == theirs).where(mine == user_id)
+    if after is not None:
+        stmt = stmt.where(Follow.id < after)
+    rows = session.exec(stmt.order_by(Follow.id.desc()).limit(limit + 1)).all()
+    next_after = rows[limit - 1][0] if len(rows) > limit else None
+    return [user for _, user in rows[:limit]], next_after
+
 # ----------------------------------
 # ItineraryBlock CRUD
 # ----------------------------------
-def create_block(session: Session, day_group_id: int, order: int, type: str, content: str) -> ItineraryBlock:
+# ItineraryBlock.content is deferred; refreshing a block that goes back to the client names it so the
+# reload is one SELECT instead of a second lazy load during serialization.
+BLOCK_READ_ATTRS = ["day_group_id", "order", "type", "content"]
+
+def normalize_block_type(block_type: str) -> str:
+    """Lowercase the type; 'photo' still counts as an image on the client."""
+    normalized_type = block_type.lower()
+    return "image" if normalized_type == "photo" else normalized_type
+
+def create_block(session: Session, day_group_id: int, order: int, type: str, content: str, *, autocommit: bool = True) -> ItineraryBlock:
     """
     Create a new block under a specific DayGroup.
+    autocommit=False (batched edits): only flush; the caller bumps the version and commits.
     """
+    detach_dependents(session, day_id=day_group_id)
     block = ItineraryBlock(day_group_id=day_group_id,order=order,type=type,content=content,)
     session.add(block)
-    session.commit()
-    session.refresh(block)
+    session.flush()  # get block.id for the search index
+    search.index_block(session, block.id)
+    note_change(session, "block", block.id)
+    if autocommit:
+        touch_itinerary(session, day_group_id=day_group_id)
+        session.commit()
+        session.refresh(block, BLOCK_READ_ATTRS)
     return block
 
-def get_blocks(session: Session, day_group_id: int) -> List[ItineraryBlock]:
+def update_block(session: Session, block: ItineraryBlock, *, type: Optional[str] = None, content: Optional[str] = None, autocommit: bool = True) -> ItineraryBlock:
+    """Change a block's type and/or content (caller checked ownership); reindexes it for search."""
+    detach_dependents(session, day_id=block.day_group_id)
+    if type is not None:
+        block.type = normalize_block_type(type)
+    if content is not None:
+        block.content = content
+    session.add(block)
+    session.flush()
+    search.index_block(session, block.id)
+    note_change(session, "block", block.id)
+    if autocommit:
+        touch_itinerary(session, day_group_id=block.day_group_id)
+        session.commit()
+        session.refresh(block, BLOCK_READ_ATTRS)
+    return block
+
+# Blocks are ranked by sparse integers: appends step by ORDER_GAP and inserts take the midpoint of their
+# neighbours, so placing or moving a block writes only that row. A day is renumbered only when a gap runs out.
+ORDER_GAP = 1024
+
+def rebalance_block_orders(session: Session, day_group_id: int) -> None:
+    """
+    Respread a day's block orders to ORDER_GAP multiples, keeping their sequence. Caller commits.
+    Two statements: negate every order, then assign the new ranks in one CASE, so the
+    (day_group_id, order) unique constraint never sees a transient duplicate.
+    """
+    ids = session.exec(select(ItineraryBlock.id).where(ItineraryBlock.day_group_id == day_group_id).order_by(ItineraryBlock.order)).all()
+    if not ids:
+        return
+    in_day = ItineraryBlock.day_group_id == day_group_id
+    session.exec(update(ItineraryBlock).where(in_day).values(order=-ItineraryBlock.order).execution_options(synchronize_session=False))
+    ranks = case({block_id: (i + 1) * ORDER_GAP for i, block_id in enumerate(ids)}, value=ItineraryBlock.id)
+    session.exec(update(ItineraryBlock).where(in_day).values(order=ranks).execution_options(synchronize_session=False))
+    session.expire_all()
+    for block_id in ids:
+        note_change(session, "block", block_id)
+
+def allocate_block_orders(session: Session, day_group_id: int, count: int = 1, *, above: int = 0) -> int:
+    """
+    Reserve `count` consecutive end-of-day orders (ORDER_GAP apart) and return the first.
+    One UPDATE ... RETURNING on the day's last_block_order: the row lock serializes concurrent appends
+    to a day, and taking the larger of the counter and MAX(order) keeps it ahead of orders written
+    by other paths (explicit orders, moves, copies).
+    `above`: also stay above this order (explicit orders of the same batch, not written yet).
+    """
+    last = select(func.coalesce(func.max(ItineraryBlock.order), 0)).where(ItineraryBlock.day_group_id == DayGroup.id).scalar_subquery()
+    high = func.coalesce(DayGroup.last_block_order, 0)
+    floor = case((high > last, high), else_=last)
+    if above:
+        floor = case((floor > above, floor), else_=above)
+    top = session.exec(
+        update(DayGroup)
+        .where(DayGroup.id == day_group_id)
+        .values(last_block_order=floor + count * ORDER_GAP)
+        .returning(DayGroup.last_block_order)
+        .execution_options(synchronize_session=False)
+    ).one()[0]
+    return top - (count - 1) * ORDER_GAP
+
+def block_order_between(session: Session, day_group_id: int, *, before_id: Optional[int] = None, after_id: Optional[int] = None, exclude_id: Optional[int] = None) -> int:
+    """
+    Free order for a block placed right before `before_id`, right after `after_id`, or (neither) at the end of the day.
+    - The end of the day (also: after the last block) comes from allocate_block_orders and never collides.
+    - Otherwise the day's row is locked first, like allocate_block_orders does, so concurrent placements on
+      one day queue up instead of taking the same midpoint; then one query for the anchor's neighbour.
+      The day is rebalanced first only if there's no gap left.
+    - `exclude_id` is the block being moved, which must not count as its own neighbour.
+    - 404 if the anchor isn't a block of that day.
+    """
+    anchor_id = before_id if before_id is not None else after_id
+    if anchor_id is None:
+        return allocate_block_orders(session, day_group_id)
+    session.exec(
+        update(DayGroup)
+        .where(DayGroup.id == day_group_id)
+        .values(last_block_order=DayGroup.last_block_order)
+        .execution_options(synchronize_session=False)
+    )
+
+    def neighbours() -> tuple[int, Optional[int]]:
+        in_day = [ItineraryBlock.day_group_id == day_group_id]
+        if exclude_id is not None:
+            in_day.append(ItineraryBlock.id != exclude_id)
+        anchor = session.exec(select(ItineraryBlock.order).where(ItineraryBlock.id == anchor_id, *in_day)).first()
+        if anchor is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Anchor block not found on that day")
+        if before_id is not None:
+            prev = session.exec(select(func.coalesce(func.max(ItineraryBlock.order), 0)).where(*in_day, ItineraryBlock.order < anchor)).one()
+            return prev, anchor
+        nxt = session.exec(select(func.min(ItineraryBlock.order)).where(*in_day, ItineraryBlock.order > anchor)).one()
+        return anchor, nxt
+
+    prev, nxt = neighbours()
+    if nxt is None:
+        return allocate_block_orders(session, day_group_id)
+    if nxt - prev < 2:
+        rebalance_block_orders(session, day_group_id)
+        prev, nxt = neighbours()
+    return (prev + nxt) // 2
+
+def move_block(session: Session, block: ItineraryBlock, day_group_id: int, *, before_id: Optional[int] = None, after_id: Optional[int] = None, autocommit: bool = True) -> ItineraryBlock:
+    """
+    Move a block within its day or into another day of the same itinerary (caller checked ownership
+    and materialized both days). Only the moved row is written, unless a gap has to be rebalanced.
+    """
+    source_day_id = block.day_group_id
+    detach_dependents(session, day_id=source_day_id)
+    detach_dependents(session, day_id=day_group_id)
+    order = block_order_between(session, day_group_id, before_id=before_id, after_id=after_id, exclude_id=block.id)
+    block.day_group_id = day_group_id
+    block.order = order
+    session.add(block)
+    session.flush()
+    note_change(session, "block", block.id)
+    if day_group_id != source_day_id:
+        search.index_block(session, block.id)
+    if autocommit:
+        touch_itinerary(session, day_group_id=day_group_id)
+        session.commit()
+        session.refresh(block, BLOCK_READ_ATTRS)
+    return block
+
+BLOCK_ORDER_ATTEMPTS = 3
+
+def insert_block(session: Session, day_group_id: int, type: str, content: str, *, before_id: Optional[int] = None, after_id: Optional[int] = None, autocommit: bool = True) -> ItineraryBlock:
+    """
+    Create a block right before `before_id`, right after `after_id`, or at the end of the day, picking its order.
+    End-of-day orders never collide (allocate_block_orders). A concurrent insert between the same two blocks
+    can take the midpoint first; the unique constraint then rejects ours inside a savepoint and the order
+    is picked again, up to BLOCK_ORDER_ATTEMPTS times.
+    """
+    detach_dependents(session, day_id=day_group_id)  # outside the savepoint: placing may respread the day's orders
+    for attempt in range(BLOCK_ORDER_ATTEMPTS):
+        try:
+            with session.begin_nested():
+                order = block_order_between(session, day_group_id, before_id=before_id, after_id=after_id)
+                block = create_block(session, day_group_id, order, type, content, autocommit=False)
+            break
+        except IntegrityError:
+            if attempt == BLOCK_ORDER_ATTEMPTS - 1:
+                raise
+    if autocommit:
+        touch_itinerary(session, day_group_id=day_group_id)
+        session.commit()
+        session.refresh(block, BLOCK_READ_ATTRS)
+    return block
+
+def create_blocks(session: Session, day_group_id: int, blocks: List[dict]) -> List[dict]:
     """
-    Fetch all blocks for the given DayGroup, ordered by `order`.
+    Insert several blocks into one DayGroup with a single multi-row INSERT ... RETURNING and one commit.
+    - `blocks` are {"order", "type", "content"} dicts; None orders are reserved at the end of the day
+      (above the batch's own explicit orders too) in one allocate_block_orders call for the whole batch,
+      ORDER_GAP apart, in list order.
+    - All-or-nothing: an explicit order that collides raises IntegrityError and nothing is written (caller rolls back).
+    - Returns ItineraryBlockRead-shaped dicts in input order.
     """
-    stmt = select(ItineraryBlock).where(
-        ItineraryBlock.day_group_id == day_group_id
+    detach_dependents(session, day_id=day_group_id)
+    wanted = sum(b["order"] is None for b in blocks)
+    explicit = max((b["order"] for b in blocks if b["order"] is not None), default=0)
+    free = count(allocate_block_orders(session, day_group_id, wanted, above=explicit), ORDER_GAP) if wanted else None
+    rows = [
+        {"day_group_id": day_group_id, "order": next(free) if b["order"] is None else b["order"], "type": b["type"], "content": b["content"]}
+        for b in blocks
+    ]
+
+    inserted = session.exec(insert(ItineraryBlock).values(rows).returning(ItineraryBlock.id, ItineraryBlock.order)).all()
+    # orders are unique within the day, so they map RETURNING rows back to the input
+    ids = {order: block_id for block_id, order in inserted}
+    out = [{"id": ids[r["order"]], **r} for r in rows]
+
+    search.index_new_blocks(session, list(ids.values()))
+    for block_id in ids.values():
+        note_change(session, "block", block_id)
+    touch_itinerary(session, day_group_id=day_group_id)
+    session.commit()
+    return out
+
+def get_blocks(session: Session, day_group_id: int) -> List[dict]:
+    """
+    Fetch all blocks for the given DayGroup, ordered by `order`, as ItineraryBlockRead-shaped dicts.
+    Blocks a copy-on-write day still shares are read from its source day but reported under this day.
+    """
+    source = select(func.coalesce(DayGroup.blocks_source_day_id, DayGroup.id)).where(DayGroup.id == day_group_id).scalar_subquery()
+    stmt = select(ItineraryBlock.id, ItineraryBlock.order, ItineraryBlock.type, ItineraryBlock.content).where(
+        ItineraryBlock.day_group_id == source
     ).order_by(ItineraryBlock.order)
-    return session.exec(stmt).all()
+    return [
+        {"id": r.id, "day_group_id": day_group_id, "order": r.order, "type": r.type, "content": r.content}
+        for r in session.exec(stmt)
+    ]
 
-def delete_block(session: Session, block: ItineraryBlock) -> None:
+def delete_block(session: Session, block: ItineraryBlock, *, autocommit: bool = True) -> None:
     """
     Delete an itinerary block.
     Assumes caller already performed authorization (e.g., ensure_block_owner)
     and ensured the block belongs to the intended path.
     """
+    detach_dependents(session, day_id=block.day_group_id)
+    search.unindex_block(session, block.id)
+    note_change(session, "block", block.id)
     session.delete(block)        # remove the ORM instance
-    session.commit()             # persist the delete
+    if autocommit:
+        touch_itinerary(session, day_group_id=block.day_group_id)
+        session.commit()         # persist the delete
+    else:
+        session.flush()
 
 # ----------------------------------
 # Itinerary Helpers
 # ----------------------------------
+def touch_itinerary(session: Session, *, itinerary_id: Optional[int] = None, day_group_id: Optional[int] = None) -> None:
+    """
+    Atomically bump Itinerary.version (by itinerary id, or via the owning day group).
+    Call inside the write's transaction, before commit, so caches keyed on version never serve stale data.
+    Also appends the changes noted since the last bump (note_change) to the change log at the new version.
+    Copy-on-write forks are detached before their source changes (detach_dependents), so no other
+    itinerary's content is affected.
+    """
+    if itinerary_id is None:
+        itinerary_id = select(DayGroup.itinerary_id).where(DayGroup.id == day_group_id).scalar_subquery()
+    session.exec(
+        update(Itinerary)
+        .where(Itinerary.id == itinerary_id)
+        .values(version=Itinerary.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+    # Stamp log rows with the version just written (read back inside the same statement)
+    changes = dict.fromkeys(session.info.pop("itinerary_changes", None) or [("snapshot", 0)])
+    new_version = select(Itinerary.version).where(Itinerary.id == itinerary_id).scalar_subquery()
+    session.exec(insert(ItineraryChange).values([
+        {"itinerary_id": itinerary_id, "version": new_version, "entity": entity, "entity_id": entity_id}
+        for entity, entity_id in changes
+    ]))
+
+def note_change(session: Session, entity: str, entity_id: int) -> None:
+    """
+    Record that a write touched an "itinerary", "day" or "block" row (or "snapshot": ids changed wholesale).
+    The next touch_itinerary in the transaction writes them to the change log.
+    """
+    session.info.setdefault("itinerary_changes", []).append((entity, entity_id))
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_noted_changes(session, transaction) -> None:
+    # notes never outlive their transaction; a savepoint (begin_nested) ending inside it keeps them
+    if transaction.parent is None:
+        session.info.pop("itinerary_changes", None)
+        session.info.pop("materialized", None)
+    # any end, savepoints included: a rolled-back savepoint may have undone a detach
+    session.info.pop("detached_content", None)
+
+def normalize_tags(tags: Optional[List[str]]) -> List[str]:
+    """Lowercase, trim and de-duplicate tags (order preserved) for the tag index."""
+    seen: dict[str, None] = {}
+    for t in tags or []:
+        t = t.strip().lower()
+        if t:
+            seen.setdefault(t, None)
+    return list(seen)
+
+def sync_tag_index(itin: Itinerary, tags: Optional[List[str]]) -> None:
+    """
+    Make itin.tag_index mirror `tags`; caller commits.
+    Diffs against the existing rows so a kept tag is never deleted and re-inserted in the same flush.
+    """
+    wanted = normalize_tags(tags)
+    current = {row.tag: row for row in itin.tag_index}
+    itin.tag_index = [current.get(t) or ItineraryTag(tag=t) for t in wanted]
+
+UNIQUE_NAME_ATTEMPTS = 3
+
+def _first_free_name(session: Session, column, creator_id: int, prefix: str, candidates: Iterator[str]) -> str:
+    """
+    First candidate not yet used by the creator, in one query.
+    Fetches every slug/title of the creator starting with `prefix` (creator_id seek plus prefix range
+    on the text_pattern_ops (creator_id, slug|title) index on Postgres) and picks the suffix in memory.
+    """
+    taken = set(session.exec(select(column).where(Itinerary.creator_id == creator_id, column.startswith(prefix, autoescape=True))).all())
+    return next(name for name in candidates if name not in taken)
+
 def generate_unique_slug(session: Session, title: str, creator_id: int) -> str:
-    """Helper functor to generate unique slug for each itinerary."""
+    """Helper functor to generate unique slug for each itinerary: base, base-1, base-2, ..."""
     base = slugify(title)
-    slug = base
-    count = 1
-    while session.exec(select(Itinerary).where(Itinerary.slug == slug,Itinerary.creator_id == creator_id)).first():
-        slug = f"{base}-{count}"
-        count += 1
-    return slug
+    return _first_free_name(session, Itinerary.slug, creator_id, base, chain([base], (f"{base}-{n}" for n in count(1))))
 
 
 def generate_unique_title(session: Session, title: str, creator_id: int) -> str:
-    base = title
-    name = base
-    count = 1
-    while session.exec(select(Itinerary).where(Itinerary.title == name, Itinerary.creator_id == creator_id)).first():
-        count += 1
-        name = f"{base} ({count})"
-    return name
-
-def fork_itinerary(session: Session, original_id: int, new_creator_id: int) -> Itinerary:
-    """Clone itinerary with all day groups and blocks (deep copy)."""
+    """Title, Title (2), Title (3), ..."""
+    return _first_free_name(session, Itinerary.title, creator_id, title, chain([title], (f"{title} ({n})" for n in count(2))))
+
+def generate_fork_title(session: Session, title: str, creator_id: int) -> str:
+    """Title (forked), Title (forked 2), ..."""
+    base = f"{title} (forked"
+    return _first_free_name(session, Itinerary.title, creator_id, base, chain([f"{base})"], (f"{base} {n})" for n in count(2))))
+
+def insert_with_unique_slug(session: Session, itin: Itinerary, *, fork_title_of: Optional[str] = None) -> None:
+    """
+    Flush a new itinerary with a free slug (and, for forks, a free "(forked N)" title of `fork_title_of`).
+    A concurrent insert can still claim the same name first; the unique constraint then rejects ours
+    inside a savepoint and the names are picked again, up to UNIQUE_NAME_ATTEMPTS times.
+    """
+    for attempt in range(UNIQUE_NAME_ATTEMPTS):
+        if fork_title_of is not None:
+            itin.title = generate_fork_title(session, fork_title_of, itin.creator_id)
+        itin.slug = generate_unique_slug(session, itin.title, itin.creator_id)
+        try:
+            with session.begin_nested():
+                session.add(itin)
+                session.flush()
+            return
+        except IntegrityError:
+            if attempt == UNIQUE_NAME_ATTEMPTS - 1:
+                raise
+
+def fork_itinerary(session: Session, original_id: int, new_creator_id: int, *, copy_on_write: bool = False, on_progress: Optional[Callable[[int], None]] = None) -> Itinerary:
+    """
+    Clone itinerary with all day groups and blocks.
+    - Deep copy (default): days and blocks are copied with two set-based INSERT ... SELECT statements
+      in one transaction, so the round trips don't grow with the number of days or blocks.
+    - copy_on_write=True: O(1); the fork reads the original's days/blocks until it is first edited
+      (see materialize_days / materialize_day_blocks).
+    - `on_progress(percent)` is called between steps (used by background fork jobs).
+    """
+    report = on_progress or (lambda percent: None)
     original = session.get(Itinerary, original_id)
     if not original:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Original itinerary not found")
 
-    # Make a unique title for the new owner
-    title = f"{original.title} (forked)"
-    suffix = 1
-    while session.exec(
-        select(Itinerary).where(Itinerary.title == title, Itinerary.creator_id == new_creator_id)
-    ).first():
-        suffix += 1
-        title = f"{original.title} (forked {suffix})"
-
-    slug = generate_unique_slug(session, title, new_creator_id)
-
-    # Create the forked itinerary
+    # Create the forked itinerary (title/slug picked by insert_with_unique_slug)
     forked = Itinerary(
-        title=title,
         description=original.description,
         visibility=original.visibility,
         creator_id=new_creator_id,
-        slug=slug,
         tags=list(original.tags),
         parent_id=original.id,
     )
-    session.add(forked)
-    session.flush()  # get forked.id
+    # a copy-on-write original may not own its content yet; copy/share from whoever does
+    content_id = original.days_source_id or original.id
+    if copy_on_write:
+        forked.days_source_id = content_id
+    sync_tag_index(forked, forked.tags)
+    insert_with_unique_slug(session, forked, fork_title_of=original.title)  # gets forked.id
+    add_fork_lineage(session, original.id, forked.id)
+    report(10)
 
-    # Copy days in order
-    orig_days = session.exec(
-        select(DayGroup).where(DayGroup.itinerary_id == original.id).order_by(DayGroup.order)
-    ).all()
-
-    for d in orig_days:
-        new_day = DayGroup(
-            itinerary_id=forked.id,
-            date=d.date,
-            order=d.order,
-            title=d.title,
+    if not copy_on_write:
+        # Copy days in one INSERT ... SELECT (orders are preserved, so they identify days within a trip)
+        session.exec(
+            insert(DayGroup).from_select(
+                ["itinerary_id", "date", "order", "title"],
+                select(literal(forked.id), DayGroup.date, DayGroup.order, DayGroup.title)
+                .where(DayGroup.itinerary_id == content_id),
+            )
         )
-        session.add(new_day)
-        session.flush()  # get new_day.id
+        report(30)
 
-        # Copy blocks for this day in order
-        blocks = session.exec(
-            select(ItineraryBlock).where(ItineraryBlock.day_group_id == d.id).order_by(ItineraryBlock.order)
-        ).all()
-        for b in blocks:
-            session.add(
-                ItineraryBlock(
-                    day_group_id=new_day.id,
-                    order=b.order,
-                    type=b.type,
-                    content=b.content,
-                )
+        # Copy blocks in one INSERT ... SELECT, mapping each old day to the new day with the same order
+        old_day = aliased(DayGroup)
+        new_day = aliased(DayGroup)
+        session.exec(
+            insert(ItineraryBlock).from_select(
+                ["day_group_id", "order", "type", "content"],
+                select(new_day.id, ItineraryBlock.order, ItineraryBlock.type, ItineraryBlock.content)
+                .join(old_day, ItineraryBlock.day_group_id == func.coalesce(old_day.blocks_source_day_id, old_day.id))
+                .join(new_day, (new_day.itinerary_id == forked.id) & (new_day.order == old_day.order))
+                .where(old_day.itinerary_id == content_id),
             )
+        )
+        report(70)
 
+    search.reindex_itinerary(session, forked.id)
+    bump_user_stats(session, new_creator_id, trips_count=1)
+    report(90)
     session.commit()
     session.refresh(forked)
     return forked
 
+# ----------------------------------
+# Copy-on-write fork helpers
+# ----------------------------------
+def materialize_days(session: Session, itin: Itinerary) -> dict[int, int]:
+    """
+    Give a copy-on-write fork its own day rows (blocks stay shared via blocks_source_day_id).
+    Returns {source_day_id: own_day_id}: the same mapping again if this transaction already did it,
+    else empty if the itinerary already owns its days. Caller commits.
+    """
+    source_id = itin.days_source_id
+    if source_id is None:
+        return session.info.get("materialized", {}).get(("days", itin.id), {})
+    session.exec(
+        insert(DayGroup).from_select(
+            ["itinerary_id", "date", "order", "title", "blocks_source_day_id"],
+            select(literal(itin.id), DayGroup.date, DayGroup.order, DayGroup.title, func.coalesce(DayGroup.blocks_source_day_id, DayGroup.id))
+            .where(DayGroup.itinerary_id == source_id),
+        )
+    )
+    itin.days_source_id = None
+    session.add(itin)
+    note_change(session, "snapshot", itin.id)  # the fork's day ids change
+    source_day = aliased(DayGroup)
+    rows = session.exec(
+        select(source_day.id, DayGroup.id)
+        .join(source_day, (source_day.itinerary_id == source_id) & (source_day.order == DayGroup.order))
+        .where(DayGroup.itinerary_id == itin.id)
+    ).all()
+    mapping = session.info.setdefault("materialized", {})[("days", itin.id)] = {src: own for src, own in rows}
+    return mapping
+
+def materialize_day_blocks(session: Session, day: DayGroup) -> dict[int, int]:
+    """
+    Copy the shared blocks of one day into it, so only this day is materialized.
+    Returns {source_block_id: own_block_id}: the same mapping again if this transaction already did it
+    (e.g. an ownership check before the route), else empty if the day already owns its blocks. Caller commits.
+    """
+    source_day_id = day.blocks_source_day_id
+    if source_day_id is None:
+        return session.info.get("materialized", {}).get(("blocks", day.id), {})
+    # the day's block ids are about to change under the forks reading it
+    detach_dependents(session, day_id=day.id)
+    session.exec(
+        insert(ItineraryBlock).from_select(
+            ["day_group_id", "order", "type", "content"],
+            select(literal(day.id), ItineraryBlock.order, ItineraryBlock.type, ItineraryBlock.content)
+            .where(ItineraryBlock.day_group_id == source_day_id),
+        )
+    )
+    day.blocks_source_day_id = None
+    session.add(day)
+    note_change(session, "snapshot", day.id)  # the day's block ids change
+    source_block = aliased(ItineraryBlock)
+    rows = session.exec(
+        select(source_block.id, ItineraryBlock.id)
+        .join(source_block, (source_block.day_group_id == source_day_id) & (source_block.order == ItineraryBlock.order))
+        .where(ItineraryBlock.day_group_id == day.id)
+    ).all()
+    session.expire(day, ["blocks"])
+    search.index_day(session, day.id)
+    mapping = session.info.setdefault("materialized", {})[("blocks", day.id)] = {src: own for src, own in rows}
+    return mapping
+
+def resolve_writable_day(session: Session, itin: Itinerary, day_id: int) -> DayGroup:
+    """
+    Return the itinerary's own DayGroup for `day_id`, materializing a copy-on-write fork's days first.
+    Accepts either the fork's own day id or the id of the shared source day it was copied from; else 404.
+    """
+    day_id = materialize_days(session, itin).get(day_id, day_id)
+    day = session.get(DayGroup, day_id)
+    if day and day.itinerary_id == itin.id:
+        return day
+    # a stale shared id from before materialization: find the own day still sharing its blocks
+    day = session.exec(select(DayGroup).where(DayGroup.itinerary_id == itin.id, DayGroup.blocks_source_day_id == day_id)).first()
+    if not day:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return day
+
+def resolve_writable_block(session: Session, itin: Itinerary, block_id: int) -> ItineraryBlock:
+    """
+    Return the itinerary's own block for `block_id`, materializing copy-on-write days/blocks first.
+    Accepts the id of a shared source block the fork currently shows; 404 if it isn't in this itinerary.
+    """
+    block = session.get(ItineraryBlock, block_id)
+    if not block:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Block not found")
+    day = resolve_writable_day(session, itin, block.day_group_id)
+    block_id = materialize_day_blocks(session, day).get(block_id, block_id)
+    block = session.get(ItineraryBlock, block_id)
+    if not block or block.day_group_id != day.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Block not found")
+    return block
+
+def detach_dependents(session: Session, *, itinerary_id: Optional[int] = None, day_id: Optional[int] = None, with_blocks: bool = False) -> None:
+    """
+    Copy-on-write on the source side: materialize whatever still reads an itinerary's days (`itinerary_id`)
+    or one day's blocks (`day_id`) before they are written or deleted, so a copy-on-write fork keeps the
+    content it was forked with, like a copy would.
+    - Forks sharing the itinerary's (or the day's itinerary's) days get their own day rows.
+    - Days sharing the blocks of `day_id` (with_blocks=True: of every day of `itinerary_id`) get their own blocks.
+    - One query when nothing is shared, none when this transaction already detached the same content.
+    - Each detached fork gets its own version bump (its ids change), apart from the caller's noted changes.
+    """
+    key = ("day", day_id) if day_id is not None else ("itinerary", itinerary_id, with_blocks)
+    detached = session.info.setdefault("detached_content", set())
+    if key in detached:
+        return
+    if day_id is not None:
+        itinerary_id = select(DayGroup.itinerary_id).where(DayGroup.id == day_id).scalar_subquery()
+        shared_from = [day_id]
+    else:
+        shared_from = select(DayGroup.id).where(DayGroup.itinerary_id == itinerary_id) if with_blocks else None
+    sharing = select(Itinerary.id.label("fork_id"), null().label("day_id")).where(Itinerary.days_source_id == itinerary_id)
+    if shared_from is not None:
+        sharing = union_all(sharing, select(null(), DayGroup.id).where(DayGroup.blocks_source_day_id.in_(shared_from)))
+    rows = session.exec(sharing).all()
+    detached.add(key)
+    if not rows:
+        return
+
+    pending = session.info.pop("itinerary_changes", None)
+    fork_ids = [fork_id for fork_id, _ in rows if fork_id is not None]
+    if fork_ids:
+        for fork in session.exec(select(Itinerary).where(Itinerary.id.in_(fork_ids))).all():
+            materialize_days(session, fork)
+            touch_itinerary(session, itinerary_id=fork.id)
+    while shared_from is not None:
+        # also the day rows just given to those forks, which still share the blocks; materializing a
+        # day first detaches the forks of its own itinerary, whose new days share the same blocks: re-query
+        days = session.exec(select(DayGroup).where(DayGroup.blocks_source_day_id.in_(shared_from))).all()
+        if not days:
+            break
+        for day in days:
+            materialize_day_blocks(session, day)
+            touch_itinerary(session, day_group_id=day.id)
+    if pending:
+        session.info["itinerary_changes"] = pending
+
+# ----------------------------------
+# Fork lineage (closure table)
+# ----------------------------------
+def add_fork_lineage(session: Session, parent_id: int, child_id: int) -> None:
+    """Record a new fork: the parent at depth 1 plus every ancestor of the parent one hop further. Caller commits."""
+    session.add(ItineraryLineage(ancestor_id=parent_id, descendant_id=child_id, depth=1))
+    session.exec(
+        insert(ItineraryLineage).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(ItineraryLineage.ancestor_id, literal(child_id), ItineraryLineage.depth + 1)
+            .where(ItineraryLineage.descendant_id == parent_id),
+        )
+    )
+
+def remove_from_lineage(session: Session, itin: Itinerary) -> None:
+    """
+    Splice an itinerary about to be deleted out of the fork tree. Caller commits.
+    - Its direct forks are re-parented to its own parent (or become roots); parent_id is part of
+      their detail payload, so each gets a version bump and an "itinerary" change-log entry.
+    - Paths that ran through it get one hop shorter; its own rows are dropped.
+    """
+    reparented = session.exec(
+        update(Itinerary)
+        .where(Itinerary.parent_id == itin.id)
+        .values(parent_id=itin.parent_id, version=Itinerary.version + 1)
+        .returning(Itinerary.id, Itinerary.version)
+    ).all()
+    if reparented:
+        session.exec(insert(ItineraryChange).values([
+            {"itinerary_id": child_id, "version": version, "entity": "itinerary", "entity_id": child_id}
+            for child_id, version in reparented
+        ]))
+    below = select(ItineraryLineage.descendant_id).where(ItineraryLineage.ancestor_id == itin.id)
+    above = select(ItineraryLineage.ancestor_id).where(ItineraryLineage.descendant_id == itin.id)
+    session.exec(
+        update(ItineraryLineage)
+        .where(ItineraryLineage.descendant_id.in_(below), ItineraryLineage.ancestor_id.in_(above))
+        .values(depth=ItineraryLineage.depth - 1)
+        .execution_options(synchronize_session=False)
+    )
+    session.exec(
+        delete(ItineraryLineage)
+        .where(or_(ItineraryLineage.ancestor_id == itin.id, ItineraryLineage.descendant_id == itin.id))
+        .execution_options(synchronize_session=False)
+    )
+
+def list_fork_descendants(session: Session, itinerary_id: int, *, max_depth: Optional[int] = None, after: Optional[tuple[int, int]] = None, limit: int = 20) -> tuple[List[dict], Optional[tuple[int, int]]]:
+    """
+    Public forks (direct and indirect) of an itinerary as ItineraryLineageItem dicts, nearest generation first.
+    - Keyset-paginated on (depth, id); `after` / next_after are that pair. 404 if the itinerary doesn't exist.
+    """
+    get_itinerary_version(session, itinerary_id)
+    stmt = (
+        itinerary_summary_select()
+        .add_columns(ItineraryLineage.depth)
+        .join(ItineraryLineage, ItineraryLineage.descendant_id == Itinerary.id)
+        .where(ItineraryLineage.ancestor_id == itinerary_id, Itinerary.visibility == "public")
+    )
+    if max_depth is not None:
+        stmt = stmt.where(ItineraryLineage.depth <= max_depth)
+    if after is not None:
+        stmt = stmt.where(tuple_(ItineraryLineage.depth, ItineraryLineage.descendant_id) > tuple_(*after))
+    stmt = stmt.order_by(ItineraryLineage.depth, ItineraryLineage.descendant_id).limit(limit + 1)
+    items = to_itinerary_summaries(session.exec(stmt).all())
+    next_after = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_after = (items[-1]["depth"], items[-1]["id"])
+    return items, next_after
+
+def list_fork_ancestors(session: Session, itinerary_id: int) -> List[dict]:
+    """Public ancestors of an itinerary as ItineraryLineageItem dicts, parent first and root last; 404 if missing."""
+    get_itinerary_version(session, itinerary_id)
+    stmt = (
+        itinerary_summary_select()
+        .add_columns(ItineraryLineage.depth)
+        .join(ItineraryLineage, ItineraryLineage.ancestor_id == Itinerary.id)
+        .where(ItineraryLineage.descendant_id == itinerary_id, Itinerary.visibility == "public")
+        .order_by(ItineraryLineage.depth)
+    )
+    return to_itinerary_summaries(session.exec(stmt).all())
+
 # ----------------------------------
 # Itinerary CRUD
 # ----------------------------------
@@ -207,18 +821,16 @@ def create_itinerary(session: Session, data: ItineraryCreate) -> Itinerary:
                 detail="You already have an itinerary with this title.",
             )
 
-        slug = generate_unique_slug(session, data.title, data.creator_id)
-
         itin = Itinerary(
             title=data.title,
             description=data.description,
             visibility=data.visibility,
             creator_id=data.creator_id,
-            slug=slug,
             tags=data.tags or [],
         )
-        session.add(itin)
-        session.flush()  # get itin.id
+        sync_tag_index(itin, itin.tags)
+        insert_with_unique_slug(session, itin)  # gets itin.id
+        search.index_itinerary(session, itin.id)
 
         # seed Day 1 but do not commit yet
         create_day_group(
@@ -227,6 +839,7 @@ def create_itinerary(session: Session, data: ItineraryCreate) -> Itinerary:
             DayGroupCreate(date=data.start_date, title="Day 1", order=1),
             autocommit=False,
         )
+        bump_user_stats(session, itin.creator_id, trips_count=1)
 
         session.commit()
         session.refresh(itin)
@@ -241,9 +854,125 @@ def create_itinerary(session: Session, data: ItineraryCreate) -> Itinerary:
             )
         raise
 
-def list_itineraries(session: Session) -> List[Itinerary]:
-    """Return all itineraries."""
-    return session.exec(select(Itinerary)).all()
+def itinerary_summary_select():
+    """
+    SELECT producing ItinerarySummary rows (callers add WHERE/ORDER/LIMIT).
+    Day count, start date, cover image and fork count are correlated subqueries, so they are
+    evaluated only for the rows of the page and never load ORM children.
+    """
+    content_id = func.coalesce(Itinerary.days_source_id, Itinerary.id)
+    day_count = (
+        select(func.count(DayGroup.id))
+        .where(DayGroup.itinerary_id == content_id)
+        .correlate(Itinerary)
+        .scalar_subquery()
+    )
+    start_date = (
+        select(func.min(DayGroup.date))
+        .where(DayGroup.itinerary_id == content_id)
+        .correlate(Itinerary)
+        .scalar_subquery()
+    )
+    cover = (
+        select(ItineraryBlock.content)
+        .join(DayGroup, func.coalesce(DayGroup.blocks_source_day_id, DayGroup.id) == ItineraryBlock.day_group_id)
+        .where(DayGroup.itinerary_id == content_id, ItineraryBlock.type == "image")
+        .order_by(DayGroup.order, ItineraryBlock.order)
+        .limit(1)
+        .correlate(Itinerary)
+        .scalar_subquery()
+    )
+    forks = aliased(ItineraryLineage)
+    fork_count = (
+        select(func.count())
+        .select_from(forks)
+        .where(forks.ancestor_id == Itinerary.id, forks.depth == 1)
+        .correlate(Itinerary)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            Itinerary.id, Itinerary.title, Itinerary.slug, Itinerary.visibility, Itinerary.tags,
+            Itinerary.creator_id, User.username.label("creator_username"),
+            day_count.label("day_count"), start_date.label("start_date"), cover.label("cover_image_url"),
+            fork_count.label("fork_count"),
+        )
+        .join(User, User.id == Itinerary.creator_id)
+    )
+
+def to_itinerary_summaries(rows) -> List[dict]:
+    """Map rows from itinerary_summary_select() onto plain ItinerarySummary-shaped dicts."""
+    return [{**r._mapping, "tags": r.tags or []} for r in rows]
+
+def list_itinerary_page(session: Session, stmt, *, summary: bool = False) -> List[dict]:
+    """
+    Run a page query over Itinerary and return response-ready dicts.
+    - `stmt` is `itinerary_summary_select()` (summary) or `select(Itinerary.id)` (full) plus WHERE/ORDER/LIMIT.
+    - Full view costs one extra query for all trees on the page, never one per itinerary.
+    """
+    rows = session.exec(stmt).all()
+    if summary:
+        return to_itinerary_summaries(rows)
+    return get_itinerary_trees(session, list(rows))
+
+def keyset_itinerary_page(session: Session, *where, after: Optional[int] = None, limit: int = 20, summary: bool = False) -> tuple[List[dict], Optional[int]]:
+    """
+    Keyset page of itineraries matching `where`, newest (highest id) first.
+    - `after` is the last id the client has seen; rows strictly older are returned.
+    - `summary=True` returns ItinerarySummary dicts, otherwise full ItineraryRead dicts.
+    - Returns (items, next_after); next_after is None on the last page.
+    """
+    stmt = (itinerary_summary_select() if summary else select(Itinerary.id)).where(*where)
+    if after is not None:
+        stmt = stmt.where(Itinerary.id < after)
+    items = list_itinerary_page(session, stmt.order_by(Itinerary.id.desc()).limit(limit + 1), summary=summary)
+    next_after = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_after = items[-1]["id"]
+    return items, next_after
+
+def itineraries_by_ids(session: Session, itinerary_ids: List[int], *, summary: bool = False) -> List[dict]:
+    """Response dicts for the given ids, in the given order (e.g. relevance order from search)."""
+    if not summary:
+        return get_itinerary_trees(session, itinerary_ids)
+    rows = session.exec(itinerary_summary_select().where(Itinerary.id.in_(itinerary_ids))).all()
+    by_id = {r["id"]: r for r in to_itinerary_summaries(rows)}
+    return [by_id[i] for i in itinerary_ids if i in by_id]
+
+def search_itineraries_by_text(session: Session, query: str, *, limit: int = 20, offset: int = 0, summary: bool = True) -> List[dict]:
+    """Public itineraries ranked by full-text relevance over titles, descriptions and text blocks."""
+    ids = search.search_itinerary_ids(session, query, limit=limit, offset=offset)
+    return itineraries_by_ids(session, ids, summary=summary)
+
+def list_public_itineraries(session: Session, *, after: Optional[int] = None, limit: int = 20, summary: bool = False) -> tuple[List[dict], Optional[int]]:
+    """Keyset page of public itineraries, newest first (see keyset_itinerary_page)."""
+    return keyset_itinerary_page(session, Itinerary.visibility == "public", after=after, limit=limit, summary=summary)
+
+def search_itineraries_by_tags(session: Session, tags: List[str], *, match_all: bool = True, after: Optional[int] = None, limit: int = 20, summary: bool = False) -> tuple[List[dict], Optional[int]]:
+    """
+    Public itineraries carrying the given tags, via the itinerary_tag index.
+    - match_all=True: every tag must be present (AND); otherwise any of them (OR).
+    """
+    wanted = normalize_tags(tags)
+    if not wanted:
+        return [], None
+    matching = select(ItineraryTag.itinerary_id).where(ItineraryTag.tag.in_(wanted))
+    if match_all and len(wanted) > 1:
+        matching = matching.group_by(ItineraryTag.itinerary_id).having(func.count() == len(wanted))
+    return keyset_itinerary_page(
+        session,
+        Itinerary.visibility == "public",
+        Itinerary.id.in_(matching),
+        after=after, limit=limit, summary=summary,
+    )
+
+def get_itinerary_version(session: Session, itinerary_id: int) -> int:
+    """Fetch only the itinerary's version (cheap PK lookup) or 404."""
+    version = session.exec(select(Itinerary.version).where(Itinerary.id == itinerary_id)).first()
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Itinerary not found")
+    return version
 
 def get_itinerary(session: Session, itinerary_id: int) -> Itinerary:
     """Fetch an itinerary by ID or 404."""
@@ -252,6 +981,145 @@ def get_itinerary(session: Session, itinerary_id: int) -> Itinerary:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Itinerary not found")
     return itin
 
+def get_itinerary_trees(session: Session, itinerary_ids: List[int]) -> List[dict]:
+    """
+    Load several itineraries with their ordered days and blocks in a single query.
+    - LEFT JOINs itinerary -> day_group -> itineraryblock and selects plain columns,
+      so no ORM relationship (lazy or selectin) is ever touched.
+    - Copy-on-write forks resolve through their content source; ids of shared days/blocks are the source's.
+    - Returns plain dicts shaped exactly like ItineraryRead (ready for orjson),
+      in the order of `itinerary_ids`; unknown ids are skipped.
+    """
+    if not itinerary_ids:
+        return []
+    stmt = (
+        select(
+            Itinerary.id, Itinerary.title, Itinerary.description, Itinerary.visibility,
+            Itinerary.tags, Itinerary.creator_id, Itinerary.slug, Itinerary.parent_id, Itinerary.version,
+            DayGroup.id.label("day_id"), DayGroup.date.label("day_date"),
+            DayGroup.order.label("day_order"), DayGroup.title.label("day_title"),
+            ItineraryBlock.id.label("block_id"), ItineraryBlock.order.label("block_order"),
+            ItineraryBlock.type.label("block_type"), ItineraryBlock.content.label("block_content"),
+        )
+        .select_from(Itinerary)
+        .outerjoin(DayGroup, DayGroup.itinerary_id == func.coalesce(Itinerary.days_source_id, Itinerary.id))
+        .outerjoin(ItineraryBlock, ItineraryBlock.day_group_id == func.coalesce(DayGroup.blocks_source_day_id, DayGroup.id))
+        .where(Itinerary.id.in_(itinerary_ids))
+        .order_by(Itinerary.id, DayGroup.order, ItineraryBlock.order)
+    )
+
+    trees: dict[int, dict] = {}
+    tree: Optional[dict] = None
+    day: Optional[dict] = None
+    for r in session.exec(stmt):
+        if tree is None or tree["id"] != r.id:
+            tree = {
+                "title": r.title,
+                "description": r.description or "",
+                "visibility": r.visibility,
+                "tags": r.tags or [],
+                "id": r.id,
+                "creator_id": r.creator_id,
+                "slug": r.slug,
+                "parent_id": r.parent_id,
+                "version": r.version,
+                "days": [],
+            }
+            trees[r.id] = tree
+            day = None
+        if r.day_id is None:
+            continue
+        if day is None or day["id"] != r.day_id:
+            day = {"date": r.day_date, "order": r.day_order, "title": r.day_title, "id": r.day_id, "itinerary_id": r.id, "blocks": []}
+            tree["days"].append(day)
+        if r.block_id is not None:
+            day["blocks"].append(
+                {"id": r.block_id, "day_group_id": r.day_id, "order": r.block_order, "type": r.block_type, "content": r.block_content}
+            )
+    return [trees[i] for i in itinerary_ids if i in trees]
+
+def get_itinerary_tree(session: Session, itinerary_id: int) -> dict:
+    """Single-itinerary form of get_itinerary_trees (one query); 404 if missing."""
+    trees = get_itinerary_trees(session, [itinerary_id])
+    if not trees:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Itinerary not found")
+    return trees[0]
+
+# ----------------------------------
+# Change log (delta sync)
+# ----------------------------------
+def get_itinerary_changes(session: Session, itinerary_id: int, since: int) -> dict:
+    """
+    What changed in an itinerary after version `since`, as an ItineraryChanges-shaped dict.
+    - Changed days/blocks come back in their current state; ids that no longer exist are tombstones.
+    - Falls back to a full `snapshot` tree when the log can't cover `since` (compacted past it,
+      unknown future version) or when ids changed wholesale (copy-on-write materialization).
+    """
+    row = session.exec(select(Itinerary.version, Itinerary.changes_floor).where(Itinerary.id == itinerary_id)).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Itinerary not found")
+    version, floor = row
+    out = {
+        "version": version, "since": since, "snapshot": None, "itinerary": None,
+        "days": [], "blocks": [], "deleted_day_ids": [], "deleted_block_ids": [],
+    }
+    if since == version:
+        return out
+
+    changed = session.exec(
+        select(ItineraryChange.entity, ItineraryChange.entity_id)
+        .where(ItineraryChange.itinerary_id == itinerary_id, ItineraryChange.version > since)
+        .distinct()
+    ).all()
+    ids: dict[str, set[int]] = {}
+    for entity, entity_id in changed:
+        ids.setdefault(entity, set()).add(entity_id)
+    if since < floor or since > version or "snapshot" in ids:
+        out["snapshot"] = get_itinerary_tree(session, itinerary_id)
+        out["version"] = out["snapshot"]["version"]
+        return out
+
+    if "itinerary" in ids:
+        itin = get_itinerary(session, itinerary_id)
+        out["itinerary"] = {
+            "id": itin.id, "title": itin.title, "description": itin.description or "", "visibility": itin.visibility,
+            "tags": itin.tags or [], "creator_id": itin.creator_id, "slug": itin.slug, "parent_id": itin.parent_id,
+        }
+    day_ids = ids.get("day", set())
+    if day_ids:
+        days = session.exec(select(DayGroup).where(DayGroup.id.in_(day_ids), DayGroup.itinerary_id == itinerary_id)).all()
+        out["days"] = [
+            {"id": d.id, "itinerary_id": d.itinerary_id, "date": d.date, "order": d.order, "title": d.title}
+            for d in sorted(days, key=lambda d: d.order)
+        ]
+        out["deleted_day_ids"] = sorted(day_ids - {d.id for d in days})
+    block_ids = ids.get("block", set())
+    if block_ids:
+        blocks = session.exec(
+            select(ItineraryBlock.id, ItineraryBlock.day_group_id, ItineraryBlock.order, ItineraryBlock.type, ItineraryBlock.content)
+            .join(DayGroup, DayGroup.id == ItineraryBlock.day_group_id)
+            .where(ItineraryBlock.id.in_(block_ids), DayGroup.itinerary_id == itinerary_id)
+            .order_by(ItineraryBlock.day_group_id, ItineraryBlock.order)
+        ).all()
+        out["blocks"] = [dict(b._mapping) for b in blocks]
+        out["deleted_block_ids"] = sorted(block_ids - {b.id for b in blocks})
+    return out
+
+def compact_change_log(session: Session, keep_versions: int) -> None:
+    """
+    Keep only the last `keep_versions` versions of each itinerary's change log (two set-based statements).
+    Raises changes_floor first, so clients older than the floor get a snapshot instead of a partial delta.
+    """
+    session.exec(
+        update(Itinerary)
+        .where(Itinerary.changes_floor < Itinerary.version - keep_versions)
+        .values(changes_floor=Itinerary.version - keep_versions)
+        .execution_options(synchronize_session=False)
+    )
+    floor = select(Itinerary.changes_floor).where(Itinerary.id == ItineraryChange.itinerary_id).scalar_subquery()
+    session.exec(delete(ItineraryChange).where(ItineraryChange.version <= floor).execution_options(synchronize_session=False))
+    session.commit()
+
 def update_itinerary(session: Session, itinerary_id: int, data: ItineraryUpdate) -> Itinerary:
     """
     Update itinerary metadata.
@@ -284,8 +1152,15 @@ def update_itinerary(session: Session, itinerary_id: int, data: ItineraryUpdate)
 
     for k, v in payload.items():
         setattr(itin, k, v)
+    if "tags" in payload:
+        itin.tags = payload["tags"] or []
+        sync_tag_index(itin, itin.tags)
 
     session.add(itin)
+    if "title" in payload or "description" in payload:
+        search.index_itinerary(session, itin.id)
+    note_change(session, "itinerary", itin.id)
+    touch_itinerary(session, itinerary_id=itin.id)
     session.commit()
     session.refresh(itin)
     return itin
@@ -299,6 +1174,14 @@ def delete_itinerary(session: Session, itinerary_id: int) -> bool:
         itin = session.get(Itinerary, itinerary_id)
         if not itin:
             return False
+        detach_dependents(session, itinerary_id=itin.id, with_blocks=True)
+        remove_from_lineage(session, itin)
+        session.exec(delete(ItineraryChange).where(ItineraryChange.itinerary_id == itin.id))
+        search.unindex_itineraries(session, [itin.id])
+        # each saver loses exactly one bookmark: (user_id, itinerary_id) is unique
+        bump_user_stats(session, select(Bookmark.user_id).where(Bookmark.itinerary_id == itin.id), saved_count=-1)
+        session.exec(delete(Bookmark).where(Bookmark.itinerary_id == itin.id))
+        bump_user_stats(session, itin.creator_id, trips_count=-1)
         session.delete(itin)
         session.commit()
         return True
@@ -311,61 +1194,249 @@ def delete_itinerary(session: Session, itinerary_id: int) -> bool:
 # DayGroup CRUD
 # ----------------------------------
 def get_day_groups(session: Session, itinerary_id: int) -> List[DayGroup]:
-    """Get all DayGroups of the given itinerary_id."""
+    """Get all DayGroups owned by the given itinerary_id (ORM rows; no copy-on-write resolution)."""
     stmt = select(DayGroup).where(DayGroup.itinerary_id == itinerary_id).order_by(DayGroup.order)
     return session.exec(stmt).all()
 
+def get_day_trees(session: Session, itinerary_id: int) -> List[dict]:
+    """DayGroupRead-shaped dicts (with blocks) for an itinerary in one query; [] if it doesn't exist."""
+    trees = get_itinerary_trees(session, [itinerary_id])
+    return trees[0]["days"] if trees else []
+
+def get_day_tree(session: Session, day: DayGroup) -> dict:
+    """DayGroupRead-shaped dict for one loaded day; its blocks (shared ones included) come from get_blocks."""
+    return {"date": day.date, "order": day.order, "title": day.title, "id": day.id, "itinerary_id": day.itinerary_id, "blocks": get_blocks(session, day.id)}
+
 def create_day_group(session: Session, itinerary_id: int, data: DayGroupCreate, *, autocommit: bool = True) -> DayGroup:
-    """Create a new DayGroup, auto-assigning its `order` at the end."""
-    if not session.get(Itinerary, itinerary_id):
+    """
+    Create a new DayGroup, auto-assigning its `order` at the end.
+    autocommit=False (new itineraries, batched edits): only flush; the caller bumps the version and commits.
+    """
+    itin = session.get(Itinerary, itinerary_id)
+    if not itin:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Itinerary not found.")
-    
+    materialize_days(session, itin)
+    detach_dependents(session, itinerary_id=itinerary_id)
+
     max_order = (
     session.exec(select(DayGroup.order).where(DayGroup.itinerary_id == itinerary_id).order_by(DayGroup.order.desc())).first() or 0)
     payload = data.model_dump(exclude={"order"})
     day = DayGroup(itinerary_id=itinerary_id, order=max_order+1, **payload)
     session.add(day)
+    session.flush()
+    note_change(session, "day", day.id)
     if autocommit:
+        touch_itinerary(session, itinerary_id=itinerary_id)
         session.commit()
         session.refresh(day)
     else:
         session.flush()
     return day
 
-def update_day_group(session: Session, day_id: int, data: DayGroupCreate) -> DayGroup:
+def create_day_groups(session: Session, itinerary_id: int, count: int, *, start_date: Optional[date] = None) -> List[dict]:
+    """
+    Append `count` consecutive days ("Day N" titles) with one multi-row INSERT ... RETURNING and one commit.
+    - Orders follow the last day's; dates follow the last day's date unless `start_date` is given
+      (required when the itinerary has no days yet). One query reads the last day for both.
+    - Returns DayGroupRead-shaped dicts (no blocks yet), in order.
+    """
+    itin = session.get(Itinerary, itinerary_id)
+    if not itin:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Itinerary not found.")
+    materialize_days(session, itin)
+    detach_dependents(session, itinerary_id=itinerary_id)
+    last = session.exec(
+        select(DayGroup.order, DayGroup.date).where(DayGroup.itinerary_id == itinerary_id).order_by(DayGroup.order.desc()).limit(1)
+    ).first()
+    if start_date is None:
+        if last is None:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="start_date is required for an itinerary without days.")
+        start_date = last.date + timedelta(days=1)
+    first_order = (last.order if last else 0) + 1
+    rows = [
+        {"itinerary_id": itinerary_id, "date": start_date + timedelta(days=i), "order": first_order + i, "title": f"Day {first_order + i}"}
+        for i in range(count)
+    ]
+    inserted = session.exec(insert(DayGroup).values(rows).returning(DayGroup.id, DayGroup.order)).all()
+    ids = {order: day_id for day_id, order in inserted}
+    for day_id in ids.values():
+        note_change(session, "day", day_id)
+    touch_itinerary(session, itinerary_id=itinerary_id)
+    session.commit()
+    return [{"id": ids[r["order"]], **r, "blocks": []} for r in rows]
+
+def update_day_group(session: Session, day_id: int, data: DayGroupCreate, *, autocommit: bool = True) -> DayGroup:
     """Update a DayGroup’s date or title."""
     day = session.get(DayGroup, day_id)
     if not day:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Day group not found.")
-    
+    detach_dependents(session, itinerary_id=day.itinerary_id)
+
     # only date/title metadata for now
     day.date = data.date
     day.title = data.title
     session.add(day)
-    session.commit()
-    session.refresh(day)
+    note_change(session, "day", day.id)
+    if autocommit:
+        touch_itinerary(session, itinerary_id=day.itinerary_id)
+        session.commit()
+        session.refresh(day)
     return day
 
-def delete_day_group(session: Session, day_id: int) -> None:
+def shift_day_groups(session: Session, itinerary_id: int, days: int, *, autocommit: bool = True) -> None:
+    """
+    Move every day of an itinerary `days` days later (negative: earlier) with one UPDATE ... RETURNING.
+    A copy-on-write fork gets its own day rows first, so the original keeps its dates.
+    """
+    itin = session.get(Itinerary, itinerary_id)
+    if not itin:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Itinerary not found.")
+    materialize_days(session, itin)
+    detach_dependents(session, itinerary_id=itinerary_id)
+    if session.get_bind().dialect.name == "sqlite":
+        shifted = func.date(DayGroup.date, f"{days:+d} days")  # dates are stored as ISO text
+    else:
+        shifted = DayGroup.date + days  # date + integer is a date in Postgres
+    day_ids = session.exec(
+        update(DayGroup)
+        .where(DayGroup.itinerary_id == itinerary_id)
+        .values(date=shifted)
+        .returning(DayGroup.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    session.expire_all()
+    for (day_id,) in day_ids:
+        note_change(session, "day", day_id)
+    if autocommit:
+        touch_itinerary(session, itinerary_id=itinerary_id)
+        session.commit()
+
+def delete_day_group(session: Session, day_id: int, *, autocommit: bool = True) -> None:
     """Delete a DayGroup."""
     day = session.get(DayGroup, day_id)
     if not day:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Day group not found.")
+    note_change(session, "day", day.id)
+    if autocommit:
+        touch_itinerary(session, itinerary_id=day.itinerary_id)
+    detach_dependents(session, day_id=day.id)
+    search.unindex_day(session, day.id)
     session.delete(day)
-    session.commit()
+    if autocommit:
+        session.commit()
+    else:
+        session.flush()
 
-def reorder_day_groups(session: Session, itinerary_id: int, ordered_ids: List[int]) -> List[DayGroup]:
-    """Reassign the `order` field of each DayGroup to match the given ID list."""
-    days = get_day_groups(session, itinerary_id)
-    existing_ids = {d.id for d in days}
-    if set(ordered_ids) != existing_ids:
+def reorder_day_groups(session: Session, itinerary_id: int, ordered_ids: List[int], *, autocommit: bool = True) -> List[int]:
+    """
+    Reassign the `order` field of each DayGroup to match the given ID list; returns the (own) ids in their new order.
+    Accepts the shared day ids a copy-on-write fork showed, like resolve_writable_day.
+    Constant round trips however long the trip: one id query to validate the list, then two UPDATEs
+    (negate every order, then assign the new ones in one CASE), so the (itinerary_id, order) unique
+    constraint never sees a transient duplicate.
+    """
+    itin = session.get(Itinerary, itinerary_id)
+    if itin:
+        # a copy-on-write fork gets its own day rows; accept the shared ids the client saw
+        mapping = materialize_days(session, itin)
+        ordered_ids = [mapping.get(i, i) for i in ordered_ids]
+    detach_dependents(session, itinerary_id=itinerary_id)
+    rows = session.exec(select(DayGroup.id, DayGroup.blocks_source_day_id).where(DayGroup.itinerary_id == itinerary_id)).all()
+    existing_ids = {day_id for day_id, _ in rows}
+    # a stale shared id from before materialization names the own day still sharing its blocks
+    sharing = {source_id: day_id for day_id, source_id in rows if source_id is not None}
+    ordered_ids = [i if i in existing_ids else sharing.get(i, i) for i in ordered_ids]
+    if len(ordered_ids) != len(existing_ids) or set(ordered_ids) != existing_ids:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provided IDs do not match existing day groups")
-    for index, dg_id in enumerate(ordered_ids, start=1):
-        dg = session.get(DayGroup, dg_id)
-        dg.order = index
-        session.add(dg)
-    session.commit()
-    return get_day_groups(session, itinerary_id)
+    if ordered_ids:
+        in_itin = DayGroup.itinerary_id == itinerary_id
+        session.exec(update(DayGroup).where(in_itin).values(order=-DayGroup.order).execution_options(synchronize_session=False))
+        ranks = case({dg_id: index for index, dg_id in enumerate(ordered_ids, start=1)}, value=DayGroup.id)
+        session.exec(update(DayGroup).where(in_itin).values(order=ranks).execution_options(synchronize_session=False))
+        session.expire_all()
+    for dg_id in ordered_ids:
+        note_change(session, "day", dg_id)
+    if autocommit:
+        touch_itinerary(session, itinerary_id=itinerary_id)
+        session.commit()
+    return ordered_ids
+
+# ----------------------------------
+# Batched edits (POST /itineraries/{id}/ops)
+# ----------------------------------
+def apply_itinerary_ops(session: Session, itin: Itinerary, ops: list, *, base_version: Optional[int] = None) -> dict:
+    """
+    Apply an ordered list of day/block edits to one itinerary in a single transaction (caller checked ownership).
+    - Each op goes through the same CRUD helpers as the single-edit routes, with autocommit=False.
+    - Ids may name rows created earlier in the list by their `ref`.
+    - The version is bumped once and the whole list commits once; any failure rolls everything back
+      and is reported as `ops[i]: <detail>`.
+    Returns {"version": new_version, "refs": {ref: id}}.
+    """
+    if base_version is not None and base_version != itin.version:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Itinerary has changed since base_version.")
+    refs: dict[str, int] = {}
+
+    def resolve(value):
+        if value is None or isinstance(value, int):
+            return value
+        if value not in refs:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Unknown ref {value!r}")
+        return refs[value]
+
+    def day_of(value) -> DayGroup:
+        return resolve_writable_day(session, itin, resolve(value))
+
+    def anchor(value) -> Optional[int]:
+        block_id = resolve(value)
+        return None if block_id is None else resolve_writable_block(session, itin, block_id).id
+
+    try:
+        for index, op in enumerate(ops):
+            try:
+                kind = op.op
+                if kind == "day.create":
+                    day = create_day_group(session, itin.id, DayGroupCreate(date=op.date, title=op.title, order=0), autocommit=False)
+                    if op.ref:
+                        refs[op.ref] = day.id
+                elif kind == "day.update":
+                    update_day_group(session, day_of(op.day_id).id, DayGroupCreate(date=op.date, title=op.title, order=0), autocommit=False)
+                elif kind == "day.delete":
+                    delete_day_group(session, day_of(op.day_id).id, autocommit=False)
+                elif kind == "day.reorder":
+                    reorder_day_groups(session, itin.id, [resolve(i) for i in op.ids], autocommit=False)
+                elif kind == "block.create":
+                    if sum(x is not None for x in (op.order, op.before_id, op.after_id)) > 1:
+                        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Give at most one of order, before_id and after_id.")
+                    day = day_of(op.day_id)
+                    materialize_day_blocks(session, day)
+                    if op.order is not None:
+                        block = create_block(session, day.id, op.order, normalize_block_type(op.type), op.content, autocommit=False)
+                    else:
+                        block = insert_block(session, day.id, normalize_block_type(op.type), op.content, before_id=anchor(op.before_id), after_id=anchor(op.after_id), autocommit=False)
+                    if op.ref:
+                        refs[op.ref] = block.id
+                elif kind == "block.update":
+                    update_block(session, resolve_writable_block(session, itin, resolve(op.block_id)), type=op.type, content=op.content, autocommit=False)
+                elif kind == "block.delete":
+                    delete_block(session, resolve_writable_block(session, itin, resolve(op.block_id)), autocommit=False)
+                elif kind == "block.move":
+                    if op.before_id is not None and op.after_id is not None:
+                        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Give at most one of before_id and after_id.")
+                    block = resolve_writable_block(session, itin, resolve(op.block_id))
+                    day = day_of(op.day_id) if op.day_id is not None else session.get(DayGroup, block.day_group_id)
+                    materialize_day_blocks(session, day)
+                    move_block(session, block, day.id, before_id=anchor(op.before_id), after_id=anchor(op.after_id), autocommit=False)
+            except HTTPException as e:
+                raise HTTPException(status_code=e.status_code, detail=f"ops[{index}]: {e.detail}")
+            except IntegrityError:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"ops[{index}]: order conflict")
+        touch_itinerary(session, itinerary_id=itin.id)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return {"version": get_itinerary_version(session, itin.id), "refs": refs}
 
 
 # ==============================
@@ -20,4 +20,6 @@ def get_session():
         yield session
 
 def init_db():
+    from app.search import create_search_schema
     SQLModel.metadata.create_all(engine)
+    create_search_schema(engine)
@@ -1,10 +1,15 @@
+from typing import Optional, Tuple
+
 from fastapi import Depends, HTTPException, status, Path
 from jose import JWTError
+from sqlalchemy import and_
+from sqlalchemy.orm import lazyload
 from sqlmodel import Session, select
 from app.database import get_session
 from app.models import User, Itinerary, DayGroup, ItineraryBlock
 from app.security import decode_jwt
 from app.settings import ADMIN_EMAILS, ADMIN_BYPASS_ENABLED
+from app.crud import resolve_writable_day, materialize_day_blocks
 from fastapi.security import OAuth2PasswordBearer, HTTPBearer
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -40,37 +45,58 @@ def is_admin(user: User) -> bool:
         return False
     return bool(user and user.email and user.email.lower() in ADMIN_EMAILS)
 
+def resolve_owned(session: Session, user: User, itinerary_id: int, day_id: Optional[int] = None, block_id: Optional[int] = None) -> Tuple[Itinerary, Optional[DayGroup], Optional[ItineraryBlock]]:
+    """
+    Authorizes a write to an itinerary, one of its days or one of its blocks; else 404.
+    - One joined query loads the itinerary with the day and block (if given) and checks the path.
+    - Memoized on the request's session, so nested dependencies and route code never re-check.
+    - Copy-on-write content is materialized here; only a fork's first write costs extra queries
+      (see crud.resolve_writable_day / materialize_day_blocks).
+    """
+    key = (user.id, itinerary_id, day_id, block_id)
+    checked = session.info.setdefault("owned_resources", {})
+    if key in checked:
+        return checked[key]
+
+    entities = [Itinerary] + [DayGroup] * (day_id is not None) + [ItineraryBlock] * (block_id is not None)
+    stmt = select(*entities).where(Itinerary.id == itinerary_id)
+    if day_id is not None:
+        # DayGroup.blocks is selectin by default; an authorization check has no use for the whole day
+        stmt = stmt.outerjoin(DayGroup, and_(DayGroup.id == day_id, DayGroup.itinerary_id == Itinerary.id)).options(lazyload(DayGroup.blocks))
+    if block_id is not None:
+        stmt = stmt.outerjoin(ItineraryBlock, and_(ItineraryBlock.id == block_id, ItineraryBlock.day_group_id == DayGroup.id))
+    row = session.exec(stmt).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    itin, day, block = (*row, None, None)[:3] if len(entities) > 1 else (row, None, None)
+    if not (itin.creator_id == user.id or is_admin(user)):
+        raise HTTPException(status_code=404, detail="Not Found")
+    if day_id is not None and day is None:
+        # a copy-on-write fork's shared (or stale) day id
+        day = resolve_writable_day(session, itin, day_id)
+    if block_id is not None and block is None:
+        block_id = materialize_day_blocks(session, day).get(block_id, block_id)
+        block = session.get(ItineraryBlock, block_id)
+        if not block or block.day_group_id != day.id:
+            raise HTTPException(status_code=404, detail="Not Found")
+
+    checked[key] = (itin, day, block)
+    return itin, day, block
+
 def ensure_itinerary_owner(itinerary_id : int = Path(...), session: Session = Depends(get_session), current_user: User = Depends(get_current_user)) -> Itinerary:
     """Loads itinerary and ensures the current user owns it; else 404."""
-    itin = session.get(Itinerary, itinerary_id)
-    if not itin:
-        raise HTTPException(status_code=404, detail="Not Found")
-    if itin.creator_id == current_user.id or is_admin(current_user):
-        return itin
-    raise HTTPException(status_code=404, detail="Not Found")
+    return resolve_owned(session, current_user, itinerary_id)[0]
 
-def ensure_daygroup_owner(day_id: int = Path(...), session: Session = Depends(get_session), current_user: User = Depends(get_current_user)) -> DayGroup:
-    day = session.get(DayGroup, day_id)
-    if not day:
-        raise HTTPException(status_code=404, detail="Not Found")
-    itin = session.get(Itinerary, day.itinerary_id)
-    if itin and (itin.creator_id == current_user.id or is_admin(current_user)):
-        return day
-    raise HTTPException(status_code=404, detail="Not Found")
+def ensure_daygroup_owner(itinerary_id: int = Path(...), day_id: int = Path(...), session: Session = Depends(get_session), current_user: User = Depends(get_current_user)) -> DayGroup:
+    """
+    Ensures the current user owns the itinerary and returns its day; else 404.
+    Only used by write routes: a copy-on-write fork gets its own day rows here (see crud.resolve_writable_day).
+    """
+    return resolve_owned(session, current_user, itinerary_id, day_id)[1]
 
-def ensure_block_owner(block_id: int = Path(...), session: Session = Depends(get_session), current_user: User = Depends(get_current_user)) -> ItineraryBlock:
-    blk = session.get(ItineraryBlock, block_id)
-    if not blk:
-        raise HTTPException(status_code=404, detail="Not Found")
-    day = session.get(DayGroup, blk.day_group_id)
-    if not day:
-        raise HTTPException(status_code=404, detail="Not Found")
-    itin = session.get(Itinerary, day.itinerary_id)
-    if not itin:
-        raise HTTPException(status_code=404, detail="Not Found")
-    if itin.creator_id == current_user.id or is_admin(current_user):
-        return blk
-    raise HTTPException(status_code=404, detail="Not Found") 
+def ensure_block_owner(itinerary_id: int = Path(...), day_id: int = Path(...), block_id: int = Path(...), session: Session = Depends(get_session), current_user: User = Depends(get_current_user)) -> ItineraryBlock:
+    """Like ensure_daygroup_owner, but for a block; a shared copy-on-write day is materialized first."""
+    return resolve_owned(session, current_user, itinerary_id, day_id, block_id)[2]
 
 
 def ensure_user_self(target_user_id: int, current_user: User = Depends(get_current_user)) -> None:
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import threading
+import uuid
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Set
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlmodel import Session, update
+
+from app import crud
+from app.database import engine
+from app.models import ForkJob, utcnow
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ForkJobRunner:
+    """
+    Bounded in-process worker pool for background forks (POST /itineraries/{id}/fork?mode=job).
+    - At most `workers` forks run at once, each in its own session, so a fork storm holds at most
+      that many DB connections/transactions and can't starve regular API traffic.
+    - At most `max_pending` jobs may be queued or running; submit() refuses the rest.
+    - Job state lives in the fork_job table; a running job's progress is tracked in memory.
+    - The process vouches for its queued/running jobs with a periodic heartbeat(); jobs whose heartbeat
+      stopped belong to a dead process and are failed by recover_interrupted() (any replica may run it).
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._progress: Dict[str, int] = {}
+        self._owned: Set[str] = set()  # queued or running in this process
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="fork-job")
+            return self._executor
+
+    def submit(self, session: Session, source_itinerary_id: int, creator_id: int) -> Optional[ForkJob]:
+        """Persist and enqueue a fork job; None if the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            job = ForkJob(id=uuid.uuid4().hex, source_itinerary_id=source_itinerary_id, creator_id=creator_id, heartbeat_at=utcnow())
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+            with self._lock:
+                self._owned.add(job.id)
+            self._pool().submit(self._run, job.id)
+        except Exception:
+            self._slots.release()
+            raise
+        return job
+
+    def progress(self, job: ForkJob) -> int:
+        """Live progress of a job running in this process, else the stored value."""
+        return self._progress.get(job.id, job.progress)
+
+    def _set_progress(self, job_id: str, percent: int) -> None:
+        self._progress[job_id] = percent
+
+    def _run(self, job_id: str) -> None:
+        try:
+            with Session(engine) as session:
+                job = session.get(ForkJob, job_id)
+                if job is None:  # its creator was deleted meanwhile (fork_job rows cascade)
+                    return
+                job.status = "running"
+                session.add(job)
+                session.commit()
+                try:
+                    forked = crud.fork_itinerary(
+                        session, job.source_itinerary_id, job.creator_id,
+                        on_progress=lambda percent: self._set_progress(job_id, percent),
+                    )
+                    job = session.get(ForkJob, job_id)
+                    if job is not None:
+                        job.status = "succeeded"
+                        job.progress = 100
+                        job.result_itinerary_id = forked.id
+                except Exception as e:
+                    session.rollback()
+                    if not isinstance(e, HTTPException):
+                        logger.exception("fork job %s failed", job_id)
+                    job = session.get(ForkJob, job_id)
+                    if job is not None:
+                        job.status = "failed"
+                        job.error = e.detail if isinstance(e, HTTPException) else "Fork failed."
+                if job is not None:
+                    job.finished_at = utcnow()
+                    session.add(job)
+                    session.commit()
+        finally:
+            self._progress.pop(job_id, None)
+            with self._lock:
+                self._owned.discard(job_id)
+            self._slots.release()
+
+    def heartbeat(self) -> None:
+        """Mark this process's queued/running jobs as alive (every FORK_JOB_HEARTBEAT_INTERVAL_SECONDS)."""
+        with self._lock:
+            owned = list(self._owned)
+        if not owned:
+            return
+        with Session(engine) as session:
+            session.exec(update(ForkJob).where(ForkJob.id.in_(owned)).values(heartbeat_at=utcnow()))
+            session.commit()
+
+    def recover_interrupted(self) -> None:
+        """
+        Fail queued/running jobs whose heartbeat is older than FORK_JOB_STALE_AFTER_SECONDS: the process
+        that owned them is gone. Jobs of live processes (this one or another replica) keep beating and are
+        left alone. Run at startup and periodically.
+        """
+        cutoff = utcnow() - timedelta(seconds=settings.fork_job_stale_after_seconds)
+        with self._lock:
+            owned = list(self._owned)
+        with Session(engine) as session:
+            failed = session.exec(
+                update(ForkJob)
+                .where(
+                    ForkJob.status.in_(["queued", "running"]),
+                    func.coalesce(ForkJob.heartbeat_at, ForkJob.created_at) < cutoff,
+                    ForkJob.id.not_in(owned),
+                )
+                .values(status="failed", error="Interrupted by a server restart.", finished_at=utcnow())
+            ).rowcount
+            session.commit()
+        if failed:
+            logger.warning("failed %d fork jobs whose worker stopped responding", failed)
+
+    def shutdown(self) -> None:
+        """Let running forks finish; jobs still queued here are dropped and failed right away."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            dropped, self._owned = list(self._owned), set()
+        if dropped:
+            with Session(engine) as session:
+                session.exec(
+                    update(ForkJob)
+                    .where(ForkJob.id.in_(dropped), ForkJob.status.in_(["queued", "running"]))
+                    .values(status="failed", error="Interrupted by a server restart.", finished_at=utcnow())
+                )
+                session.commit()
+
+
+async def run_periodically(interval_seconds: float, fn) -> None:
+    """Call blocking `fn()` in the threadpool every `interval_seconds` until cancelled; failures are logged."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(fn)
+        except Exception:
+            logger.exception("periodic job %s failed", getattr(fn, "__name__", fn))
+
+
+def compact_change_log() -> None:
+    """Trim every itinerary's change log to the configured number of versions."""
+    with Session(engine) as session:
+        crud.compact_change_log(session, settings.change_log_keep_versions)
+
+
+def reconcile_user_stats() -> None:
+    """Re-derive every user's profile counters; drift means some write path missed its bump_user_stats."""
+    with Session(engine) as session:
+        drifted = crud.recount_user_stats(session)
+        session.commit()
+    if drifted:
+        logger.warning("reconciled profile counters of %d users", drifted)
+
+
+fork_jobs = ForkJobRunner(workers=settings.fork_job_workers, max_pending=settings.fork_job_max_pending)
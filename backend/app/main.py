@@ -1,3 +1,4 @@
+import asyncio
 import os
 
 from fastapi import FastAPI
@@ -6,16 +7,30 @@ from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 
 from .database import init_db
+from .jobs import compact_change_log, fork_jobs, reconcile_user_stats, run_periodically
+from .settings import settings
+from .serialization import FastJSONResponse
+from .compression import CompressionMiddleware
 from .routers import users, itineraries, blocks, files, day_groups, auth, debug
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Initialize DB once at startup
     init_db()
+    fork_jobs.recover_interrupted()
+    heartbeat = asyncio.create_task(run_periodically(settings.fork_job_heartbeat_interval_seconds, fork_jobs.heartbeat))
+    recovery = asyncio.create_task(run_periodically(settings.fork_job_stale_after_seconds, fork_jobs.recover_interrupted))
+    compaction = asyncio.create_task(run_periodically(settings.change_log_compact_interval_seconds, compact_change_log))
+    reconciliation = asyncio.create_task(run_periodically(settings.user_stats_reconcile_interval_seconds, reconcile_user_stats))
     yield
-    # (Optional) cleanup at shutdown
+    heartbeat.cancel()
+    recovery.cancel()
+    compaction.cancel()
+    reconciliation.cancel()
+    # Let in-flight background forks finish
+    fork_jobs.shutdown()
 
-app = FastAPI(title="Tabi API", lifespan=lifespan)
+app = FastAPI(title="Tabi API", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # CORS — allow Flutter or other clients to call this API
 app.add_middleware(
@@ -25,6 +40,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON bodies (zstd / br / gzip, negotiated from Accept-Encoding) above a size threshold
+app.add_middleware(CompressionMiddleware)
+
 # Compute an absolute, file-relative path to backend/app/static
 BASE_DIR = os.path.dirname(__file__)
 STATIC_DIR = os.path.join(BASE_DIR, "static")
@@ -1,14 +1,53 @@
+import base64
 import datetime as dt
+import zlib
 from datetime import date
 from typing import List, Optional
 
-from sqlalchemy import Column, ForeignKey, UniqueConstraint, JSON
+from sqlalchemy import Column, ForeignKey, Integer, UniqueConstraint, JSON, Index
+from sqlalchemy.orm import deferred
+from sqlalchemy.types import TypeDecorator
 from sqlmodel import Field, Relationship, SQLModel,String
 
 def utcnow() -> dt.datetime:
     """Return a timezone-aware UTC datetime for default_factory."""
     return dt.datetime.now(dt.timezone.utc)
 
+
+class CompressedText(TypeDecorator):
+    """
+    String column that can store large values zlib-compressed (base64 behind a marker prefix).
+    - Writes compress only when BLOCK_CONTENT_COMPRESSION is on, the value is at least
+      BLOCK_CONTENT_COMPRESSION_MIN_BYTES and packing actually saves space.
+    - Reads always decode, so turning compression off later never strands stored rows.
+    - SQL sees the packed form: filters/copies on the raw column must account for MARKER.
+    """
+    impl = String
+    cache_ok = True
+    MARKER = "\x1bz:"
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return value
+        from app.settings import settings
+        if not (settings.block_content_compression or value.startswith(self.MARKER)):
+            return value
+        raw = value.encode("utf-8")
+        if len(raw) < settings.block_content_compression_min_bytes and not value.startswith(self.MARKER):
+            return value
+        packed = self.MARKER + base64.b64encode(zlib.compress(raw, 6)).decode("ascii")
+        # a value that merely looks packed must be packed too, or reading it back would "decode" it
+        return packed if len(packed) < len(raw) or value.startswith(self.MARKER) else value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.startswith(self.MARKER):
+            return zlib.decompress(base64.b64decode(value[len(self.MARKER):])).decode("utf-8")
+        return value
+
+    def coerce_compared_value(self, op, value):
+        # compare against the stored form (e.g. LIKE on MARKER), not a packed literal
+        return String()
+
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str = Field(sa_column=Column(String, unique=True, index=True))
@@ -20,6 +59,12 @@ class User(SQLModel, table=True):
     header_url: str | None = None
     bio: str | None = None
     is_email_verified: bool = Field(default=False)
+    # profile header counters, kept in step by the itinerary/bookmark/follow writes in crud
+    # (bump_user_stats) and re-derived periodically by recount_user_stats
+    trips_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    saved_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    followers_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    following_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     # existing relationship to itineraries
     itineraries: List["Itinerary"] = Relationship(back_populates="creator")
 
@@ -35,6 +80,10 @@ class DayGroup(SQLModel, table=True):
     date: date
     order: int
     title: Optional[str] = None
+    # copy-on-write forks: this day's blocks are read from that day until the first block write here
+    blocks_source_day_id: Optional[int] = Field(default=None, foreign_key="day_group.id", index=True)
+    # highest end-of-day block order handed out (crud.allocate_block_orders); None = start from MAX(order)
+    last_block_order: Optional[int] = None
 
     # link back to parent Itinerary
     itinerary: "Itinerary" = Relationship(back_populates="days")
@@ -43,7 +92,16 @@ class DayGroup(SQLModel, table=True):
 
 
 class Itinerary(SQLModel, table=True):
-    __table_args__ = (UniqueConstraint("title", "creator_id"), UniqueConstraint("slug", "creator_id"),)
+    __table_args__ = (
+        UniqueConstraint("title", "creator_id"),
+        UniqueConstraint("slug", "creator_id"),
+        # keyset feed: WHERE visibility = 'public' AND id < :after ORDER BY id DESC
+        Index("ix_itinerary_visibility_id", "visibility", "id"),
+        # free-name lookups (crud._first_free_name): WHERE creator_id = :c AND slug|title LIKE :prefix || '%';
+        # text_pattern_ops lets Postgres turn the prefix into an index range under any collation
+        Index("ix_itinerary_creator_id_slug", "creator_id", "slug", postgresql_ops={"slug": "text_pattern_ops"}),
+        Index("ix_itinerary_creator_id_title", "creator_id", "title", postgresql_ops={"title": "text_pattern_ops"}),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(default="Untitled Itinerary")
@@ -53,19 +111,73 @@ class Itinerary(SQLModel, table=True):
     creator_id: int = Field(foreign_key="user.id")
     creator: Optional[User] = Relationship(back_populates="itineraries")
     parent_id: Optional[int] = Field(default=None, foreign_key="itinerary.id")
+    # copy-on-write forks: days (and their blocks) are read from this itinerary until the fork is first edited
+    days_source_id: Optional[int] = Field(default=None, foreign_key="itinerary.id", index=True)
     tags: List[str] = Field(default_factory=list, sa_column=Column(JSON))
+    # bumped by every write to the itinerary or its days/blocks; keys response caches/ETags
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
+    # oldest version the change log can still produce a delta from (older clients get a snapshot)
+    changes_floor: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
     days: List[DayGroup] = Relationship(back_populates="itinerary", sa_relationship_kwargs={"order_by": DayGroup.order, "cascade": "all, delete-orphan"})
+    tag_index: List["ItineraryTag"] = Relationship(sa_relationship_kwargs={"cascade": "all, delete-orphan"})
+
+
+class ItineraryTag(SQLModel, table=True):
+    """Normalized (lowercased) copy of Itinerary.tags, one row per tag, for indexed tag search."""
+    __tablename__ = "itinerary_tag"
+    __table_args__ = (Index("ix_itinerary_tag_tag_itinerary_id", "tag", "itinerary_id"),)
+
+    itinerary_id: int = Field(foreign_key="itinerary.id", primary_key=True)
+    tag: str = Field(primary_key=True)
 
 
+class ItineraryChange(SQLModel, table=True):
+    """
+    Append-only change log: which day/block/itinerary rows a write touched, stamped with the version it produced.
+    entity is "itinerary", "day", "block", or "snapshot" (ids changed wholesale; clients must reload).
+    """
+    __tablename__ = "itinerary_change"
+    __table_args__ = (Index("ix_itinerary_change_itinerary_version", "itinerary_id", "version"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    itinerary_id: int = Field(foreign_key="itinerary.id")
+    version: int
+    entity: str
+    entity_id: int
+
+
+class ItineraryLineage(SQLModel, table=True):
+    """
+    Fork closure table: one row per (ancestor, descendant) pair of the fork tree, `depth` = hops between them.
+    Maintained by fork_itinerary / delete_itinerary; an itinerary has no row pairing it with itself.
+    """
+    __tablename__ = "itinerary_lineage"
+    __table_args__ = (
+        # descendants of X by depth (and direct-fork counts: depth = 1)
+        Index("ix_itinerary_lineage_ancestor_depth", "ancestor_id", "depth", "descendant_id"),
+        # ancestors of X, nearest first
+        Index("ix_itinerary_lineage_descendant_depth", "descendant_id", "depth"),
+    )
+
+    ancestor_id: int = Field(foreign_key="itinerary.id", primary_key=True)
+    descendant_id: int = Field(foreign_key="itinerary.id", primary_key=True)
+    depth: int
+
+
+# Deferred: DayGroup.blocks / session.get load ids, orders and types only; detail and sync
+# paths select the column explicitly (crud.get_itinerary_trees, get_blocks, get_itinerary_changes).
+_block_content = Column("content", CompressedText, nullable=False)
+
 class ItineraryBlock(SQLModel, table=True):
     __tablename__ = "itineraryblock"
     __table_args__ = (UniqueConstraint("day_group_id", "order"),)
+    __mapper_args__ = {"properties": {"content": deferred(_block_content)}}
 
     id: Optional[int] = Field(default=None, primary_key=True)
     day_group_id: int = Field(foreign_key="day_group.id", nullable=False, index=True)
     order: int
     type: str
-    content: str
+    content: str = Field(sa_column=_block_content)
 
     day_group: DayGroup = Relationship(back_populates="blocks")
 
@@ -80,13 +192,35 @@ class Bookmark(SQLModel, table = True):
 
 class Follow(SQLModel, table=True):
     __tablename__ = "follow"
-    __table_args__ = (UniqueConstraint("follower_id", "following_id"),)
+    __table_args__ = (
+        UniqueConstraint("follower_id", "following_id"),
+        # keyset follower/following lists: WHERE following_id = :user AND id < :after ORDER BY id DESC
+        Index("ix_follow_following_id_id", "following_id", "id"),
+        Index("ix_follow_follower_id_id", "follower_id", "id"),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
     follower_id: int = Field(foreign_key="user.id", index=True)
     following_id: int = Field(foreign_key="user.id", index=True)
     created_at: dt.datetime = Field(default_factory=utcnow)
 
+class ForkJob(SQLModel, table=True):
+    """A fork running in the background worker pool (POST /itineraries/{id}/fork?mode=job)."""
+    __tablename__ = "fork_job"
+
+    id: str = Field(primary_key=True)
+    # jobs outlive the itineraries they name (ids are nulled), not their creator
+    source_itinerary_id: Optional[int] = Field(default=None, sa_column=Column(Integer, ForeignKey("itinerary.id", ondelete="SET NULL")))
+    creator_id: int = Field(sa_column=Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True))
+    status: str = Field(default="queued")  # queued | running | succeeded | failed
+    progress: int = Field(default=0)  # percent
+    result_itinerary_id: Optional[int] = Field(default=None, sa_column=Column(Integer, ForeignKey("itinerary.id", ondelete="SET NULL")))
+    error: Optional[str] = None
+    created_at: dt.datetime = Field(default_factory=utcnow)
+    finished_at: Optional[dt.datetime] = None
+    # last time the process holding the job vouched for it (ForkJobRunner.heartbeat)
+    heartbeat_at: Optional[dt.datetime] = None
+
 class RefreshToken(SQLModel, table=True):
     __tablename__ = "refresh_token"
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -1,5 +1,5 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status, UploadFile, File
 from sqlmodel import Session, select
 from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
@@ -8,10 +8,12 @@ import os
 from google.cloud import storage
 
 from ..database import get_session
-from ..models import DayGroup, ItineraryBlock
-from ..crud import create_block, get_blocks, delete_block
-from ..schemas import ItineraryBlockCreate, ItineraryBlockRead
-from ..deps import ensure_daygroup_owner, ensure_block_owner
+from ..models import DayGroup, Itinerary, ItineraryBlock, User
+from ..crud import create_block, create_blocks, insert_block, get_blocks, delete_block, materialize_day_blocks, move_block, normalize_block_type
+from ..schemas import ItineraryBlockCreate, ItineraryBlockBatchCreate, ItineraryBlockMove, ItineraryBlockRead
+from ..deps import ensure_daygroup_owner, ensure_block_owner, get_current_user, resolve_owned
+from ..utils.etags import version_etag, etag_matches, not_modified, set_etag
+from ..serialization import FastJSONResponse
 
 router = APIRouter(prefix="/itineraries/{itinerary_id}/days/{day_id}/blocks", tags=["blocks"])
 
@@ -24,42 +26,93 @@ def get_storage_client():
     return storage.Client()
 
 @router.get("", response_model=List[ItineraryBlockRead], status_code=status.HTTP_200_OK)
-def list_blocks_route(*,itinerary_id: int, day_id: int, session: Session = Depends(get_session)):
-    day = session.get(DayGroup, day_id)
-    if not day or day.itinerary_id != itinerary_id:
+def list_blocks_route(*,itinerary_id: int, day_id: int, if_none_match: Optional[str] = Header(None), session: Session = Depends(get_session)):
+    # One query both validates day ∈ itinerary and yields the version behind the ETag
+    version = session.exec(
+        select(Itinerary.version)
+        .join(DayGroup, DayGroup.itinerary_id == func.coalesce(Itinerary.days_source_id, Itinerary.id))
+        .where(DayGroup.id == day_id, Itinerary.id == itinerary_id)
+    ).first()
+    if version is None:
         raise HTTPException(status_code=404, detail="Day not found on that itinerary")
-    return get_blocks(session, day_id)
+    etag = version_etag("blocks", day_id, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response = FastJSONResponse(content=get_blocks(session, day_id))
+    set_etag(response, etag)
+    return response
 
 @router.post("", response_model=ItineraryBlockRead, status_code=status.HTTP_201_CREATED)
-def create_block_route(*,itinerary_id: int,day_id: int,payload: ItineraryBlockCreate, day: DayGroup = Depends(ensure_daygroup_owner), session: Session = Depends(get_session)):
+def create_block_route(*,itinerary_id: int,day_id: int,payload: ItineraryBlockCreate,
+    before: Optional[int] = Query(None, description="Insert right before this block"),
+    after: Optional[int] = Query(None, description="Insert right after this block"),
+    day: DayGroup = Depends(ensure_daygroup_owner), session: Session = Depends(get_session)):
     if day.itinerary_id != itinerary_id:
         raise HTTPException(status_code=404, detail="Day not found on that itinerary")
+    if sum(x is not None for x in (payload.order, before, after)) > 1:
+        raise HTTPException(status_code=422, detail="Give at most one of order, before and after.")
+    # A copy-on-write day stops sharing its blocks on its first block write
+    shared = materialize_day_blocks(session, day)
 
     # Normalize type (so 'photo' still counts as an image on the client)
-    normalized_type = payload.type.lower()
-    if normalized_type == "photo":
-        normalized_type = "image"
-
-    # Compute next order; no explicit txn/locking since helper commits
-    next_ord = session.exec(select(func.coalesce(func.max(ItineraryBlock.order), 0)).where(ItineraryBlock.day_group_id == day_id)).one() 
-    order = (next_ord + 1) if payload.order is None else payload.order
+    normalized_type = normalize_block_type(payload.type)
 
     # All images should already be Cloud Storage URLs at this point
     content = payload.content
 
     try:
-        # Use your existing helper (which commits + refreshes)
-        return create_block(session=session,day_group_id=day_id,order=order,type=normalized_type,content=content)
+        if payload.order is not None:
+            return create_block(session=session,day_group_id=day.id,order=payload.order,type=normalized_type,content=content)
+        # Sparse order picked server-side: allocated at the end of the day, or the midpoint next to the anchor (retried on a race)
+        return insert_block(session, day.id, normalized_type, content, before_id=shared.get(before, before), after_id=shared.get(after, after))
+    except IntegrityError:
+        # an explicit order that is taken, or a midpoint lost BLOCK_ORDER_ATTEMPTS times in a row
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Block order conflict; please retry.")
+
+@router.post(":batch", response_model=List[ItineraryBlockRead], status_code=status.HTTP_201_CREATED)
+def create_blocks_batch_route(*, itinerary_id: int, day_id: int, payload: ItineraryBlockBatchCreate, day: DayGroup = Depends(ensure_daygroup_owner), session: Session = Depends(get_session)):
+    """
+    Add many blocks to a day in one request: one ownership check, one order allocation,
+    one multi-row INSERT and one commit. All-or-nothing; an order conflict rejects the whole batch.
+    """
+    materialize_day_blocks(session, day)
+    blocks = [{"order": b.order, "type": normalize_block_type(b.type), "content": b.content} for b in payload.blocks]
+    if len({b["order"] for b in blocks if b["order"] is not None}) != sum(b["order"] is not None for b in blocks):
+        raise HTTPException(status_code=422, detail="Duplicate block order in batch.")
+    try:
+        created = create_blocks(session, day.id, blocks)
     except IntegrityError:
-        # If you added UNIQUE(day_group_id, order), this gives a friendly error on rare races
         session.rollback()
         raise HTTPException(status_code=409, detail="Block order conflict; please retry.")
-    
+    return FastJSONResponse(content=created, status_code=status.HTTP_201_CREATED)
+
+@router.post("/{block_id}:move", response_model=ItineraryBlockRead, status_code=status.HTTP_200_OK)
+def move_block_route(*, itinerary_id: int, day_id: int, block_id: int, payload: ItineraryBlockMove, block: ItineraryBlock = Depends(ensure_block_owner), current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+    """
+    Move a block before/after another block, or to the end, of its own day or another day of the itinerary.
+    Only the moved row is rewritten (its day's orders are respread only when a gap runs out).
+    """
+    if payload.before_id is not None and payload.after_id is not None:
+        raise HTTPException(status_code=422, detail="Give at most one of before_id and after_id.")
+    # both lookups are answered by ensure_block_owner's check, or by one more joined query for another day
+    _, target, _ = resolve_owned(session, current_user, itinerary_id, day_id, block_id)
+    if payload.day_id is not None and payload.day_id != target.id:
+        _, target, _ = resolve_owned(session, current_user, itinerary_id, payload.day_id)
+    shared = materialize_day_blocks(session, target)
+    try:
+        moved = move_block(
+            session, block, target.id,
+            before_id=shared.get(payload.before_id, payload.before_id),
+            after_id=shared.get(payload.after_id, payload.after_id),
+        )
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Block order conflict; please retry.")
+    return moved
+
 @router.delete("/{block_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_block_route(*, itinerary_id: int, day_id: int, block_id: int, block: ItineraryBlock = Depends(ensure_block_owner), session: Session = Depends(get_session)):
-    day = session.get(DayGroup, block.day_group_id)
-    if not day or day.id != day_id or day.itinerary_id != itinerary_id:
-        raise HTTPException(status_code=404, detail="Not Found")
-    
+    # ensure_block_owner already verified block ∈ day ∈ itinerary (materializing copy-on-write content)
     delete_block(session, block)
     return
\ No newline at end of file
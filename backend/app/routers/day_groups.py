@@ -1,18 +1,24 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Path, status, Body
-from sqlmodel import Session
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, status, Body
+from sqlmodel import Session, select
+from sqlalchemy.exc import IntegrityError
 
 from ..database import get_session
 from ..crud import (
-    get_day_groups,
     create_day_group,
     update_day_group,
     delete_day_group,
     reorder_day_groups,
+    create_day_groups,
+    shift_day_groups,
+    get_day_trees,
+    get_day_tree,
 )
-from ..schemas import DayGroupCreate, DayGroupRead
+from ..schemas import DayGroupCreate, DayGroupRead, DayGroupShift, DayGroupBulkCreate
 from ..models import DayGroup, Itinerary
 from ..deps import ensure_itinerary_owner, ensure_daygroup_owner
+from ..utils.etags import version_etag, etag_matches, not_modified, set_etag
+from ..serialization import FastJSONResponse
 
 router = APIRouter(prefix="/itineraries/{itinerary_id}/days", tags=["day-groups"])
 
@@ -20,9 +26,16 @@ router = APIRouter(prefix="/itineraries/{itinerary_id}/days", tags=["day-groups"
 # Public (read-only)
 # -------------------------
 @router.get("", response_model=List[DayGroupRead], status_code=status.HTTP_200_OK)
-def list_days_route(*, itinerary_id: int = Path(..., gt=0), session: Session = Depends(get_session)):
-    """Fetch all day-groups for a given itinerary."""
-    return get_day_groups(session, itinerary_id)
+def list_days_route(*, itinerary_id: int = Path(..., gt=0), if_none_match: Optional[str] = Header(None), session: Session = Depends(get_session)):
+    """Fetch all day-groups for a given itinerary. Conditional on the itinerary version (ETag / 304)."""
+    version = session.exec(select(Itinerary.version).where(Itinerary.id == itinerary_id)).first()
+    etag = version_etag("days", itinerary_id, version) if version is not None else None
+    if etag and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response = FastJSONResponse(content=get_day_trees(session, itinerary_id))
+    if etag:
+        set_etag(response, etag)
+    return response
 
 # -------------------------
 # Authenticated writes
@@ -32,20 +45,42 @@ def create_day_route(*, itinerary_id: int, payload: DayGroupCreate, _owner_itin:
     """Create a new day-group."""
     return create_day_group(session, itinerary_id, payload)
 
+@router.post(":bulk", response_model=List[DayGroupRead], status_code=status.HTTP_201_CREATED)
+def create_days_bulk_route(*, itinerary_id: int, payload: DayGroupBulkCreate, _owner_itin: Itinerary = Depends(ensure_itinerary_owner), session: Session = Depends(get_session)):
+    """
+    Append `count` consecutive days in one request: dates and orders are computed server-side
+    and the days are written with one multi-row INSERT and one commit.
+    """
+    try:
+        created = create_day_groups(session, itinerary_id, payload.count, start_date=payload.start_date)
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Day order conflict; please retry.")
+    return FastJSONResponse(content=created, status_code=status.HTTP_201_CREATED)
+
+@router.post(":shift", response_model=List[DayGroupRead], status_code=status.HTTP_200_OK)
+def shift_days_route(*, itinerary_id: int, payload: DayGroupShift, _owner_itin: Itinerary = Depends(ensure_itinerary_owner), session: Session = Depends(get_session)):
+    """Move every day's date by `days` (e.g. after changing the trip's start date) with one UPDATE."""
+    shift_day_groups(session, itinerary_id, payload.days)
+    return FastJSONResponse(content=get_day_trees(session, itinerary_id))
+
 @router.patch("/reorder", response_model=List[DayGroupRead], status_code=status.HTTP_200_OK)
 def reorder_days_route(*, itinerary_id: int, ids: List[int] = Body(..., description="New sequence of day-group IDs"), _owner_itin: Itinerary = Depends(ensure_itinerary_owner), session: Session = Depends(get_session)):
     """
     Reorder day-groups.  
     Body: [3,1,2] → sets the new order by ID.
+    Applied with two bulk UPDATEs; the response is the one-query day tree.
     """
-    return reorder_day_groups(session, itinerary_id, ids)
+    reorder_day_groups(session, itinerary_id, ids)
+    return FastJSONResponse(content=get_day_trees(session, itinerary_id))
 
 @router.patch("/{day_id}", response_model=DayGroupRead, status_code=status.HTTP_200_OK)
 def update_day_route(*, itinerary_id: int, day_id: int = Path(..., gt=0), payload: DayGroupCreate, day: DayGroup = Depends(ensure_daygroup_owner), session: Session = Depends(get_session)):
     """Update a day-group’s date/title."""
     if day.itinerary_id != itinerary_id:
         raise HTTPException(status_code=404, detail="Not Found")
-    return update_day_group(session, day_id, payload)
+    day = update_day_group(session, day.id, payload)
+    return FastJSONResponse(content=get_day_tree(session, day))
 
 
 @router.delete("/{day_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -53,4 +88,4 @@ def delete_day_route(*, itinerary_id: int, day_id: int = Path(..., gt=0), day: D
     """Delete a day-group."""
     if day.itinerary_id != itinerary_id:
         raise HTTPException(status_code=404, detail="Not Found")
-    delete_day_group(session, day_id)
+    delete_day_group(session, day.id)
@@ -4,6 +4,8 @@ from app.deps import get_current_user
 from app.settings import ADMIN_EMAILS, ADMIN_BYPASS_ENABLED
 from app.models import User
 from app.deps import is_admin
+from app.cache import itinerary_cache
+from app.compression import compressed_cache
 
 router = APIRouter(prefix="/debug", tags=["debug"])
 
@@ -14,4 +16,9 @@ def whoami(me: User = Depends(get_current_user)):
         "admin_bypass_enabled": ADMIN_BYPASS_ENABLED,
         "admin_emails": list(ADMIN_EMAILS),
         "is_admin": is_admin(me),
-    }
\ No newline at end of file
+    }
+
+@router.get("/cache")
+def cache_stats(me: User = Depends(get_current_user)):
+    """Hit/miss counters for in-process response caches (for tuning size/TTL)."""
+    return {"itinerary": itinerary_cache.stats(), "compressed": compressed_cache.stats()}
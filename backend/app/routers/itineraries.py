@@ -1,36 +1,158 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Path, status
+from typing import List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, status
 from sqlmodel import Session, select
 
 from ..database import get_session
-from ..schemas import (ItineraryCreate,ItineraryRead,ItineraryUpdate, ItineraryCreateIn)
+from ..schemas import (ItineraryCreate,ItineraryRead,ItineraryUpdate, ItineraryCreateIn, ItinerarySummary, ItineraryLineageItem, ForkJobRead, ItineraryOpsIn, ItineraryOpsOut, ItineraryChanges)
 from ..crud import (
     create_itinerary  as crud_create_itinerary,
-    list_itineraries  as crud_list_itineraries,
+    list_public_itineraries as crud_list_public_itineraries,
+    search_itineraries_by_tags as crud_search_itineraries_by_tags,
+    search_itineraries_by_text as crud_search_itineraries_by_text,
+    get_itinerary_tree as crud_get_itinerary_tree,
+    get_itinerary_version as crud_get_itinerary_version,
+    get_itinerary_changes as crud_get_itinerary_changes,
+    list_fork_ancestors as crud_list_fork_ancestors,
+    list_fork_descendants as crud_list_fork_descendants,
     fork_itinerary as crud_fork_itinerary,
     update_itinerary as crud_update_itinerary,
+    apply_itinerary_ops as crud_apply_itinerary_ops,
     delete_itinerary as crud_delete_itinerary
 )
-from ..models import Itinerary, User
+from ..models import ForkJob, Itinerary, User
 from ..deps import get_current_user, ensure_itinerary_owner
+from ..utils.cursors import encode_cursor, decode_id_cursor, decode_int_cursor
+from ..cache import itinerary_cache
+from ..jobs import fork_jobs
+from ..serialization import FastJSONResponse, dump_json
+from ..utils.etags import version_etag, etag_matches, not_modified, set_etag
 
 router = APIRouter(prefix="/itineraries", tags=["itineraries"])
 
 # -------------------------
 # Public (read-only)
 # -------------------------
-@router.get("", response_model=List[ItineraryRead], status_code=status.HTTP_200_OK)
-def list_itineraries_route(*, session: Session = Depends(get_session)):
-    """List all itineraries (root level)."""
-    return crud_list_itineraries(session)
+@router.get("", response_model=Union[List[ItineraryRead], List[ItinerarySummary]], status_code=status.HTTP_200_OK)
+def list_itineraries_route(
+    *,
+    after: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+    limit: int = Query(20, ge=1, le=100),
+    view: Literal["summary", "full"] = Query("full", description="`summary` skips days/blocks"),
+    session: Session = Depends(get_session),
+):
+    """
+    Public itinerary feed, newest first, keyset-paginated.
+    The cursor for the next page is returned in the `X-Next-Cursor` header (absent on the last page).
+    """
+    items, next_after = crud_list_public_itineraries(session, after=decode_id_cursor(after), limit=limit, summary=view == "summary")
+    response = FastJSONResponse(content=items)
+    if next_after is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_after)
+    return response
+
+@router.get("/search", response_model=Union[List[ItineraryRead], List[ItinerarySummary]], status_code=status.HTTP_200_OK)
+def search_itineraries_route(
+    *,
+    tags: List[str] = Query(..., description="Tags to match; repeat the param or comma-separate"),
+    match: Literal["all", "any"] = Query("all", description="`all` = AND, `any` = OR"),
+    after: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+    limit: int = Query(20, ge=1, le=100),
+    view: Literal["summary", "full"] = Query("summary", description="`summary` skips days/blocks"),
+    session: Session = Depends(get_session),
+):
+    """Public itineraries filtered by tag, newest first, keyset-paginated like the feed."""
+    wanted = [t for raw in tags for t in raw.split(",")]
+    items, next_after = crud_search_itineraries_by_tags(
+        session, wanted, match_all=match == "all", after=decode_id_cursor(after), limit=limit, summary=view == "summary"
+    )
+    response = FastJSONResponse(content=items)
+    if next_after is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_after)
+    return response
+
+@router.get("/search/text", response_model=Union[List[ItinerarySummary], List[ItineraryRead]], status_code=status.HTTP_200_OK)
+def search_itineraries_text_route(
+    *,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in titles, descriptions and text blocks"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    view: Literal["summary", "full"] = Query("summary", description="`summary` skips days/blocks"),
+    session: Session = Depends(get_session),
+):
+    """Full-text search over public itineraries, most relevant first."""
+    items = crud_search_itineraries_by_text(session, q, limit=limit, offset=offset, summary=view == "summary")
+    return FastJSONResponse(content=items)
 
 @router.get("/{itinerary_id}", response_model=ItineraryRead, status_code=status.HTTP_200_OK)
-def get_itinerary_route(*, itinerary_id: int = Path(..., gt=0), session: Session = Depends(get_session)):
-    """Fetch a single itinerary (with its days & blocks)."""
-    itin = session.get(Itinerary, itinerary_id)
-    if not itin:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Itinerary not found")
-    return itin
+def get_itinerary_route(
+    *,
+    itinerary_id: int = Path(..., gt=0),
+    if_none_match: Optional[str] = Header(None),
+    session: Session = Depends(get_session),
+):
+    """
+    Fetch a single itinerary (with its days & blocks).
+    - ETag is derived from Itinerary.version; a matching If-None-Match gets a 304 after one PK lookup.
+    - Otherwise served from the versioned response cache, or loaded in one query, serialized once and cached.
+    """
+    version = crud_get_itinerary_version(session, itinerary_id)
+    etag = version_etag("itinerary", itinerary_id, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    body = itinerary_cache.get(itinerary_id, version)
+    if body is None:
+        tree = crud_get_itinerary_tree(session, itinerary_id)
+        body = dump_json(tree)
+        itinerary_cache.put(itinerary_id, tree["version"], body)
+        etag = version_etag("itinerary", itinerary_id, tree["version"])
+    response = FastJSONResponse(content=body)
+    set_etag(response, etag)
+    return response
+
+@router.get("/{itinerary_id}/changes", response_model=ItineraryChanges, status_code=status.HTTP_200_OK)
+def get_itinerary_changes_route(
+    *,
+    itinerary_id: int = Path(..., gt=0),
+    since: int = Query(..., ge=0, description="The version the client already has (0 = nothing)"),
+    session: Session = Depends(get_session),
+):
+    """
+    Delta sync: the days and blocks changed after `since`, plus tombstones for deleted ones.
+    Costs scale with the edits, not the itinerary; a full `snapshot` is returned only when the
+    change log can't cover `since`.
+    """
+    return FastJSONResponse(content=crud_get_itinerary_changes(session, itinerary_id, since))
+
+@router.get("/{itinerary_id}/descendants", response_model=List[ItineraryLineageItem], status_code=status.HTTP_200_OK)
+def list_descendants_route(
+    *,
+    itinerary_id: int = Path(..., gt=0),
+    max_depth: Optional[int] = Query(None, ge=1, description="Only forks at most this many hops away"),
+    after: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+    limit: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_session),
+):
+    """
+    Public forks of an itinerary (forks of forks included), nearest generation first, with their `depth`.
+    Keyset-paginated like the feed: the next cursor is in the `X-Next-Cursor` header.
+    """
+    items, next_after = crud_list_fork_descendants(
+        session, itinerary_id, max_depth=max_depth, after=decode_int_cursor(after, 2), limit=limit
+    )
+    response = FastJSONResponse(content=items)
+    if next_after is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(*next_after)
+    return response
+
+@router.get("/{itinerary_id}/ancestors", response_model=List[ItineraryLineageItem], status_code=status.HTTP_200_OK)
+def list_ancestors_route(
+    *,
+    itinerary_id: int = Path(..., gt=0),
+    session: Session = Depends(get_session),
+):
+    """Public itineraries this one was forked from, parent first; the last item is the root of the chain."""
+    return FastJSONResponse(content=crud_list_fork_ancestors(session, itinerary_id))
 
 
 # -------------------------
@@ -49,7 +171,8 @@ def create_itinerary_route(*,payload: ItineraryCreateIn,session: Session = Depen
         parent_id=payload.parent_id,
         start_date=payload.start_date,
     )
-    return crud_create_itinerary(session, safe_payload)
+    itin = crud_create_itinerary(session, safe_payload)
+    return FastJSONResponse(content=crud_get_itinerary_tree(session, itin.id), status_code=status.HTTP_201_CREATED)
 
 @router.patch("/{itinerary_id}", response_model=ItineraryRead, status_code=status.HTTP_200_OK)
 def update_itinerary_route(
@@ -59,17 +182,75 @@ def update_itinerary_route(
     session: Session = Depends(get_session),
     _owner_itin: Itinerary = Depends(ensure_itinerary_owner),
 ):
-    return crud_update_itinerary(session, itinerary_id, payload)
+    """Update title/description/visibility/tags; returns the tree, read through a copy-on-write fork's source."""
+    crud_update_itinerary(session, itinerary_id, payload)
+    return FastJSONResponse(content=crud_get_itinerary_tree(session, itinerary_id))
+
+@router.post("/{itinerary_id}/ops", response_model=ItineraryOpsOut, status_code=status.HTTP_200_OK)
+def apply_ops_route(
+    *,
+    itinerary_id: int,
+    payload: ItineraryOpsIn,
+    session: Session = Depends(get_session),
+    owner_itin: Itinerary = Depends(ensure_itinerary_owner),
+):
+    """
+    Apply a burst of day/block edits in one request: ownership is checked once and the list
+    runs in one transaction (all or nothing). Returns the new itinerary version and the ids of
+    rows created under a `ref`.
+    """
+    return crud_apply_itinerary_ops(session, owner_itin, payload.ops, base_version=payload.base_version)
 
-@router.post("/{itinerary_id}/fork", response_model=ItineraryRead, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/{itinerary_id}/fork",
+    response_model=ItineraryRead,
+    status_code=status.HTTP_201_CREATED,
+    responses={202: {"model": ForkJobRead, "description": "mode=job: fork queued"}},
+)
 def fork_itinerary_route(
     *,
     itinerary_id: int,
+    mode: Literal["copy", "cow", "job"] = Query(
+        "copy",
+        description="`cow` shares the original's days/blocks until the fork is edited; "
+        "`job` copies in the background and returns 202 with a job to poll",
+    ),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
     # New fork belongs to the caller
-    return crud_fork_itinerary(session, itinerary_id, current_user.id)
+    if mode == "job":
+        crud_get_itinerary_version(session, itinerary_id)  # 404 now rather than in the job
+        job = fork_jobs.submit(session, itinerary_id, current_user.id)
+        if job is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many forks in progress; try again shortly.",
+                headers={"Retry-After": "5"},
+            )
+        return FastJSONResponse(
+            content=fork_job_read(job),
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"Location": f"/itineraries/fork-jobs/{job.id}"},
+        )
+    forked = crud_fork_itinerary(session, itinerary_id, current_user.id, copy_on_write=mode == "cow")
+    return FastJSONResponse(content=crud_get_itinerary_tree(session, forked.id), status_code=status.HTTP_201_CREATED)
+
+def fork_job_read(job: ForkJob) -> dict:
+    return ForkJobRead.model_validate(job).model_copy(update={"progress": fork_jobs.progress(job)}).model_dump(mode="json")
+
+@router.get("/fork-jobs/{job_id}", response_model=ForkJobRead, status_code=status.HTTP_200_OK)
+def get_fork_job_route(
+    *,
+    job_id: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Poll a background fork; once `status` is `succeeded`, `result_itinerary_id` is the new itinerary."""
+    job = session.get(ForkJob, job_id)
+    if not job or job.creator_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Fork job not found")
+    return FastJSONResponse(content=fork_job_read(job))
 
 @router.delete("/{itinerary_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_itinerary_route(
@@ -78,4 +259,6 @@ def delete_itinerary_route(
     session: Session = Depends(get_session),
     _owner_itin: Itinerary = Depends(ensure_itinerary_owner),
 ):
-    crud_delete_itinerary(session, itinerary_id)
\ No newline at end of file
+    # the owner check found it, so False means the delete itself failed (and was rolled back)
+    if not crud_delete_itinerary(session, itinerary_id):
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not delete itinerary.")
\ No newline at end of file
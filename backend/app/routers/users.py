@@ -1,17 +1,22 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
 from sqlalchemy.sql.functions import user
 from sqlmodel import Session, select
-from sqlalchemy import func
-from sqlalchemy.exc import IntegrityError
 
 from ..utils.urls import to_avatar_url
+from ..utils.etags import content_etag, etag_matches, not_modified, set_etag
+from ..utils.cursors import encode_cursor, decode_id_cursor
+from ..serialization import FastJSONResponse
 from ..database import get_session
-from ..crud import create_user, get_user, list_users, delete_user
+from ..crud import (
+    create_user, get_user, list_users, delete_user, itinerary_summary_select, list_itinerary_page,
+    add_bookmark as crud_add_bookmark, remove_bookmark as crud_remove_bookmark,
+    follow_user as crud_follow_user, unfollow_user as crud_unfollow_user, list_follow_page,
+)
 from ..models import User, Itinerary, Bookmark, Follow
 from ..schemas import (
     ProfileOut, ProfileStats, BookmarkIn, FollowIn,
-    ItineraryRead, UserCreate, UserRead, ProfileUpdate
+    ItineraryRead, ItinerarySummary, UserCreate, UserRead, ProfileUpdate
 )
 from ..deps import get_current_user, is_admin
 
@@ -63,37 +68,31 @@ def update_profile(username: str, payload: ProfileUpdate, session: Session = Dep
     session.add(user)
     session.commit()
     session.refresh(user)
-    # Reuse the getter to ensure consistent response shape
-    return get_profile(username, session)
+    # Same shape as GET, built from the refreshed row (its counters included)
+    return profile_out(user)
 
 @router.get("/{username}/profile", response_model=ProfileOut, status_code=status.HTTP_200_OK)
-def get_profile(username: str, session: Session = Depends(get_session)):
-    """Header payload for the profile screen (avatar, bio, stats)."""
-    # 1) Look up by handle
+def get_profile(username: str, if_none_match: Optional[str] = Header(None), session: Session = Depends(get_session)):
+    """Header payload for the profile screen (avatar, bio, stats). Conditional via a content-hash ETag."""
+    body = build_profile(session, username).model_dump_json().encode()
+    etag = content_etag(body)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response = FastJSONResponse(content=body)
+    set_etag(response, etag)
+    return response
+
+def build_profile(session: Session, username: str) -> ProfileOut:
+    """Assemble the ProfileOut header payload for a username (404 if unknown): one indexed user lookup."""
     user: Optional[User] = session.exec(
         select(User).where(User.username == username)
     ).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
+    return profile_out(user)
 
-    # 2) Count created trips
-    trips = int(session.exec(
-        select(func.count(Itinerary.id)).where(Itinerary.creator_id == user.id)
-    ).one() or 0)
-
-    # 3) Count saved/bookmarks
-    saved = int(session.exec(
-        select(func.count(Bookmark.id)).where(Bookmark.user_id == user.id)
-    ).one() or 0)
-
-    # 4) Count followers (how many users follow this user)
-    followers = int(session.exec(
-        select(func.count(Follow.id)).where(Follow.following_id == user.id)
-    ).one() or 0)
-
-    # 5) Places — placeholder until you decide the model
-    places = 0
-
+def profile_out(user: User) -> ProfileOut:
+    """ProfileOut for a loaded user; stats come from the denormalized counters (crud.bump_user_stats)."""
     return ProfileOut(
         id=user.id,
         username=user.username,
@@ -102,16 +101,18 @@ def get_profile(username: str, session: Session = Depends(get_session)):
         header_url=user.header_url,
         bio=user.bio,
         stats=ProfileStats(
-            places=places, followers=followers, trips=trips, saved=saved
+            # Places — placeholder until you decide the model
+            places=0, followers=user.followers_count, trips=user.trips_count, saved=user.saved_count
         ),
     )
 
 # ---------- LISTS FOR TABS ----------
-@router.get("/{username}/itineraries", response_model=List[ItineraryRead], status_code=status.HTTP_200_OK)
+@router.get("/{username}/itineraries", response_model=Union[List[ItineraryRead], List[ItinerarySummary]], status_code=status.HTTP_200_OK)
 def list_created_itins(
     username: str,
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    view: Literal["summary", "full"] = Query("full", description="`summary` skips days/blocks"),
     session: Session = Depends(get_session),
 ):
     """Itineraries created by this user (Created tab)."""
@@ -120,18 +121,19 @@ def list_created_itins(
         raise HTTPException(status_code=404, detail="User not found.")
 
     q = (
-        select(Itinerary)
+        (itinerary_summary_select() if view == "summary" else select(Itinerary.id))
         .where(Itinerary.creator_id == user.id)
         .offset(offset)
         .limit(limit)
     )
-    return session.exec(q).all()
+    return FastJSONResponse(content=list_itinerary_page(session, q, summary=view == "summary"))
 
-@router.get("/{username}/saved", response_model=List[ItineraryRead], status_code=status.HTTP_200_OK)
+@router.get("/{username}/saved", response_model=Union[List[ItineraryRead], List[ItinerarySummary]], status_code=status.HTTP_200_OK)
 def list_saved_itins(
     username: str,
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    view: Literal["summary", "full"] = Query("full", description="`summary` skips days/blocks"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -142,13 +144,13 @@ def list_saved_itins(
     # if user.id != current_user.id and not is_admin(current_user):
     #     raise HTTPException(status_code=404, detail="Not Found")
     q = (
-        select(Itinerary)
+        (itinerary_summary_select() if view == "summary" else select(Itinerary.id))
         .join(Bookmark, Bookmark.itinerary_id == Itinerary.id)
         .where(Bookmark.user_id == user.id)
         .offset(offset)
         .limit(limit)
     )
-    return session.exec(q).all()
+    return FastJSONResponse(content=list_itinerary_page(session, q, summary=view == "summary"))
 
 # ---------- BOOKMARK (SAVE/UNSAVE) ----------
 @router.post("/{username}/bookmarks", status_code=status.HTTP_204_NO_CONTENT)
@@ -162,11 +164,7 @@ def add_bookmark(username: str, payload: BookmarkIn, session: Session = Depends(
     if user.id != current_user.id and not is_admin(current_user):
         raise HTTPException(status_code=404, detail="Not Found")
 
-    session.add(Bookmark(user_id=user.id, itinerary_id=payload.itinerary_id))
-    try:
-        session.commit()
-    except IntegrityError:
-        session.rollback()  # already saved; treat as success
+    crud_add_bookmark(session, user.id, payload.itinerary_id)  # already saved: no-op
     return
 
 @router.delete("/{username}/bookmarks/{itinerary_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -177,10 +175,7 @@ def remove_bookmark(username: str, itinerary_id: int, session: Session = Depends
         raise HTTPException(status_code=404, detail="User not found.")
     if user.id != current_user.id and not is_admin(current_user):
         raise HTTPException(status_code=404, detail="Not Found")
-    row = session.exec(select(Bookmark).where(Bookmark.user_id == user.id, Bookmark.itinerary_id == itinerary_id)).first()
-    if row:
-        session.delete(row)
-        session.commit()
+    crud_remove_bookmark(session, user.id, itinerary_id)
     return
 
 # ---------- FOLLOW / UNFOLLOW ----------
@@ -198,11 +193,7 @@ def follow_user(username: str, payload: FollowIn, session: Session = Depends(get
     if follower.id == target.id:
         raise HTTPException(status_code=400, detail="Cannot follow yourself.")
 
-    session.add(Follow(follower_id=follower.id, following_id=target.id))
-    try:
-        session.commit()
-    except IntegrityError:
-        session.rollback()  # already following; treat as success
+    crud_follow_user(session, follower.id, target.id)  # already following: no-op
     return
 
 @router.delete("/{username}/follow/{target_username}", status_code=status.HTTP_204_NO_CONTENT)
@@ -215,61 +206,36 @@ def unfollow_user(username: str, target_username: str, session: Session = Depend
     if follower.id != current_user.id and not is_admin(current_user):
         raise HTTPException(status_code=404, detail="Not Found")
 
-    row = session.exec(select(Follow).where(Follow.follower_id == follower.id, Follow.following_id == target.id)).first()
-    if row:
-        session.delete(row)
-        session.commit()
+    crud_unfollow_user(session, follower.id, target.id)
     return
 
 # ---------- SOCIAL LISTS ----------
-@router.get("/{username}/followers", response_model=List[ProfileOut], status_code=status.HTTP_200_OK)
-def list_followers(username: str, session: Session = Depends(get_session)):
-    """People who follow {username}."""
-    user = session.exec(select(User).where(User.username == username)).first()
-    if not user:
+def follow_list_response(session: Session, username: str, *, followers: bool, after: Optional[str], limit: int):
+    user_id = session.exec(select(User.id).where(User.username == username)).first()
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found.")
+    users, next_after = list_follow_page(session, user_id, followers=followers, after=decode_id_cursor(after), limit=limit)
+    response = FastJSONResponse(content=[profile_out(u).model_dump() for u in users])
+    if next_after is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_after)
+    return response
 
-    follower_rows = session.exec(
-        select(User)
-        .join(Follow, Follow.follower_id == User.id)
-        .where(Follow.following_id == user.id)
-    ).all()
-
-    return [
-        ProfileOut(
-            id = u.id,
-            username=u.username,
-            display_name=u.display_name,
-            avatar_url=to_avatar_url(u.avatar_name),
-            header_url=u.header_url,
-            bio=u.bio,
-            stats=ProfileStats(places=0, followers=0, trips=0, saved=0),
-        )
-        for u in follower_rows
-    ]
+@router.get("/{username}/followers", response_model=List[ProfileOut], status_code=status.HTTP_200_OK)
+def list_followers(
+    username: str,
+    after: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+    limit: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_session),
+):
+    """People who follow {username}, most recent first, with their stats. Keyset-paginated like the feed."""
+    return follow_list_response(session, username, followers=True, after=after, limit=limit)
 
 @router.get("/{username}/following", response_model=List[ProfileOut], status_code=status.HTTP_200_OK)
-def list_following(username: str, session: Session = Depends(get_session)):
-    """People {username} follows."""
-    user = session.exec(select(User).where(User.username == username)).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found.")
-
-    following_rows = session.exec(
-        select(User)
-        .join(Follow, Follow.following_id == User.id)
-        .where(Follow.follower_id == user.id)
-    ).all()
-
-    return [
-        ProfileOut(
-            id=u.id,
-            username=u.username,
-            display_name=u.display_name,
-            avatar_url=to_avatar_url(u.avatar_name),
-            header_url=u.header_url,
-            bio=u.bio,
-            stats=ProfileStats(places=0, followers=0, trips=0, saved=0),
-        )
-        for u in following_rows
-    ]
\ No newline at end of file
+def list_following(
+    username: str,
+    after: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+    limit: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_session),
+):
+    """People {username} follows, most recently followed first, with their stats. Keyset-paginated like the feed."""
+    return follow_list_response(session, username, followers=False, after=after, limit=limit)
@@ -1,12 +1,8 @@
-from datetime import date
+from datetime import date, datetime
 import email
-from typing import List, Optional, Literal, ForwardRef
+from typing import Annotated, Dict, List, Optional, Literal, Union
 from pydantic import BaseModel, Field, EmailStr, ConfigDict
 
-# Forward references for nested models
-ItineraryBlockRead = ForwardRef("ItineraryBlockRead")
-DayGroupRead       = ForwardRef("DayGroupRead")
-
 # -----------------------------
 # 1. User Schemas
 # -----------------------------
@@ -80,10 +76,40 @@ class ItineraryRead(ItineraryBase):
     creator_id: int
     slug: str
     parent_id: Optional[int] = None
+    version: int = 1
     days: List["DayGroupRead"] = []
+    model_config = ConfigDict(from_attributes=True)
 
-    class Config:
-        orm_mode = True
+class ItinerarySummary(BaseModel):
+    """Lightweight list-card projection of an itinerary (no days/blocks), computed in SQL."""
+    id: int
+    title: str
+    slug: str
+    visibility: Literal["public", "private"] = "public"
+    tags: List[str] = Field(default_factory=list)
+    creator_id: int
+    creator_username: str
+    day_count: int = 0
+    start_date: Optional[date] = None
+    cover_image_url: Optional[str] = Field(None, description="Content of the first image block, if any")
+    fork_count: int = Field(0, description="Number of direct forks")
+    model_config = ConfigDict(from_attributes=True)
+
+class ItineraryLineageItem(ItinerarySummary):
+    """An ancestor or descendant in a fork tree, `depth` hops away from the requested itinerary."""
+    depth: int
+
+class ForkJobRead(BaseModel):
+    """Status of a background fork; `result_itinerary_id` is set once it has succeeded. Ids of deleted itineraries read null."""
+    id: str
+    source_itinerary_id: Optional[int] = None
+    status: Literal["queued", "running", "succeeded", "failed"]
+    progress: int = Field(0, description="Percent complete")
+    result_itinerary_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
 
 class ItineraryCreateIn(BaseModel):
     title: str
@@ -102,6 +128,17 @@ class ItineraryBlockCreate(BaseModel):
     type: str
     content: str
 
+class ItineraryBlockBatchCreate(BaseModel):
+    """Blocks to add to one day, in order; blocks without an `order` are appended after the day's last block."""
+    blocks: List[ItineraryBlockCreate] = Field(..., min_length=1, max_length=500)
+
+
+class ItineraryBlockMove(BaseModel):
+    """Where to move a block: into `day_id` (default: its current day), before or after a block there, else at the end."""
+    day_id: Optional[int] = None
+    before_id: Optional[int] = None
+    after_id: Optional[int] = None
+
 
 class ItineraryBlockRead(BaseModel):
     """Schema for returning a block's data."""
@@ -136,6 +173,46 @@ class DayGroupRead(DayGroupBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class DayGroupShift(BaseModel):
+    """Move every day of an itinerary by `days` (negative = earlier)."""
+    days: int = Field(..., ge=-3650, le=3650)
+
+
+class DayGroupBulkCreate(BaseModel):
+    """`count` consecutive days appended after the last day; dates follow the last day's unless `start_date` is given."""
+    count: int = Field(..., ge=1, le=366)
+    start_date: Optional[date] = None
+
+
+class DayGroupDelta(DayGroupBase):
+    """A changed day's own fields (its changed blocks are listed separately)."""
+    id: int
+    itinerary_id: int
+
+
+class ItineraryMeta(ItineraryBase):
+    """An itinerary's own fields, without days."""
+    id: int
+    creator_id: int
+    slug: str
+    parent_id: Optional[int] = None
+
+
+class ItineraryChanges(BaseModel):
+    """
+    Delta from `since` to `version`. Apply `itinerary`/`days`/`blocks` as upserts and drop the deleted ids;
+    when `snapshot` is set, replace the local copy with it instead.
+    """
+    version: int
+    since: int
+    snapshot: Optional[ItineraryRead] = None
+    itinerary: Optional[ItineraryMeta] = None
+    days: List[DayGroupDelta] = []
+    blocks: List[ItineraryBlockRead] = []
+    deleted_day_ids: List[int] = []
+    deleted_block_ids: List[int] = []
+
+
 # -----------------------------
 # 5. Profile Schemas
 # -----------------------------
@@ -207,7 +284,72 @@ class ChangePassword(BaseModel):
     current_password: str
     new_password: str
 
-# finalize forward refs for all three interdependent schemas
-ItineraryRead.model_rebuild()
-DayGroupRead.model_rebuild()
-ItineraryBlockRead.model_rebuild()
\ No newline at end of file
+# -----------------------------
+# 7. Batched edit (ops) Schemas
+# -----------------------------
+# A day/block id, or the `ref` given to a day/block created by an earlier op in the same request
+IdOrRef = Union[int, str]
+
+class DayCreateOp(BaseModel):
+    op: Literal["day.create"]
+    ref: Optional[str] = Field(None, description="Name later ops can use instead of the new day's id")
+    date: date
+    title: Optional[str] = None
+
+class DayUpdateOp(BaseModel):
+    op: Literal["day.update"]
+    day_id: IdOrRef
+    date: date
+    title: Optional[str] = None
+
+class DayDeleteOp(BaseModel):
+    op: Literal["day.delete"]
+    day_id: IdOrRef
+
+class DayReorderOp(BaseModel):
+    op: Literal["day.reorder"]
+    ids: List[IdOrRef]
+
+class BlockCreateOp(BaseModel):
+    op: Literal["block.create"]
+    ref: Optional[str] = Field(None, description="Name later ops can use instead of the new block's id")
+    day_id: IdOrRef
+    type: str
+    content: str
+    order: Optional[int] = None
+    before_id: Optional[IdOrRef] = None
+    after_id: Optional[IdOrRef] = None
+
+class BlockUpdateOp(BaseModel):
+    op: Literal["block.update"]
+    block_id: IdOrRef
+    type: Optional[str] = None
+    content: Optional[str] = None
+
+class BlockDeleteOp(BaseModel):
+    op: Literal["block.delete"]
+    block_id: IdOrRef
+
+class BlockMoveOp(BaseModel):
+    op: Literal["block.move"]
+    block_id: IdOrRef
+    day_id: Optional[IdOrRef] = None
+    before_id: Optional[IdOrRef] = None
+    after_id: Optional[IdOrRef] = None
+
+ItineraryOp = Annotated[
+    Union[DayCreateOp, DayUpdateOp, DayDeleteOp, DayReorderOp, BlockCreateOp, BlockUpdateOp, BlockDeleteOp, BlockMoveOp],
+    Field(discriminator="op"),
+]
+
+class ItineraryOpsIn(BaseModel):
+    """Ordered edits applied in one transaction; all succeed or none do."""
+    ops: List[ItineraryOp] = Field(..., min_length=1, max_length=500)
+    base_version: Optional[int] = Field(None, description="If set, reject with 409 unless the itinerary is still at this version")
+
+class ItineraryOpsOut(BaseModel):
+    version: int
+    refs: Dict[str, int] = Field(default_factory=dict, description="Ids of the days/blocks created under each `ref`")
+
+# ItineraryRead refers to DayGroupRead before it is defined; resolve it now
+ItineraryRead.model_rebuild()
\ No newline at end of file
@@ -0,0 +1,249 @@
+import re
+from typing import List
+
+import sqlalchemy as sa
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session, delete, insert, select
+
+from app.models import CompressedText, DayGroup, Itinerary, ItineraryBlock
+
+# ----------------------------------
+# Full-text index over itinerary titles/descriptions and text blocks.
+# One `search_document` row per source row:
+#   "itinerary:<id>" -> title + description,  "block:<id>" -> text block content.
+# Postgres: plain table + generated tsvector column + GIN index.
+# SQLite (local runs): FTS5 virtual table with the same columns. Only `body` is indexed there, so a
+#   document is found by a rowid derived from its key instead (see _doc_rowid): a filter on doc_key
+#   would scan the whole table.
+# The table lives outside SQLModel.metadata; create_search_schema() owns its DDL.
+# ----------------------------------
+TEXT_BLOCK_TYPES = ("text",)
+
+search_document = sa.table(
+    "search_document",
+    sa.column("doc_key", sa.String),
+    sa.column("itinerary_id", sa.Integer),
+    sa.column("day_group_id", sa.Integer),
+    sa.column("body", sa.Text),
+    sa.column("rowid", sa.Integer),  # SQLite only
+)
+
+_POSTGRES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS search_document (
+        doc_key      TEXT PRIMARY KEY,
+        itinerary_id INTEGER NOT NULL REFERENCES itinerary(id) ON DELETE CASCADE,
+        day_group_id INTEGER,
+        body         TEXT NOT NULL,
+        tsv          tsvector GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_search_document_tsv ON search_document USING GIN (tsv)",
+    "CREATE INDEX IF NOT EXISTS ix_search_document_itinerary_id ON search_document (itinerary_id)",
+    "CREATE INDEX IF NOT EXISTS ix_search_document_day_group_id ON search_document (day_group_id)",
+]
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_document USING fts5(
+        doc_key UNINDEXED, itinerary_id UNINDEXED, day_group_id UNINDEXED, body,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+
+def create_search_schema(bind: Engine | Connection) -> None:
+    """Create the dialect-specific search table/indexes if missing (idempotent)."""
+    ddl = _POSTGRES_DDL if bind.dialect.name == "postgresql" else _SQLITE_DDL
+    if isinstance(bind, Engine):
+        with bind.begin() as conn:
+            for stmt in ddl:
+                conn.execute(text(stmt))
+    else:
+        for stmt in ddl:
+            bind.execute(text(stmt))
+
+
+def _uses_fts5(session: Session) -> bool:
+    return session.get_bind().dialect.name != "postgresql"
+
+
+def _doc_rowid(kind: str, object_id):
+    """FTS5 rowid of a document: the block's id, or minus the itinerary's id (works on SQL expressions too)."""
+    return object_id if kind == "block" else -object_id
+
+
+def _doc_filter(session: Session, kind: str, object_id: int):
+    """WHERE clause matching one document: an FTS5 rowid lookup on SQLite, the doc_key primary key on Postgres."""
+    if _uses_fts5(session):
+        return search_document.c.rowid == _doc_rowid(kind, object_id)
+    return search_document.c.doc_key == f"{kind}:{object_id}"
+
+
+def _itinerary_doc_select():
+    return select(
+        (sa.literal("itinerary:") + sa.cast(Itinerary.id, sa.String)).label("doc_key"),
+        Itinerary.id,
+        sa.null(),
+        (Itinerary.title + sa.literal(" ") + sa.func.coalesce(Itinerary.description, "")).label("body"),
+    )
+
+
+def _block_doc_select():
+    return (
+        select(
+            (sa.literal("block:") + sa.cast(ItineraryBlock.id, sa.String)).label("doc_key"),
+            DayGroup.itinerary_id,
+            ItineraryBlock.day_group_id,
+            ItineraryBlock.content,
+        )
+        .join(DayGroup, DayGroup.id == ItineraryBlock.day_group_id)
+        .where(ItineraryBlock.type.in_(TEXT_BLOCK_TYPES))
+    )
+
+
+def _insert_docs(session: Session, source, rowid) -> None:
+    """INSERT ... SELECT documents from `source`; `rowid` is the SQL expression for their FTS5 rowid (SQLite only)."""
+    # Core INSERT ... SELECT doesn't autoflush; push pending ORM rows first so the SELECT sees them
+    session.flush()
+    columns = ["doc_key", "itinerary_id", "day_group_id", "body"]
+    if _uses_fts5(session):
+        source, columns = source.add_columns(rowid), columns + ["rowid"]
+    session.exec(insert(search_document).from_select(columns, source))
+
+
+def _insert_block_docs(session: Session, *where) -> None:
+    """
+    Index the text blocks matching `where`. Plain rows are copied set-based; compressed rows
+    (CompressedText.MARKER) are decoded in Python, since SQL only sees their packed form.
+    """
+    packed = ItineraryBlock.content.startswith(CompressedText.MARKER, autoescape=True)
+    _insert_docs(session, _block_doc_select().where(*where, ~packed), _doc_rowid("block", ItineraryBlock.id))
+    rows = session.exec(
+        select(ItineraryBlock.id, DayGroup.itinerary_id, ItineraryBlock.day_group_id, ItineraryBlock.content)
+        .join(DayGroup, DayGroup.id == ItineraryBlock.day_group_id)
+        .where(ItineraryBlock.type.in_(TEXT_BLOCK_TYPES), packed, *where)
+    ).all()
+    if rows:
+        fts5 = _uses_fts5(session)
+        session.exec(insert(search_document), params=[
+            {"doc_key": f"block:{r[0]}", "itinerary_id": r[1], "day_group_id": r[2], "body": r[3],
+             **({"rowid": _doc_rowid("block", r[0])} if fts5 else {})}
+            for r in rows
+        ])
+
+
+# ----------------------------------
+# Incremental maintenance (caller commits)
+# ----------------------------------
+def index_itinerary(session: Session, itinerary_id: int) -> None:
+    """(Re)index an itinerary's title + description."""
+    session.exec(delete(search_document).where(_doc_filter(session, "itinerary", itinerary_id)))
+    _insert_docs(session, _itinerary_doc_select().where(Itinerary.id == itinerary_id), _doc_rowid("itinerary", Itinerary.id))
+
+
+def index_block(session: Session, block_id: int) -> None:
+    """(Re)index one block; non-text blocks simply end up with no document."""
+    session.exec(delete(search_document).where(_doc_filter(session, "block", block_id)))
+    _insert_block_docs(session, ItineraryBlock.id == block_id)
+
+
+def index_new_blocks(session: Session, block_ids: List[int]) -> None:
+    """Index blocks inserted in this transaction (no stale documents to drop), set-based."""
+    _insert_block_docs(session, ItineraryBlock.id.in_(block_ids))
+
+
+def index_day(session: Session, day_group_id: int) -> None:
+    """(Re)index every block of one day (e.g. after a copy-on-write day is materialized)."""
+    unindex_day(session, day_group_id)
+    _insert_block_docs(session, ItineraryBlock.day_group_id == day_group_id)
+
+
+def unindex_block(session: Session, block_id: int) -> None:
+    session.exec(delete(search_document).where(_doc_filter(session, "block", block_id)))
+
+
+def unindex_day(session: Session, day_group_id: int) -> None:
+    session.exec(delete(search_document).where(search_document.c.day_group_id == day_group_id))
+
+
+def unindex_itineraries(session: Session, itinerary_ids) -> None:
+    """Drop every document of the given itineraries (accepts a list or a scalar subquery select)."""
+    session.exec(delete(search_document).where(search_document.c.itinerary_id.in_(itinerary_ids)))
+
+
+def reindex_itinerary(session: Session, itinerary_id: int) -> None:
+    """
+    Rebuild all documents of one itinerary set-based (used after bulk copies such as forks).
+    Shared copy-on-write content stays indexed once, under its source; search_itinerary_ids
+    credits the forks reading it at query time.
+    """
+    unindex_itineraries(session, [itinerary_id])
+    _insert_docs(session, _itinerary_doc_select().where(Itinerary.id == itinerary_id), _doc_rowid("itinerary", Itinerary.id))
+    _insert_block_docs(session, DayGroup.itinerary_id == itinerary_id)
+
+
+# ----------------------------------
+# Querying
+# ----------------------------------
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Continues a `WITH m(itinerary_id, day_group_id, score) AS (matched documents),` clause.
+# Copy-on-write forks have no block documents of their own: a matched block also counts for
+# the days reading its day's blocks (blocks_source_day_id), then for the forks reading those
+# days' itinerary (days_source_id). Both hops are indexed lookups on the matches only.
+_RANK_WITH_COW_FORKS = """
+    hits AS (
+        SELECT itinerary_id, day_group_id, score FROM m
+        UNION ALL
+        SELECT g.itinerary_id, m.day_group_id, m.score
+        FROM m JOIN day_group g ON g.blocks_source_day_id = m.day_group_id
+    ),
+    expanded AS (
+        SELECT itinerary_id, score FROM hits
+        UNION ALL
+        SELECT f.id, hits.score
+        FROM hits JOIN itinerary f ON f.days_source_id = hits.itinerary_id
+        WHERE hits.day_group_id IS NOT NULL
+    )
+    SELECT e.itinerary_id, SUM(e.score) AS score
+    FROM expanded e
+    JOIN itinerary i ON i.id = e.itinerary_id AND i.visibility = 'public'
+    GROUP BY e.itinerary_id
+    ORDER BY score DESC, e.itinerary_id DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+
+def search_itinerary_ids(session: Session, query: str, *, limit: int = 20, offset: int = 0) -> List[int]:
+    """
+    Public itinerary ids ranked by relevance to `query` (all words must match in one document).
+    A trip's score sums the scores of its matching documents, so title hits and many block hits both count.
+    """
+    words = _WORD.findall(query or "")
+    if not words:
+        return []
+
+    if session.get_bind().dialect.name == "postgresql":
+        sql = """
+            WITH m AS (
+                SELECT d.itinerary_id, d.day_group_id, ts_rank(d.tsv, q) AS score
+                FROM search_document d
+                CROSS JOIN plainto_tsquery('simple', :q) AS q
+                WHERE d.tsv @@ q
+            ),
+        """ + _RANK_WITH_COW_FORKS
+        params = {"q": " ".join(words)}
+    else:
+        sql = """
+            WITH m AS MATERIALIZED (
+                SELECT itinerary_id, day_group_id, -bm25(search_document) AS score
+                FROM search_document WHERE search_document MATCH :q
+            ),
+        """ + _RANK_WITH_COW_FORKS
+        params = {"q": " ".join(f'"{w}"' for w in words)}
+
+    rows = session.exec(text(sql), params={**params, "limit": limit, "offset": offset})
+    return [int(r[0]) for r in rows]
@@ -0,0 +1,21 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    orjson-backed JSON response (the app's default response class).
+    Pre-encoded bytes (e.g. cached bodies) are passed through untouched.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return dump_json(content)
+
+
+def dump_json(content: Any) -> bytes:
+    """Serialize plain dicts/lists (dates included) straight to JSON bytes."""
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -27,6 +27,86 @@ class Settings(BaseSettings):
         default=False,
         validation_alias="ADMIN_BYPASS_ENABLED",
     )
+    # In-process cache of serialized itinerary detail responses
+    itinerary_cache_max_entries: int = Field(
+        default=512,
+        validation_alias="ITINERARY_CACHE_MAX_ENTRIES",
+    )
+    itinerary_cache_ttl_seconds: float = Field(
+        default=300.0,
+        validation_alias="ITINERARY_CACHE_TTL_SECONDS",
+    )
+    # Response compression (app/compression.py)
+    compression_minimum_size: int = Field(
+        default=1024,
+        validation_alias="COMPRESSION_MINIMUM_SIZE",
+    )
+    compression_gzip_level: int = Field(
+        default=6,
+        validation_alias="COMPRESSION_GZIP_LEVEL",
+    )
+    compression_brotli_level: int = Field(
+        default=5,
+        validation_alias="COMPRESSION_BROTLI_LEVEL",
+    )
+    compression_zstd_level: int = Field(
+        default=3,
+        validation_alias="COMPRESSION_ZSTD_LEVEL",
+    )
+    compression_cache_max_entries: int = Field(
+        default=1024,
+        validation_alias="COMPRESSION_CACHE_MAX_ENTRIES",
+    )
+    compression_cache_ttl_seconds: float = Field(
+        default=300.0,
+        validation_alias="COMPRESSION_CACHE_TTL_SECONDS",
+    )
+    # Bodies at least this large are compressed in a worker thread instead of on the event loop
+    compression_thread_min_size: int = Field(
+        default=32768,
+        validation_alias="COMPRESSION_THREAD_MIN_SIZE",
+    )
+    # Background fork jobs (app/jobs.py): worker threads, and jobs allowed to wait for one
+    fork_job_workers: int = Field(
+        default=2,
+        validation_alias="FORK_JOB_WORKERS",
+    )
+    fork_job_max_pending: int = Field(
+        default=32,
+        validation_alias="FORK_JOB_MAX_PENDING",
+    )
+    # A queued/running fork job whose heartbeat is older than stale_after is failed as orphaned (its process died)
+    fork_job_heartbeat_interval_seconds: float = Field(
+        default=30.0,
+        validation_alias="FORK_JOB_HEARTBEAT_INTERVAL_SECONDS",
+    )
+    fork_job_stale_after_seconds: float = Field(
+        default=300.0,
+        validation_alias="FORK_JOB_STALE_AFTER_SECONDS",
+    )
+    # Itinerary change log (GET /itineraries/{id}/changes): versions kept per itinerary, and how often to compact
+    change_log_keep_versions: int = Field(
+        default=500,
+        validation_alias="CHANGE_LOG_KEEP_VERSIONS",
+    )
+    change_log_compact_interval_seconds: float = Field(
+        default=3600.0,
+        validation_alias="CHANGE_LOG_COMPACT_INTERVAL_SECONDS",
+    )
+    # How often profile counters are re-derived from the source tables to fix drift (app/jobs.py)
+    user_stats_reconcile_interval_seconds: float = Field(
+        default=21600.0,
+        validation_alias="USER_STATS_RECONCILE_INTERVAL_SECONDS",
+    )
+    # At-rest compression of large block content (app/models.py CompressedText); reads always decode
+    block_content_compression: bool = Field(
+        default=False,
+        validation_alias="BLOCK_CONTENT_COMPRESSION",
+    )
+    block_content_compression_min_bytes: int = Field(
+        default=2048,
+        validation_alias="BLOCK_CONTENT_COMPRESSION_MIN_BYTES",
+    )
 
     @property
     def admin_emails(self) -> Set[str]:
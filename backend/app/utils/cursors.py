@@ -0,0 +1,42 @@
+import base64
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+def encode_cursor(*parts) -> str:
+    """Pack keyset values into an opaque, URL-safe cursor string."""
+    raw = "|".join(str(p) for p in parts)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[list[str]]:
+    """Unpack a cursor produced by encode_cursor. None passes through; garbage is a 400."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+def decode_id_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Decode a single-integer (id) cursor; None if no cursor was given."""
+    parts = decode_cursor(cursor)
+    if parts is None:
+        return None
+    try:
+        (value,) = parts
+        return int(value)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+def decode_int_cursor(cursor: Optional[str], size: int) -> Optional[tuple[int, ...]]:
+    """Decode a cursor of `size` integers (e.g. a (depth, id) keyset); None if no cursor was given."""
+    parts = decode_cursor(cursor)
+    if parts is None:
+        return None
+    try:
+        if len(parts) != size:
+            raise ValueError
+        return tuple(int(p) for p in parts)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
@@ -0,0 +1,31 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Response, status
+
+def version_etag(kind: str, object_id: int, version: int) -> str:
+    """Strong ETag for a resource whose content is fully determined by a row version."""
+    return f'"{kind}-{object_id}-v{version}"'
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag from a hash of the serialized response body."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value matches etag (handles lists, `*` and weak prefixes)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 carrying the validator, so the client keeps its cached body."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+def set_etag(response: Response, etag: str) -> None:
+    """Attach the validator to a 200 response; `no-cache` makes clients revalidate instead of reusing blindly."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
@@ -0,0 +1,88 @@
+import statistics
+import time
+from datetime import date, timedelta
+from typing import Callable, Optional
+
+import pytest
+from sqlmodel import Session, insert, select
+
+from app import search
+from app.models import DayGroup, Itinerary, ItineraryBlock, User
+
+# Benchmarks print their numbers (also without -s) and assert only what must hold at any speed,
+# such as a statement count that stays flat. Run them with: python -m pytest -m benchmark
+
+
+class Bench:
+    def __init__(self, capsys):
+        self.capsys = capsys
+
+    def median_ms(self, fn: Callable[[], object], repeat: int = 20, warmup: int = 1) -> float:
+        """Median wall time of `fn` in milliseconds, after `warmup` untimed calls."""
+        for _ in range(warmup):
+            fn()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
+
+    def table(self, title: str, header: list[str], rows: list[list]) -> None:
+        cells = [header] + [[f"{c:.3f}" if isinstance(c, float) else str(c) for c in row] for row in rows]
+        widths = [max(len(row[i]) for row in cells) for i in range(len(header))]
+        with self.capsys.disabled():
+            print(f"\n{title}")
+            for row in cells:
+                print("  " + "  ".join(c.rjust(w) for c, w in zip(row, widths)))
+
+
+@pytest.fixture
+def bench(capsys):
+    return Bench(capsys)
+
+
+class Seed:
+    """Bulk-written data for benchmark sizes (building it through the API would take minutes)."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def user(self, username: str) -> User:
+        user = User(username=username, email=f"{username}@example.com")
+        self.session.add(user)
+        self.session.commit()
+        self.session.refresh(user)
+        return user
+
+    def itinerary(
+        self, creator_id: int, days: int, blocks_per_day: int, *, title: Optional[str] = None,
+        content: Callable[[int, int], str] = lambda d, b: f"day {d} block {b}",
+    ) -> int:
+        """An itinerary of `days` x `blocks_per_day` text blocks written with bulk INSERTs, indexed for search."""
+        session = self.session
+        title = title or f"Trip {days}x{blocks_per_day}"
+        itin = Itinerary(title=title, slug=title.lower().replace(" ", "-"), creator_id=creator_id)
+        session.add(itin)
+        session.flush()
+        start = date(2025, 1, 1)
+        if days:
+            session.exec(insert(DayGroup).values([
+                {"itinerary_id": itin.id, "date": start + timedelta(days=d), "order": d + 1, "title": f"Day {d + 1}"}
+                for d in range(days)
+            ]))
+        day_ids = session.exec(select(DayGroup.id).where(DayGroup.itinerary_id == itin.id).order_by(DayGroup.order)).all()
+        rows = [
+            {"day_group_id": day_id, "order": (b + 1) * 1024, "type": "text", "content": content(d, b)}
+            for d, day_id in enumerate(day_ids) for b in range(blocks_per_day)
+        ]
+        for i in range(0, len(rows), 5000):
+            session.exec(insert(ItineraryBlock).values(rows[i:i + 5000]))
+        search.reindex_itinerary(session, itin.id)
+        session.commit()
+        return itin.id
+
+
+@pytest.fixture
+def seed(session):
+    return Seed(session)
@@ -0,0 +1,81 @@
+import gc
+import random
+import tracemalloc
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import selectinload, undefer
+from sqlmodel import Session, select
+
+from app.models import CompressedText, DayGroup, Itinerary, ItineraryBlock
+from app.settings import settings
+
+pytestmark = pytest.mark.benchmark
+
+SUBJECTS = ["We", "I", "The kids", "Our guide", "Everyone", "Mika", "The host"]
+VERBS = ["wandered through", "got lost in", "queued for", "finally found", "spent hours at", "photographed", "skipped"]
+PLACES = [
+    "the fish market", "a tiny ramen counter", "the bamboo grove", "Fushimi Inari", "the castle grounds",
+    "a sento down the street", "the night market", "the ferry terminal", "a jazz kissa", "the museum annex",
+]
+TAILS = [
+    "before the crowds arrived.", "and it started to rain.", "which was worth every yen.", "on the way back to the hostel.",
+    "while the sun went down over the bay.", "because the trains stopped at midnight.", "and nobody spoke English, which was fine.",
+]
+
+
+def journal_entry(rng: random.Random) -> str:
+    """Travel-journal prose, 40-900 words."""
+    words, sentences = rng.randrange(40, 900), []
+    while sum(len(s.split()) for s in sentences) < words:
+        sentences.append(f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(PLACES)} {rng.choice(TAILS)}")
+    return " ".join(sentences)
+
+
+def retained_kib(engine, itinerary_id: int, *options) -> float:
+    """Memory still held after loading an itinerary's days and blocks through the ORM."""
+    with Session(engine) as session:
+        gc.collect()
+        tracemalloc.start()
+        itin = session.exec(select(Itinerary).where(Itinerary.id == itinerary_id).options(*options)).one()
+        assert sum(len(d.blocks) for d in itin.days) > 0
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return current / 1024
+
+
+def stored_kib(session, itinerary_id: int) -> float:
+    return session.exec(text(
+        "SELECT SUM(LENGTH(b.content)) FROM itineraryblock b JOIN day_group d ON d.id = b.day_group_id WHERE d.itinerary_id = :i"
+    ), params={"i": itinerary_id}).one()[0] / 1024
+
+
+def test_deferred_content_memory_and_compressed_storage(engine, seed, bench, monkeypatch):
+    user_id = seed.user("alice").id
+    rng = random.Random(0)
+    plain = seed.itinerary(user_id, 60, 8, title="Journal plain", content=lambda d, b: journal_entry(rng))
+    monkeypatch.setattr(settings, "block_content_compression", True)
+    rng = random.Random(0)
+    packed = seed.itinerary(user_id, 60, 8, title="Journal packed", content=lambda d, b: journal_entry(rng))
+
+    blocks = selectinload(Itinerary.days).selectinload(DayGroup.blocks)
+    deferred, undeferred = retained_kib(engine, plain, blocks), retained_kib(engine, plain, blocks.options(undefer(ItineraryBlock.content)))
+    bench.table("Loading a 60-day x 8-block journal through Itinerary.days / DayGroup.blocks", ["content", "retained KiB"], [
+        ["deferred", f"{deferred:.0f}"], ["undeferred", f"{undeferred:.0f}"],
+    ])
+
+    before, after = stored_kib(seed.session, plain), stored_kib(seed.session, packed)
+    sample = journal_entry(rng)
+    while len(sample.encode()) < settings.block_content_compression_min_bytes:
+        sample = journal_entry(rng)
+    codec = CompressedText()
+    stored = codec.process_bind_param(sample, None)
+    assert stored.startswith(CompressedText.MARKER)
+    round_trip = bench.median_ms(lambda: codec.process_result_value(codec.process_bind_param(sample, None), None), repeat=200)
+    bench.table(f"At-rest compression (threshold {settings.block_content_compression_min_bytes} bytes)", ["", "value"], [
+        ["stored KiB, plain", f"{before:.0f}"],
+        ["stored KiB, compressed", f"{after:.0f}"],
+        ["saved", f"{1 - after / before:.0%}"],
+        [f"round trip of a {len(sample.encode()) // 1024} KiB block (us)", f"{round_trip * 1000:.0f}"],
+    ])
+    assert after < before
@@ -0,0 +1,41 @@
+import gzip
+import random
+
+import pytest
+
+from app.compression import brotli, zstandard
+from app.crud import get_itinerary_tree
+from app.serialization import dump_json
+
+pytestmark = pytest.mark.benchmark
+
+WORDS = (
+    "walked along the river to the old market then took the train to the temple early morning light "
+    "ramen lunch near the station museum closed on mondays booked the ryokan onsen at dusk night bus"
+).split()
+
+
+def codecs():
+    out = [(f"gzip-{level}", lambda body, level=level: gzip.compress(body, compresslevel=level, mtime=0)) for level in (1, 6, 9)]
+    if brotli is not None:
+        out += [(f"br-{q}", lambda body, q=q: brotli.compress(body, quality=q)) for q in (1, 5, 11)]
+    if zstandard is not None:
+        out += [(f"zstd-{level}", zstandard.ZstdCompressor(level=level).compress) for level in (1, 3, 9, 19)]
+    return out
+
+
+def test_compression_cost_per_kb(seed, bench):
+    rng = random.Random(0)
+    itinerary_id = seed.itinerary(
+        seed.user("alice").id, 30, 20,
+        content=lambda d, b: " ".join(rng.choice(WORDS) for _ in range(rng.randrange(10, 60))),
+    )
+    body = dump_json(get_itinerary_tree(seed.session, itinerary_id))
+    kb = len(body) / 1024
+
+    rows = []
+    for name, compress in codecs():
+        repeat = 3 if name in ("br-11", "zstd-19") else 10
+        ms = bench.median_ms(lambda: compress(body), repeat=repeat)
+        rows.append([name, f"{ms * 1000 / kb:.1f}", f"{len(body) / len(compress(body)):.1f}x"])
+    bench.table(f"Compressing a {kb:.0f} KiB 30-day itinerary (median)", ["codec", "us/KiB", "ratio"], rows)
@@ -0,0 +1,36 @@
+import pytest
+from sqlmodel import insert, select, update
+
+from app.models import Follow, User
+from app.utils.cursors import encode_cursor
+
+pytestmark = pytest.mark.benchmark
+
+FOLLOWERS = 100_000
+
+
+def test_follower_pages_are_flat(client, seed, count_queries, bench):
+    session = seed.session
+    star_id = seed.user("star").id
+    for start in range(0, FOLLOWERS, 10_000):
+        session.exec(insert(User).values([
+            {"username": f"fan{i}", "email": f"fan{i}@example.com", "trips_count": i % 7, "saved_count": i % 3}
+            for i in range(start, start + 10_000)
+        ]))
+    fan_ids = session.exec(select(User.id).where(User.id != star_id).order_by(User.id)).all()
+    for start in range(0, FOLLOWERS, 10_000):
+        session.exec(insert(Follow).values([{"follower_id": f, "following_id": star_id} for f in fan_ids[start:start + 10_000]]))
+    session.exec(update(User).where(User.id == star_id).values(followers_count=FOLLOWERS))
+    session.commit()
+    follow_ids = session.exec(select(Follow.id).order_by(Follow.id.desc())).all()
+
+    rows = []
+    for label, position in (("first", None), ("50k deep", FOLLOWERS // 2), ("last", FOLLOWERS - 20)):
+        params = {"limit": 20} if position is None else {"limit": 20, "after": encode_cursor(follow_ids[position - 1])}
+        with count_queries() as q:
+            page = client.get("/users/star/followers", params=params)
+        assert page.status_code == 200 and len(page.json()) == 20
+        assert q.count == 2, q.statements
+        ms = bench.median_ms(lambda: client.get("/users/star/followers", params=params))
+        rows.append([label, q.count, ms])
+    bench.table(f"GET /users/{{username}}/followers, {FOLLOWERS:,} followers, 20 per page", ["page", "statements", "ms (median)"], rows)
@@ -0,0 +1,21 @@
+import pytest
+
+pytestmark = pytest.mark.benchmark
+
+
+def test_fork_round_trips_are_independent_of_block_count(client, login, count_queries, seed, bench):
+    owner_id = seed.user("alice").id
+    login("bob")
+    rows, statements = [], set()
+    for days, blocks_per_day in ((1, 1), (30, 20), (365, 20)):
+        itinerary_id = seed.itinerary(owner_id, days, blocks_per_day)
+        for mode in ("copy", "cow"):
+            url = f"/itineraries/{itinerary_id}/fork" + ("?mode=cow" if mode == "cow" else "")
+            with count_queries() as q:
+                assert client.post(url).status_code == 201
+            statements.add((mode, q.count))
+            ms = bench.median_ms(lambda: client.post(url), repeat=5, warmup=0)
+            rows.append([days, days * blocks_per_day, mode, q.count, ms])
+    bench.table("POST /itineraries/{id}/fork", ["days", "blocks", "mode", "statements", "ms (median)"], rows)
+    # set-based copies: the round trips never grow with the itinerary, only the SQL engine's work does
+    assert len(statements) == 2, rows
@@ -0,0 +1,33 @@
+import random
+
+import pytest
+
+from app.search import search_itinerary_ids
+
+pytestmark = pytest.mark.benchmark
+
+ITINERARIES = 1_000
+BLOCKS_PER_ITINERARY = 100  # 100k text blocks
+VOCABULARY = [f"w{i}" for i in range(30)] + ["kyoto", "onsen", "ramen", "shrine", "ferry"]
+
+
+def test_text_search_latency(seed, bench):
+    rng = random.Random(0)
+    user_id = seed.user("alice").id
+    for i in range(ITINERARIES):
+        words = VOCABULARY if i % 50 == 0 else VOCABULARY[:30]  # the named places are rare
+        seed.itinerary(
+            user_id, 10, BLOCKS_PER_ITINERARY // 10, title=f"Trip {i}",
+            content=lambda d, b: " ".join(rng.choice(words) for _ in range(12)),
+        )
+
+    rows = []
+    for query in ("onsen", "kyoto ferry", "w3", "w3 w7", "missing"):
+        ids = search_itinerary_ids(seed.session, query, limit=20)
+        ms = bench.median_ms(lambda: search_itinerary_ids(seed.session, query, limit=20), repeat=10)
+        deep = bench.median_ms(lambda: search_itinerary_ids(seed.session, query, limit=20, offset=500), repeat=10)
+        rows.append([query, len(ids), ms, deep])
+    bench.table(
+        f"Text search over {ITINERARIES * BLOCKS_PER_ITINERARY:,} blocks, top 20 (ms, median)",
+        ["query", "hits", "page 1", "offset 500"], rows,
+    )
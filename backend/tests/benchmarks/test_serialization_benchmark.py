@@ -0,0 +1,42 @@
+import json
+
+import orjson
+import pytest
+from sqlalchemy.orm import selectinload, undefer
+from sqlmodel import select
+
+from app.crud import get_itinerary_tree
+from app.models import DayGroup, Itinerary, ItineraryBlock
+from app.schemas import ItineraryRead
+from app.serialization import dump_json
+
+pytestmark = pytest.mark.benchmark
+
+
+def pydantic_path(session, itinerary_id: int) -> bytes:
+    """What a response_model=ItineraryRead route does with an ORM itinerary: validate, dump, json.dumps."""
+    itin = session.exec(
+        select(Itinerary).where(Itinerary.id == itinerary_id)
+        .options(selectinload(Itinerary.days).selectinload(DayGroup.blocks).options(undefer(ItineraryBlock.content)))
+    ).one()
+    body = json.dumps(ItineraryRead.model_validate(itin).model_dump(mode="json")).encode()
+    session.expunge_all()
+    return body
+
+
+def fast_path(session, itinerary_id: int) -> bytes:
+    """The detail route's cold path: one-query tree of plain dicts, encoded by orjson."""
+    return dump_json(get_itinerary_tree(session, itinerary_id))
+
+
+def test_detail_serialization(session, seed, bench):
+    user_id = seed.user("alice").id
+    rows = []
+    for days in (1, 30, 365):
+        itinerary_id = seed.itinerary(user_id, days, 10)
+        assert orjson.loads(pydantic_path(session, itinerary_id)) == orjson.loads(fast_path(session, itinerary_id))
+        repeat = 5 if days == 365 else 20
+        before = bench.median_ms(lambda: pydantic_path(session, itinerary_id), repeat=repeat)
+        after = bench.median_ms(lambda: fast_path(session, itinerary_id), repeat=repeat)
+        rows.append([days, days * 10, before, after, f"{before / after:.1f}x"])
+    bench.table("Itinerary detail, load + serialize (ms, median)", ["days", "blocks", "ORM+pydantic", "tree+orjson", "speedup"], rows)
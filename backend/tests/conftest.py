@@ -0,0 +1,89 @@
+import os
+
+# Point the app at an in-memory SQLite database before `app` is imported (the engine is built at import time)
+os.environ["DATABASE_URL"] = "sqlite://"
+for name, value in {
+    "MAIL_USERNAME": "test", "MAIL_PASSWORD": "test", "MAIL_FROM": "test@example.com", "MAIL_SERVER": "localhost",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from sqlmodel import Session, SQLModel, select
+
+from app import database
+from app.cache import itinerary_cache
+from app.compression import compressed_cache
+from app.deps import get_current_user
+from app.main import app
+from app.models import User
+
+database.engine.echo = False
+
+
+@pytest.fixture
+def engine():
+    """A fresh schema per test; response caches are keyed by ids, so they are emptied too."""
+    database.init_db()
+    yield database.engine
+    app.dependency_overrides.clear()
+    itinerary_cache.clear()
+    compressed_cache.clear()
+    SQLModel.metadata.drop_all(database.engine)
+    with database.engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS search_document"))
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def client(engine):
+    # no `with`: the lifespan (init_db, periodic jobs) is not started
+    return TestClient(app)
+
+
+@pytest.fixture
+def login(session):
+    """login("alice") authenticates every following request as that user, creating them on first use."""
+    def _login(username: str) -> User:
+        user = session.exec(select(User).where(User.username == username)).first()
+        if user is None:
+            user = User(username=username, email=f"{username}@example.com")
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+        app.dependency_overrides[get_current_user] = lambda: user
+        return user
+    return _login
+
+
+class QueryCounter:
+    """Counts the statements sent to the database while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements: list[str] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_queries(engine):
+    return lambda: QueryCounter(engine)
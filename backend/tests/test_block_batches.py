@@ -0,0 +1,26 @@
+def test_batch_mixing_explicit_and_allocated_orders(client, login):
+    login("alice")
+    itinerary = client.post("/itineraries", json={"title": "Osaka", "description": "d", "start_date": "2025-01-01"}).json()
+    base = f"/itineraries/{itinerary['id']}/days/{itinerary['days'][0]['id']}/blocks"
+
+    r = client.post(f"{base}:batch", json={"blocks": [{"order": 1024, "type": "text", "content": "a"}, {"type": "text", "content": "b"}]})
+    assert r.status_code == 201, r.text
+    assert [b["order"] for b in r.json()] == [1024, 2048]
+
+    # an explicit order above everything stored still leaves room for the allocated ones
+    r = client.post(f"{base}:batch", json={"blocks": [{"type": "text", "content": "c"}, {"order": 10_000, "type": "text", "content": "d"}]})
+    assert r.status_code == 201, r.text
+    orders = [b["order"] for b in r.json()]
+    assert orders[1] == 10_000 and orders[0] > 10_000
+    assert [b["content"] for b in client.get(base).json()] == ["a", "b", "d", "c"]
+
+
+def test_batch_with_a_taken_order_writes_nothing(client, login):
+    login("alice")
+    itinerary = client.post("/itineraries", json={"title": "Osaka", "description": "d", "start_date": "2025-01-01"}).json()
+    base = f"/itineraries/{itinerary['id']}/days/{itinerary['days'][0]['id']}/blocks"
+    client.post(f"{base}:batch", json={"blocks": [{"order": 1024, "type": "text", "content": "a"}]})
+
+    r = client.post(f"{base}:batch", json={"blocks": [{"type": "text", "content": "b"}, {"order": 1024, "type": "text", "content": "c"}]})
+    assert r.status_code == 409
+    assert [b["content"] for b in client.get(base).json()] == ["a"]
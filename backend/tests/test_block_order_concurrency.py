@@ -0,0 +1,78 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import database
+from app.deps import get_current_user
+from app.main import app
+from app.models import User
+
+WRITERS = 100
+
+
+@pytest.fixture
+def file_client(tmp_path, monkeypatch):
+    """
+    A client on a file-backed database with a real connection pool, so every request thread gets
+    its own connection and transaction (the shared in-memory engine would serialize them).
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'concurrency.db'}",
+        connect_args={"check_same_thread": False, "timeout": 60},
+        pool_size=WRITERS + 10,
+        max_overflow=0,
+    )
+    monkeypatch.setattr(database, "engine", engine)
+    database.init_db()
+    with Session(engine) as session:
+        user = User(username="alice", email="alice@example.com")
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    SQLModel.metadata.drop_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS search_document"))
+    engine.dispose()
+
+
+def new_day(client) -> tuple[int, int]:
+    itin = client.post("/itineraries", json={"title": "Busy day", "description": "d", "start_date": "2025-01-01"}).json()
+    return itin["id"], itin["days"][0]["id"]
+
+
+def fire(client, url: str, count: int) -> Counter:
+    def add(i: int) -> int:
+        return client.post(url, json={"type": "text", "content": f"block {i}"}).status_code
+    with ThreadPoolExecutor(count) as pool:
+        return Counter(pool.map(add, range(count)))
+
+
+def test_parallel_appends_never_conflict(file_client):
+    itinerary_id, day_id = new_day(file_client)
+    codes = fire(file_client, f"/itineraries/{itinerary_id}/days/{day_id}/blocks", WRITERS)
+
+    assert codes == Counter({201: WRITERS})
+    blocks = file_client.get(f"/itineraries/{itinerary_id}/days/{day_id}/blocks").json()
+    assert len(blocks) == WRITERS
+    assert len({b["order"] for b in blocks}) == WRITERS
+
+
+def test_parallel_inserts_after_one_block_never_conflict(file_client):
+    itinerary_id, day_id = new_day(file_client)
+    url = f"/itineraries/{itinerary_id}/days/{day_id}/blocks"
+    first = file_client.post(url, json={"type": "text", "content": "first"}).json()["id"]
+    file_client.post(url, json={"type": "text", "content": "last"})
+
+    codes = fire(file_client, f"{url}?after={first}", 30)
+
+    assert codes == Counter({201: 30})
+    contents = [b["content"] for b in file_client.get(url).json()]
+    assert len(contents) == 32
+    assert (contents[0], contents[-1]) == ("first", "last")
@@ -0,0 +1,78 @@
+from sqlmodel import select
+
+from app.crud import ORDER_GAP
+from app.models import ItineraryBlock
+
+
+def make_days(client) -> tuple[str, str, int]:
+    """Blocks urls of the two days of a new trip, and the second day's id."""
+    itinerary_id = client.post("/itineraries", json={"title": "Kyushu", "description": "d", "start_date": "2025-01-01"}).json()["id"]
+    client.post(f"/itineraries/{itinerary_id}/days:bulk", json={"count": 1})
+    first, second = (d["id"] for d in client.get(f"/itineraries/{itinerary_id}/days").json())
+    return f"/itineraries/{itinerary_id}/days/{first}/blocks", f"/itineraries/{itinerary_id}/days/{second}/blocks", second
+
+
+def add(client, url: str, content: str, **params) -> dict:
+    r = client.post(url, params=params, json={"type": "text", "content": content})
+    assert r.status_code == 201, r.text
+    return r.json()
+
+
+def contents(client, url: str) -> list[str]:
+    return [b["content"] for b in client.get(url).json()]
+
+
+def test_appends_are_gapped_and_inserts_take_the_midpoint(client, login):
+    login("alice")
+    url, _, _ = make_days(client)
+    a, c = add(client, url, "a"), add(client, url, "c")
+    assert (a["order"], c["order"]) == (ORDER_GAP, 2 * ORDER_GAP)
+
+    b = add(client, url, "b", before=c["id"])
+    d = add(client, url, "d", after=c["id"])
+    first = add(client, url, "first", before=a["id"])
+    assert (b["order"], d["order"], first["order"]) == (ORDER_GAP * 3 // 2, 3 * ORDER_GAP, ORDER_GAP // 2)
+    assert contents(client, url) == ["first", "a", "b", "c", "d"]
+
+
+def test_an_exhausted_gap_respreads_only_that_day(client, login, session):
+    login("alice")
+    url, other_url, _ = make_days(client)
+    untouched = add(client, other_url, "elsewhere")
+    anchor = add(client, url, "anchor")
+    for n in range(12):  # each insert halves the gap below the anchor; ORDER_GAP = 2**10
+        add(client, url, f"n{n}", before=anchor["id"])
+
+    assert contents(client, url) == [f"n{n}" for n in range(12)] + ["anchor"]
+    orders = session.exec(select(ItineraryBlock.order).where(ItineraryBlock.day_group_id == anchor["day_group_id"]).order_by(ItineraryBlock.order)).all()
+    assert len(set(orders)) == 13 and min(orders) > 0
+    assert client.get(other_url).json()[0]["order"] == untouched["order"]
+
+
+def test_move_within_and_between_days(client, login):
+    login("alice")
+    url, other_url, other_day = make_days(client)
+    a, b, c = (add(client, url, x) for x in "abc")
+    z = add(client, other_url, "z")
+
+    r = client.post(f"{url}/{c['id']}:move", json={"before_id": a["id"]})
+    assert r.status_code == 200 and contents(client, url) == ["c", "a", "b"]
+    client.post(f"{url}/{c['id']}:move", json={})  # to the end of its day
+    assert contents(client, url) == ["a", "b", "c"]
+
+    r = client.post(f"{url}/{a['id']}:move", json={"day_id": other_day, "after_id": z["id"]})
+    assert r.json()["day_group_id"] == other_day
+    assert (contents(client, url), contents(client, other_url)) == (["b", "c"], ["z", "a"])
+
+
+def test_bad_placements_are_rejected(client, login):
+    login("alice")
+    url, other_url, _ = make_days(client)
+    a = add(client, url, "a")
+    z = add(client, other_url, "z")
+
+    assert client.post(url, params={"before": a["id"], "after": a["id"]}, json={"type": "text", "content": "x"}).status_code == 422
+    assert client.post(url, params={"after": z["id"]}, json={"type": "text", "content": "x"}).status_code == 404
+    assert client.post(f"{url}/{a['id']}:move", json={"before_id": z["id"], "after_id": z["id"]}).status_code == 422
+    assert client.post(f"{url}/{a['id']}:move", json={"before_id": z["id"]}).status_code == 404
+    assert contents(client, url) == ["a"]
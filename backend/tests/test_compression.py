@@ -0,0 +1,65 @@
+import threading
+
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware
+
+
+def test_304_repeats_the_weak_etag_of_the_compressed_200(client, login):
+    login("alice")
+    itinerary = client.post("/itineraries", json={"title": "Long", "description": "x" * 4000, "start_date": "2025-01-01"}).json()
+
+    ok = client.get(f"/itineraries/{itinerary['id']}", headers={"Accept-Encoding": "gzip"})
+    assert ok.headers["Content-Encoding"] == "gzip"
+    assert ok.headers["ETag"].startswith("W/")
+
+    not_modified = client.get(f"/itineraries/{itinerary['id']}", headers={"Accept-Encoding": "gzip", "If-None-Match": ok.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == ok.headers["ETag"]
+
+
+def test_large_bodies_are_compressed_off_the_event_loop():
+    threads = {}
+
+    async def endpoint(request):
+        threads["loop"] = threading.get_ident()
+        return Response(b"a" * int(request.query_params["size"]), media_type="text/plain", headers={"ETag": f'"{request.query_params["size"]}"'})
+
+    middleware = CompressionMiddleware(Starlette(routes=[Route("/", endpoint)]), minimum_size=10, thread_min_size=1000)
+    gzip = middleware.compressors["gzip"]
+
+    def recording_gzip(body):
+        threads["compress"] = threading.get_ident()
+        return gzip(body)
+
+    middleware.compressors["gzip"] = recording_gzip
+    client = TestClient(middleware)
+
+    small = client.get("/", params={"size": 100}, headers={"Accept-Encoding": "gzip"})
+    assert small.content == b"a" * 100
+    assert threads["compress"] == threads["loop"]
+
+    large = client.get("/", params={"size": 100_000}, headers={"Accept-Encoding": "gzip"})
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert large.content == b"a" * 100_000
+    assert threads["compress"] != threads["loop"]
+
+
+def test_only_text_like_content_types_are_compressed():
+    body = b"a" * 4096
+
+    async def endpoint(request):
+        return Response(body, media_type=request.query_params["type"], headers={"ETag": '"x"'})
+
+    client = TestClient(CompressionMiddleware(Starlette(routes=[Route("/", endpoint)]), minimum_size=10))
+    for media_type in ("application/json", "application/problem+json", "text/html", "application/javascript", "image/svg+xml"):
+        r = client.get("/", params={"type": media_type}, headers={"Accept-Encoding": "gzip"})
+        assert r.headers["Content-Encoding"] == "gzip", media_type
+    for media_type in ("image/png", "application/octet-stream", "application/zip"):
+        r = client.get("/", params={"type": media_type}, headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in r.headers, media_type
+        assert r.content == body
+        assert r.headers["ETag"] == 'W/"x"'  # weakened like every negotiated response, so a 304 matches it
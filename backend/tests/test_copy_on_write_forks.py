@@ -0,0 +1,224 @@
+import random
+
+import pytest
+
+
+def contents(client, itinerary_id: int) -> list:
+    """What a reader sees, without ids: days in order with their blocks in order."""
+    tree = client.get(f"/itineraries/{itinerary_id}").json()
+    return [(d["date"], d["title"], [(b["type"], b["content"]) for b in d["blocks"]]) for d in tree["days"]]
+
+
+def make_source(client) -> int:
+    itin = client.post("/itineraries", json={"title": "Hokkaido", "description": "d", "start_date": "2025-01-01"}).json()
+    client.post(f"/itineraries/{itin['id']}/days:bulk", json={"count": 2})
+    for day in client.get(f"/itineraries/{itin['id']}").json()["days"]:
+        blocks = [{"type": "text", "content": f"{day['title']} block {i}"} for i in range(3)]
+        client.post(f"/itineraries/{itin['id']}/days/{day['id']}/blocks:batch", json={"blocks": blocks})
+    return itin["id"]
+
+
+def random_edit(rng: random.Random, days: list) -> tuple:
+    """A positional edit (day/block indexes, not ids), so the same edit can be replayed on a twin."""
+    kinds = ["add", "add_after", "batch", "add_day", "rename_day", "shift", "reorder"]
+    if len(days) > 1:
+        kinds.append("delete_day")
+    if any(d["blocks"] for d in days):
+        kinds += ["delete", "update", "move", "move"]
+    kind = rng.choice(kinds)
+    text = f"edit {rng.randrange(10**6)}"
+    day = rng.randrange(len(days))
+    if kind in ("delete", "update", "move", "add_after"):
+        day = rng.choice([i for i, d in enumerate(days) if d["blocks"]] or [day])
+    block = rng.randrange(len(days[day]["blocks"])) if days[day]["blocks"] else None
+    if kind == "add_after" and block is None:
+        kind = "add"
+    if kind == "move":
+        to_day = rng.randrange(len(days))
+        anchors = [i for i in range(len(days[to_day]["blocks"])) if (to_day, i) != (day, block)]
+        return kind, day, block, to_day, rng.choice(anchors) if anchors else None
+    if kind == "reorder":
+        order = list(range(len(days)))
+        rng.shuffle(order)
+        return kind, order
+    if kind == "shift":
+        return kind, rng.choice([-2, 1, 3])
+    return kind, day, block, text
+
+
+def apply_edit(client, itinerary_id: int, edit: tuple) -> None:
+    days = client.get(f"/itineraries/{itinerary_id}").json()["days"]
+    base = f"/itineraries/{itinerary_id}/days"
+    kind = edit[0]
+    if kind == "move":
+        _, day, block, to_day, anchor = edit
+        moved = days[day]["blocks"][block]["id"]
+        payload = {"day_id": days[to_day]["id"]}
+        if anchor is not None:
+            payload["after_id"] = days[to_day]["blocks"][anchor]["id"]
+        r = client.post(f"{base}/{days[day]['id']}/blocks/{moved}:move", json=payload)
+    elif kind == "reorder":
+        r = client.patch(f"{base}/reorder", json=[days[i]["id"] for i in edit[1]])
+    elif kind == "shift":
+        r = client.post(f"{base}:shift", json={"days": edit[1]})
+    else:
+        _, day, block, text = edit
+        day_id = days[day]["id"]
+        block_id = days[day]["blocks"][block]["id"] if block is not None else None
+        if kind == "add":
+            r = client.post(f"{base}/{day_id}/blocks", json={"type": "text", "content": text})
+        elif kind == "add_after":
+            r = client.post(f"{base}/{day_id}/blocks?after={block_id}", json={"type": "text", "content": text})
+        elif kind == "batch":
+            r = client.post(f"{base}/{day_id}/blocks:batch", json={"blocks": [{"type": "text", "content": text}] * 2})
+        elif kind == "add_day":
+            r = client.post(base, json={"date": "2025-02-01", "title": text, "order": 0})
+        elif kind == "rename_day":
+            r = client.patch(f"{base}/{day_id}", json={"date": days[day]["date"], "title": text, "order": days[day]["order"]})
+        elif kind == "delete_day":
+            r = client.delete(f"{base}/{day_id}")
+        elif kind == "delete":
+            r = client.delete(f"{base}/{day_id}/blocks/{block_id}")
+        elif kind == "update":
+            r = client.post(f"/itineraries/{itinerary_id}/ops", json={"ops": [{"op": "block.update", "block_id": block_id, "content": text}]})
+    assert r.status_code < 300, (edit, r.status_code, r.text)
+
+
+def test_source_edits_do_not_reach_copy_on_write_forks(client, login):
+    login("alice")
+    source = make_source(client)
+    client.post(f"/itineraries/{source}/days/{client.get(f'/itineraries/{source}').json()['days'][0]['id']}/blocks",
+                json={"type": "text", "content": "original"})
+    login("bob")
+    cow = client.post(f"/itineraries/{source}/fork?mode=cow").json()["id"]
+    copy = client.post(f"/itineraries/{source}/fork").json()["id"]
+
+    login("alice")
+    day = client.get(f"/itineraries/{source}").json()["days"][0]
+    original = next(b for b in day["blocks"] if b["content"] == "original")
+    client.delete(f"/itineraries/{source}/days/{day['id']}/blocks/{original['id']}")
+    client.post(f"/itineraries/{source}/days/{day['id']}/blocks", json={"type": "text", "content": "AUTHOR ADDED LATER"})
+
+    assert contents(client, cow) == contents(client, copy)
+    assert "original" in [b for _, _, blocks in contents(client, cow) for _, b in blocks]
+
+
+
+def test_source_edits_do_not_reach_forks_of_forks_that_own_their_days(client, login):
+    """A -> F (copy-on-write, renames its day so it owns its days) -> G (copy-on-write of F)."""
+    login("alice")
+    source = client.post("/itineraries", json={"title": "Nara", "description": "d", "start_date": "2025-01-01"}).json()
+    day = source["days"][0]
+    block = client.post(f"/itineraries/{source['id']}/days/{day['id']}/blocks", json={"type": "text", "content": "orig"}).json()
+    login("bob")
+    f = client.post(f"/itineraries/{source['id']}/fork?mode=cow").json()["id"]
+    own_day = client.get(f"/itineraries/{f}").json()["days"][0]
+    client.patch(f"/itineraries/{f}/days/{own_day['id']}", json={"date": own_day["date"], "title": "renamed", "order": own_day["order"]})
+    login("carol")
+    g = client.post(f"/itineraries/{f}/fork?mode=cow").json()["id"]
+    copy_of_f = client.post(f"/itineraries/{f}/fork").json()["id"]
+
+    login("alice")
+    r = client.post(f"/itineraries/{source['id']}/ops", json={"ops": [{"op": "block.update", "block_id": block["id"], "content": "CHANGED"}]})
+    assert r.status_code == 200
+    assert contents(client, g) == contents(client, copy_of_f) == contents(client, f)
+    assert contents(client, g)[0][2] == [("text", "orig")]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_copy_on_write_forks_match_copies_under_random_edits(client, login, seed):
+    """
+    Alice edits her trip while others fork it (and fork those forks) both ways and edit their forks.
+    Every copy-on-write fork must always read exactly like the deep copy taken at the same moment.
+    """
+    rng = random.Random(seed)
+    login("alice")
+    source = make_source(client)
+    owners = {source: "alice"}
+    twins: list[tuple[int, int]] = []  # (copy-on-write fork, deep copy), edited in lockstep
+
+    for step in range(40):
+        if step % 8 == 0:
+            # fork the source, or a fork of it
+            parent = rng.choice([source] + [cow for cow, _ in twins])
+            forker = f"user{step}"
+            login(forker)
+            cow = client.post(f"/itineraries/{parent}/fork?mode=cow").json()["id"]
+            copy = client.post(f"/itineraries/{parent}/fork").json()["id"]
+            owners[cow] = owners[copy] = forker
+            twins.append((cow, copy))
+
+        target = rng.choice([source] + [cow for cow, _ in twins])
+        login(owners[target])
+        edit = random_edit(rng, client.get(f"/itineraries/{target}").json()["days"])
+        apply_edit(client, target, edit)
+        for cow, copy in twins:
+            if cow == target:
+                apply_edit(client, copy, edit)
+
+        for cow, copy in twins:
+            assert contents(client, cow) == contents(client, copy), (step, edit)
+
+
+def test_deleting_the_source_keeps_copy_on_write_forks(client, login):
+    login("alice")
+    source = make_source(client)
+    login("bob")
+    cow = client.post(f"/itineraries/{source}/fork?mode=cow").json()["id"]
+    login("carol")
+    cow_of_cow = client.post(f"/itineraries/{cow}/fork?mode=cow").json()["id"]
+    expected = contents(client, source)
+
+    login("alice")
+    assert client.delete(f"/itineraries/{source}").status_code == 204
+    assert contents(client, cow) == expected
+    assert contents(client, cow_of_cow) == expected
+
+
+def test_patching_a_copy_on_write_fork_returns_its_days(client, login):
+    login("alice")
+    source = make_source(client)
+    login("bob")
+    cow = client.post(f"/itineraries/{source}/fork?mode=cow").json()["id"]
+
+    r = client.patch(f"/itineraries/{cow}", json={"title": "Bob's Hokkaido", "visibility": "public", "tags": []})
+    assert r.status_code == 200
+    assert r.json()["title"] == "Bob's Hokkaido"
+    assert r.json() == client.get(f"/itineraries/{cow}").json()
+    assert len(r.json()["days"]) == 3
+
+
+def test_text_search_finds_copy_on_write_forks_by_shared_blocks(client, login):
+    login("alice")
+    source = make_source(client)
+    day = client.get(f"/itineraries/{source}").json()["days"][0]
+    client.post(f"/itineraries/{source}/days/{day['id']}/blocks", json={"type": "text", "content": "onsen at dusk"})
+
+    login("bob")
+    cow = client.post(f"/itineraries/{source}/fork?mode=cow").json()["id"]
+    # own days, blocks still shared with the source
+    days_only = client.post(f"/itineraries/{source}/fork?mode=cow").json()["id"]
+    own_day = client.get(f"/itineraries/{days_only}").json()["days"][0]
+    client.patch(f"/itineraries/{days_only}/days/{own_day['id']}", json={"date": own_day["date"], "title": "renamed", "order": own_day["order"]})
+    login("carol")
+    cow_of_days_only = client.post(f"/itineraries/{days_only}/fork?mode=cow").json()["id"]
+    # own blocks, the matching one deleted
+    dropped = client.post(f"/itineraries/{source}/fork?mode=cow").json()["id"]
+    shared = next(b for b in client.get(f"/itineraries/{dropped}").json()["days"][0]["blocks"] if b["content"] == "onsen at dusk")
+    client.delete(f"/itineraries/{dropped}/days/{day['id']}/blocks/{shared['id']}")
+
+    found = {i["id"] for i in client.get("/itineraries/search/text", params={"q": "onsen"}).json()}
+    assert found == {source, cow, days_only, cow_of_days_only}
+
+
+def test_patching_a_copy_on_write_day_returns_its_shared_blocks(client, login):
+    login("alice")
+    source = make_source(client)
+    login("bob")
+    cow = client.post(f"/itineraries/{source}/fork?mode=cow").json()["id"]
+    day = client.get(f"/itineraries/{cow}").json()["days"][1]
+
+    r = client.patch(f"/itineraries/{cow}/days/{day['id']}", json={"date": day["date"], "title": "renamed", "order": day["order"]})
+    assert r.status_code == 200
+    assert r.json()["title"] == "renamed"
+    assert r.json() == client.get(f"/itineraries/{cow}").json()["days"][1]
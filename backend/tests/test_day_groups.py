@@ -0,0 +1,102 @@
+def make_trip(client, days: int) -> tuple[int, list]:
+    itinerary = client.post("/itineraries", json={"title": "Tohoku", "description": "d", "start_date": "2025-01-01"}).json()
+    if days > 1:
+        client.post(f"/itineraries/{itinerary['id']}/days:bulk", json={"count": days - 1})
+    return itinerary["id"], client.get(f"/itineraries/{itinerary['id']}/days").json()
+
+
+def test_bulk_create_appends_consecutive_days(client, login):
+    login("alice")
+    itinerary_id, days = make_trip(client, 1)
+
+    r = client.post(f"/itineraries/{itinerary_id}/days:bulk", json={"count": 3})
+    assert r.status_code == 201
+    assert [(d["date"], d["order"], d["title"]) for d in r.json()] == [
+        ("2025-01-02", 2, "Day 2"), ("2025-01-03", 3, "Day 3"), ("2025-01-04", 4, "Day 4"),
+    ]
+    assert [d["id"] for d in client.get(f"/itineraries/{itinerary_id}/days").json()] == [days[0]["id"]] + [d["id"] for d in r.json()]
+
+    r = client.post(f"/itineraries/{itinerary_id}/days:bulk", json={"count": 1, "start_date": "2025-03-01"})
+    assert [(d["date"], d["order"]) for d in r.json()] == [("2025-03-01", 5)]
+
+
+def test_bulk_create_needs_a_start_date_without_days(client, login):
+    login("alice")
+    itinerary_id, days = make_trip(client, 1)
+    client.delete(f"/itineraries/{itinerary_id}/days/{days[0]['id']}")
+
+    assert client.post(f"/itineraries/{itinerary_id}/days:bulk", json={"count": 2}).status_code == 422
+    r = client.post(f"/itineraries/{itinerary_id}/days:bulk", json={"count": 2, "start_date": "2025-05-01"})
+    assert [(d["date"], d["order"]) for d in r.json()] == [("2025-05-01", 1), ("2025-05-02", 2)]
+
+
+def test_reverse_reorder(client, login):
+    login("alice")
+    itinerary_id, days = make_trip(client, 4)
+    reversed_ids = [d["id"] for d in reversed(days)]
+
+    r = client.patch(f"/itineraries/{itinerary_id}/days/reorder", json=reversed_ids)
+    assert r.status_code == 200, r.text
+    assert [(d["id"], d["order"]) for d in r.json()] == [(day_id, i) for i, day_id in enumerate(reversed_ids, start=1)]
+    assert [d["id"] for d in client.get(f"/itineraries/{itinerary_id}/days").json()] == reversed_ids
+
+
+def test_reorder_rejects_a_partial_list(client, login):
+    login("alice")
+    itinerary_id, days = make_trip(client, 3)
+    r = client.patch(f"/itineraries/{itinerary_id}/days/reorder", json=[d["id"] for d in days[:2]])
+    assert r.status_code == 400
+    assert [d["id"] for d in client.get(f"/itineraries/{itinerary_id}/days").json()] == [d["id"] for d in days]
+
+
+def test_shift_moves_every_date(client, login):
+    login("alice")
+    itinerary_id, _ = make_trip(client, 3)
+
+    r = client.post(f"/itineraries/{itinerary_id}/days:shift", json={"days": -2})
+    assert r.status_code == 200
+    assert [d["date"] for d in r.json()] == ["2024-12-30", "2024-12-31", "2025-01-01"]
+
+    r = client.post(f"/itineraries/{itinerary_id}/days:shift", json={"days": 60})
+    assert [d["date"] for d in r.json()] == ["2025-02-28", "2025-03-01", "2025-03-02"]
+    assert [d["date"] for d in client.get(f"/itineraries/{itinerary_id}/days").json()] == ["2025-02-28", "2025-03-01", "2025-03-02"]
+
+
+def test_bulk_and_shift_round_trips_do_not_grow_with_days(client, login, count_queries):
+    counts = {}
+    for days in (2, 40):
+        login(f"user{days}")
+        itinerary_id, _ = make_trip(client, days)
+        with count_queries() as bulk:
+            assert client.post(f"/itineraries/{itinerary_id}/days:bulk", json={"count": days}).status_code == 201
+        with count_queries() as shift:
+            assert client.post(f"/itineraries/{itinerary_id}/days:shift", json={"days": 1}).status_code == 200
+        counts[days] = (bulk.count, shift.count)
+    assert counts[2] == counts[40], counts
+
+
+def test_bulk_and_shift_on_a_copy_on_write_fork_leave_the_source_alone(client, login):
+    login("alice")
+    source, days = make_trip(client, 2)
+    login("bob")
+    fork = client.post(f"/itineraries/{source}/fork?mode=cow").json()["id"]
+
+    client.post(f"/itineraries/{fork}/days:shift", json={"days": 7})
+    client.post(f"/itineraries/{fork}/days:bulk", json={"count": 1})
+    assert [d["date"] for d in client.get(f"/itineraries/{fork}/days").json()] == ["2025-01-08", "2025-01-09", "2025-01-10"]
+    assert client.get(f"/itineraries/{source}/days").json() == days
+
+    # and the other way round: the source's shift doesn't move a fork that still shares its days
+    login("carol")
+    other = client.post(f"/itineraries/{source}/fork?mode=cow").json()["id"]
+    login("alice")
+    client.post(f"/itineraries/{source}/days:shift", json={"days": -1})
+    assert [d["date"] for d in client.get(f"/itineraries/{other}/days").json()] == ["2025-01-01", "2025-01-02"]
+
+
+def test_bulk_and_shift_bounds(client, login):
+    login("alice")
+    itinerary_id, _ = make_trip(client, 1)
+    for url, body in [("days:bulk", {"count": 0}), ("days:bulk", {"count": 367}), ("days:shift", {"days": 3651})]:
+        assert client.post(f"/itineraries/{itinerary_id}/{url}", json=body).status_code == 422, body
+    assert len(client.get(f"/itineraries/{itinerary_id}/days").json()) == 1
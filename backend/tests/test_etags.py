@@ -0,0 +1,58 @@
+import pytest
+
+
+@pytest.fixture
+def trip(client, login):
+    login("alice")
+    itinerary = client.post("/itineraries", json={"title": "Kyoto", "description": "d", "start_date": "2025-01-01"}).json()
+    return itinerary["id"], itinerary["days"][0]["id"]
+
+
+def routes(trip) -> dict[str, str]:
+    itinerary_id, day_id = trip
+    return {
+        "itinerary": f"/itineraries/{itinerary_id}",
+        "days": f"/itineraries/{itinerary_id}/days",
+        "blocks": f"/itineraries/{itinerary_id}/days/{day_id}/blocks",
+        "profile": "/users/alice/profile",
+    }
+
+
+def edit(client, trip) -> None:
+    """A write that changes every conditional resource above."""
+    itinerary_id, day_id = trip
+    client.post(f"/itineraries/{itinerary_id}/days/{day_id}/blocks", json={"type": "text", "content": "soba"})
+    client.put("/users/alice/profile", json={"bio": "eats noodles"})
+
+
+@pytest.mark.parametrize("route", ["itinerary", "days", "blocks", "profile"])
+def test_matching_if_none_match_is_a_bodyless_304(client, trip, route):
+    url = routes(trip)[route]
+    first = client.get(url)
+    etag = first.headers["ETag"]  # weakened by the compression middleware
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+
+    for header in (etag, etag.removeprefix("W/"), f'"other", {etag}', "*"):
+        r = client.get(url, headers={"If-None-Match": header})
+        assert r.status_code == 304, header
+        assert r.content == b"" and r.headers["ETag"] == etag
+
+    assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+@pytest.mark.parametrize("route", ["itinerary", "days", "blocks", "profile"])
+def test_a_write_changes_the_etag(client, trip, route):
+    url = routes(trip)[route]
+    first = client.get(url)
+    edit(client, trip)
+
+    r = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != first.headers["ETag"]
+    assert r.content != first.content
+
+
+def test_unknown_resources_are_404_not_304(client, trip):
+    itinerary_id, day_id = trip
+    for url in (f"/itineraries/{itinerary_id + 1}", f"/itineraries/{itinerary_id + 1}/days/{day_id}/blocks", "/users/nobody/profile"):
+        assert client.get(url, headers={"If-None-Match": "*"}).status_code == 404, url
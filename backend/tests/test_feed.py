@@ -0,0 +1,43 @@
+def create(client, title: str, visibility: str = "public") -> int:
+    return client.post(
+        "/itineraries", json={"title": title, "description": "d", "visibility": visibility, "start_date": "2025-01-01"}
+    ).json()["id"]
+
+
+def pages(client, url: str, **params) -> list[list[int]]:
+    """Follow X-Next-Cursor to the end; the ids on each page."""
+    out = []
+    while True:
+        r = client.get(url, params=params)
+        assert r.status_code == 200, r.text
+        out.append([item["id"] for item in r.json()])
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return out
+        params["after"] = cursor
+
+
+def test_feed_pages_newest_first_and_skips_private(client, login):
+    login("alice")
+    ids = [create(client, f"Trip {n}", "private" if n in (1, 4) else "public") for n in range(7)]
+    public = [i for n, i in enumerate(ids) if n not in (1, 4)][::-1]
+
+    assert pages(client, "/itineraries", limit=2) == [public[0:2], public[2:4], public[4:5]]
+    assert pages(client, "/itineraries", limit=5) == [public]
+
+
+def test_feed_cursor_is_stable_under_inserts(client, login):
+    login("alice")
+    ids = [create(client, f"Trip {n}") for n in range(4)]
+    first = client.get("/itineraries", params={"limit": 2})
+    assert [i["id"] for i in first.json()] == [ids[3], ids[2]]
+
+    create(client, "Newer")  # would shift an offset page by one
+    rest = client.get("/itineraries", params={"limit": 2, "after": first.headers["X-Next-Cursor"]})
+    assert [i["id"] for i in rest.json()] == [ids[1], ids[0]]
+    assert "X-Next-Cursor" not in rest.headers
+
+
+def test_feed_rejects_a_garbage_cursor(client):
+    assert client.get("/itineraries", params={"after": "not a cursor!"}).status_code == 400
+    assert client.get("/itineraries", params={"limit": 101}).status_code == 422
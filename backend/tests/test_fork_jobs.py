@@ -0,0 +1,93 @@
+import pytest
+from sqlmodel import select
+
+from app.jobs import fork_jobs
+from app.models import ForkJob
+
+
+@pytest.fixture
+def foreign_keys(engine):
+    """Enforce foreign keys like Postgres does (SQLite leaves them off by default)."""
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+    yield
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+
+
+class InlinePool:
+    """Runs submitted jobs right away: the in-memory database is one connection, which threads can't share."""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@pytest.fixture(autouse=True)
+def inline_fork_jobs(monkeypatch):
+    monkeypatch.setattr(fork_jobs, "_pool", InlinePool)
+
+
+def run_fork_job(client, itinerary_id: int) -> dict:
+    response = client.post(f"/itineraries/{itinerary_id}/fork?mode=job")
+    assert response.status_code == 202
+    return client.get(f"/itineraries/fork-jobs/{response.json()['id']}").json()
+
+
+def test_deleting_itineraries_named_by_a_job(client, login, foreign_keys):
+    login("alice")
+    source = client.post("/itineraries", json={"title": "Kyoto", "description": "d", "start_date": "2025-01-01"}).json()
+    login("bob")
+    job = run_fork_job(client, source["id"])
+    assert job["status"] == "succeeded"
+
+    login("alice")
+    assert client.delete(f"/itineraries/{source['id']}").status_code == 204
+    assert client.get(f"/itineraries/{source['id']}").status_code == 404
+    login("bob")
+    assert client.delete(f"/itineraries/{job['result_itinerary_id']}").status_code == 204
+
+    job = client.get(f"/itineraries/fork-jobs/{job['id']}").json()
+    assert (job["status"], job["source_itinerary_id"], job["result_itinerary_id"]) == ("succeeded", None, None)
+
+
+def test_deleting_a_user_drops_their_jobs(client, login, session, foreign_keys):
+    login("alice")
+    source = client.post("/itineraries", json={"title": "Osaka", "description": "d", "start_date": "2025-01-01"}).json()
+    bob = login("bob")
+    assert run_fork_job(client, source["id"])["status"] == "succeeded"
+
+    assert client.delete(f"/users/{bob.id}").status_code == 200
+    assert session.exec(select(ForkJob)).all() == []
+    assert client.get(f"/itineraries/{source['id']}").status_code == 200
+
+
+def test_recovery_only_fails_jobs_whose_heartbeat_stopped(login, session):
+    from datetime import timedelta
+
+    from app.models import Itinerary, utcnow
+
+    alice = login("alice")
+    source = Itinerary(title="Nara", slug="nara", creator_id=alice.id)
+    session.add(source)
+    session.commit()
+    now = utcnow()
+    jobs = {
+        "orphaned": ForkJob(id="orphaned", source_itinerary_id=source.id, creator_id=alice.id, status="running", heartbeat_at=now - timedelta(hours=1)),
+        "other-replica": ForkJob(id="other-replica", source_itinerary_id=source.id, creator_id=alice.id, status="running", heartbeat_at=now),
+        "mine": ForkJob(id="mine", source_itinerary_id=source.id, creator_id=alice.id, status="queued", heartbeat_at=now - timedelta(hours=1)),
+        "done": ForkJob(id="done", source_itinerary_id=source.id, creator_id=alice.id, status="succeeded", heartbeat_at=now - timedelta(hours=1)),
+    }
+    session.add_all(jobs.values())
+    session.commit()
+    fork_jobs._owned.add("mine")
+    try:
+        fork_jobs.heartbeat()
+        fork_jobs.recover_interrupted()
+    finally:
+        fork_jobs._owned.discard("mine")
+
+    session.expire_all()
+    statuses = {job.id: job.status for job in session.exec(select(ForkJob)).all()}
+    assert statuses == {"orphaned": "failed", "other-replica": "running", "mine": "queued", "done": "succeeded"}
+    # stored without a timezone
+    assert session.get(ForkJob, "mine").heartbeat_at > (now - timedelta(minutes=1)).replace(tzinfo=None)
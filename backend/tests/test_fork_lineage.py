@@ -0,0 +1,18 @@
+def test_deleting_a_parent_refreshes_its_forks(client, login):
+    login("alice")
+    root = client.post("/itineraries", json={"title": "Kyoto", "description": "d", "start_date": "2025-01-01"}).json()["id"]
+    login("bob")
+    middle = client.post(f"/itineraries/{root}/fork").json()["id"]
+    login("carol")
+    leaf = client.post(f"/itineraries/{middle}/fork").json()["id"]
+    before = client.get(f"/itineraries/{leaf}")
+    assert before.json()["parent_id"] == middle
+
+    login("bob")
+    assert client.delete(f"/itineraries/{middle}").status_code == 204
+
+    after = client.get(f"/itineraries/{leaf}", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.json()["parent_id"] == root
+    changes = client.get(f"/itineraries/{leaf}/changes", params={"since": before.json()["version"]}).json()
+    assert changes["itinerary"]["parent_id"] == root
@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.cache import VersionedLRUCache, itinerary_cache
+
+
+@pytest.fixture
+def trip(client, login):
+    login("alice")
+    itinerary = client.post("/itineraries", json={"title": "Kyoto", "description": "d", "start_date": "2025-01-01"}).json()
+    t = SimpleNamespace(id=itinerary["id"], day=itinerary["days"][0]["id"])
+    t.url = f"/itineraries/{t.id}"
+    t.other_day = client.post(f"{t.url}/days:bulk", json={"count": 1}).json()[0]["id"]
+    t.block, t.other_block = (
+        b["id"] for b in client.post(f"{t.url}/days/{t.day}/blocks:batch", json={"blocks": [
+            {"type": "text", "content": "ramen"}, {"type": "text", "content": "tea"},
+        ]}).json()
+    )
+    return t
+
+
+WRITES = {
+    "itinerary.update": lambda c, t: c.patch(t.url, json={"title": "Kyoto!", "visibility": "private", "tags": ["x"]}),
+    "day.create": lambda c, t: c.post(f"{t.url}/days", json={"date": "2025-02-01", "order": 3}),
+    "day.bulk": lambda c, t: c.post(f"{t.url}/days:bulk", json={"count": 2}),
+    "day.shift": lambda c, t: c.post(f"{t.url}/days:shift", json={"days": -1}),
+    "day.reorder": lambda c, t: c.patch(f"{t.url}/days/reorder", json=[t.other_day, t.day]),
+    "day.update": lambda c, t: c.patch(f"{t.url}/days/{t.day}", json={"date": "2025-01-01", "order": 1, "title": "Arrival"}),
+    "day.delete": lambda c, t: c.delete(f"{t.url}/days/{t.other_day}"),
+    "block.create": lambda c, t: c.post(f"{t.url}/days/{t.day}/blocks", json={"type": "text", "content": "soba"}),
+    "block.batch": lambda c, t: c.post(f"{t.url}/days/{t.day}/blocks:batch", json={"blocks": [{"type": "text", "content": "soba"}]}),
+    "block.move": lambda c, t: c.post(f"{t.url}/days/{t.day}/blocks/{t.block}:move", json={"day_id": t.other_day}),
+    "block.delete": lambda c, t: c.delete(f"{t.url}/days/{t.day}/blocks/{t.block}"),
+    "ops": lambda c, t: c.post(f"{t.url}/ops", json={"ops": [{"op": "block.update", "block_id": t.block, "content": "udon"}]}),
+}
+
+
+@pytest.mark.parametrize("write", WRITES, ids=list(WRITES))
+def test_every_write_path_invalidates_the_cached_detail(client, trip, write):
+    before = client.get(trip.url)
+    assert client.get(trip.url).content == before.content and itinerary_cache.get(trip.id, before.json()["version"])
+
+    assert WRITES[write](client, trip).status_code < 300
+    after = client.get(trip.url)
+    assert after.json()["version"] > before.json()["version"]
+    assert after.content != before.content
+
+    itinerary_cache.clear()
+    assert client.get(trip.url).content == after.content
+
+
+def test_source_edits_refresh_a_copy_on_write_forks_cached_detail(client, login, trip):
+    login("bob")
+    fork_url = f"/itineraries/{client.post(f'{trip.url}/fork?mode=cow').json()['id']}"
+    before = client.get(fork_url).json()
+    assert before["days"][0]["blocks"][0]["id"] == trip.block
+
+    # the fork is handed its own copy of the content before the source changes under it
+    login("alice")
+    WRITES["ops"](client, trip)
+    after = client.get(fork_url).json()
+    assert after["version"] > before["version"]
+    assert after["days"][0]["blocks"][0]["id"] != trip.block
+    assert after["days"][0]["blocks"][0]["content"] == "ramen"
+
+    itinerary_cache.clear()
+    assert client.get(fork_url).json() == after
+
+
+def test_new_versions_replace_old_ones_and_never_regress():
+    cache = VersionedLRUCache(max_entries=4, ttl_seconds=60)
+    cache.put(1, 1, b"v1")
+    cache.put(1, 2, b"v2")
+    assert (cache.get(1, 1), cache.get(1, 2)) == (None, b"v2")
+    cache.put(1, 1, b"stale")  # a slow reader that loaded v1 finishes after v2 was cached
+    assert (cache.get(1, 1), cache.get(1, 2)) == (None, b"v2")
+    assert cache.stats()["entries"] == 1
+
+
+def test_entries_expire_and_the_oldest_is_evicted():
+    cache = VersionedLRUCache(max_entries=2, ttl_seconds=0)
+    cache.put(1, 1, b"x")
+    assert cache.get(1, 1) is None
+
+    cache = VersionedLRUCache(max_entries=2, ttl_seconds=60)
+    for object_id in (1, 2, 3):
+        cache.put(object_id, 1, b"x")
+    assert (cache.get(1, 1), cache.get(2, 1), cache.get(3, 1)) == (None, b"x", b"x")
@@ -0,0 +1,96 @@
+from app.crud import compact_change_log
+
+
+def make_trip(client) -> tuple[int, int]:
+    itinerary = client.post("/itineraries", json={"title": "Hokuriku", "description": "d", "start_date": "2025-01-01"}).json()
+    return itinerary["id"], itinerary["days"][0]["id"]
+
+
+def changes(client, itinerary_id: int, since: int) -> dict:
+    r = client.get(f"/itineraries/{itinerary_id}/changes", params={"since": since})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def version(client, itinerary_id: int) -> int:
+    return client.get(f"/itineraries/{itinerary_id}").json()["version"]
+
+
+def test_delta_since_a_version(client, login):
+    login("alice")
+    itinerary_id, day_id = make_trip(client)
+    since = version(client, itinerary_id)
+    untouched = client.post(f"/itineraries/{itinerary_id}/days:bulk", json={"count": 1}).json()[0]
+    since_bulk = version(client, itinerary_id)
+
+    block = client.post(f"/itineraries/{itinerary_id}/days/{day_id}/blocks", json={"type": "text", "content": "soba"}).json()
+    client.patch(f"/itineraries/{itinerary_id}/days/{day_id}", json={"date": "2025-01-01", "title": "Kanazawa", "order": 1})
+    client.patch(f"/itineraries/{itinerary_id}", json={"title": "Hokuriku loop", "visibility": "public", "tags": []})
+
+    delta = changes(client, itinerary_id, since_bulk)
+    assert delta["snapshot"] is None
+    assert delta["version"] == since_bulk + 3 == version(client, itinerary_id)
+    assert delta["itinerary"]["title"] == "Hokuriku loop"
+    assert [(d["id"], d["title"]) for d in delta["days"]] == [(day_id, "Kanazawa")]
+    assert [(b["id"], b["content"]) for b in delta["blocks"]] == [(block["id"], "soba")]
+    assert delta["deleted_day_ids"] == delta["deleted_block_ids"] == []
+
+    # an older client also gets the day added before
+    assert {d["id"] for d in changes(client, itinerary_id, since)["days"]} == {day_id, untouched["id"]}
+    # an up-to-date client gets nothing
+    current = changes(client, itinerary_id, delta["version"])
+    assert current["itinerary"] is None and current["days"] == current["blocks"] == []
+
+
+def test_deleted_days_and_blocks_come_back_as_tombstones(client, login):
+    login("alice")
+    itinerary_id, day_id = make_trip(client)
+    extra_day = client.post(f"/itineraries/{itinerary_id}/days:bulk", json={"count": 1}).json()[0]
+    keep = client.post(f"/itineraries/{itinerary_id}/days/{day_id}/blocks", json={"type": "text", "content": "keep"}).json()
+    drop = client.post(f"/itineraries/{itinerary_id}/days/{day_id}/blocks", json={"type": "text", "content": "drop"}).json()
+    since = version(client, itinerary_id)
+
+    client.delete(f"/itineraries/{itinerary_id}/days/{day_id}/blocks/{drop['id']}")
+    client.delete(f"/itineraries/{itinerary_id}/days/{extra_day['id']}")
+
+    delta = changes(client, itinerary_id, since)
+    assert delta["snapshot"] is None
+    assert delta["deleted_block_ids"] == [drop["id"]]
+    assert delta["deleted_day_ids"] == [extra_day["id"]]
+    assert keep["id"] not in delta["deleted_block_ids"]
+
+
+def test_snapshot_after_compaction_below_the_floor(client, login, session):
+    login("alice")
+    itinerary_id, day_id = make_trip(client)
+    first = version(client, itinerary_id)
+    for i in range(4):
+        client.post(f"/itineraries/{itinerary_id}/days/{day_id}/blocks", json={"type": "text", "content": f"b{i}"})
+    latest = version(client, itinerary_id)
+
+    compact_change_log(session, keep_versions=2)
+
+    old = changes(client, itinerary_id, first)
+    assert old["snapshot"] is not None
+    assert old["version"] == latest
+    assert [b["content"] for b in old["snapshot"]["days"][0]["blocks"]] == ["b0", "b1", "b2", "b3"]
+
+    recent = changes(client, itinerary_id, latest - 2)
+    assert recent["snapshot"] is None
+    assert [b["content"] for b in recent["blocks"]] == ["b2", "b3"]
+
+
+def test_snapshot_for_unknown_versions_and_wholesale_id_changes(client, login):
+    login("alice")
+    itinerary_id, day_id = make_trip(client)
+    client.post(f"/itineraries/{itinerary_id}/days/{day_id}/blocks", json={"type": "text", "content": "shared"})
+    assert changes(client, itinerary_id, version(client, itinerary_id) + 5)["snapshot"] is not None
+
+    # a copy-on-write fork's first edit gives it its own day and block ids
+    login("bob")
+    fork = client.post(f"/itineraries/{itinerary_id}/fork?mode=cow").json()
+    since = fork["version"]
+    client.post(f"/itineraries/{fork['id']}/days/{day_id}/blocks", json={"type": "text", "content": "mine"})
+    delta = changes(client, fork["id"], since)
+    assert delta["snapshot"] is not None
+    assert [b["content"] for b in delta["snapshot"]["days"][0]["blocks"]] == ["shared", "mine"]
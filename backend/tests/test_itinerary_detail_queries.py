@@ -0,0 +1,74 @@
+import pytest
+
+
+def make_itinerary(client, days: int, blocks_per_day: int) -> int:
+    itin = client.post("/itineraries", json={"title": f"Trip {days}x{blocks_per_day}", "description": "d", "start_date": "2025-01-01"}).json()
+    day_ids = [itin["days"][0]["id"]]
+    if days > 1:
+        created = client.post(f"/itineraries/{itin['id']}/days:bulk", json={"count": days - 1})
+        day_ids += [d["id"] for d in created.json()]
+    for day_id in day_ids:
+        blocks = [{"type": "text", "content": f"block {i}"} for i in range(blocks_per_day)]
+        if blocks:
+            client.post(f"/itineraries/{itin['id']}/days/{day_id}/blocks:batch", json={"blocks": blocks})
+    return itin["id"]
+
+
+@pytest.mark.parametrize("days, blocks_per_day", [(1, 0), (3, 5), (30, 10)])
+def test_detail_view_query_count_is_flat(client, login, count_queries, days, blocks_per_day):
+    login("alice")
+    itinerary_id = make_itinerary(client, days, blocks_per_day)
+
+    # cold cache: the version lookup behind the ETag, then the whole tree in one query
+    with count_queries() as q:
+        response = client.get(f"/itineraries/{itinerary_id}")
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["days"]) == days
+    assert sum(len(d["blocks"]) for d in body["days"]) == days * blocks_per_day
+    assert q.count == 2, q.statements
+
+    # warm cache and conditional requests: the version lookup only
+    with count_queries() as q:
+        assert client.get(f"/itineraries/{itinerary_id}").status_code == 200
+    assert q.count == 1, q.statements
+    with count_queries() as q:
+        assert client.get(f"/itineraries/{itinerary_id}", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+    assert q.count == 1, q.statements
+
+
+def test_tree_loader_is_one_query(client, login, session, count_queries):
+    from app.crud import get_itinerary_tree
+
+    login("alice")
+    itinerary_id = make_itinerary(client, 5, 4)
+    with count_queries() as q:
+        tree = get_itinerary_tree(session, itinerary_id)
+    assert q.count == 1, q.statements
+    assert [d["order"] for d in tree["days"]] == [1, 2, 3, 4, 5]
+    assert [b["content"] for b in tree["days"][0]["blocks"]] == [f"block {i}" for i in range(4)]
+
+
+def test_copy_on_write_fork_detail_is_flat(client, login, count_queries):
+    login("alice")
+    itinerary_id = make_itinerary(client, 4, 3)
+    login("bob")
+    fork = client.post(f"/itineraries/{itinerary_id}/fork?mode=cow").json()
+
+    with count_queries() as q:
+        body = client.get(f"/itineraries/{fork['id']}").json()
+    assert q.count == 2, q.statements
+    assert [len(d["blocks"]) for d in body["days"]] == [3, 3, 3, 3]
+
+
+def test_itinerary_write_responses_are_flat(client, login, count_queries):
+    """PATCH answers with the one-query tree, so deferred block content is never loaded per block."""
+    login("alice")
+    counts = []
+    for blocks_per_day in (1, 50):
+        itinerary_id = make_itinerary(client, 2, blocks_per_day)
+        with count_queries() as q:
+            response = client.patch(f"/itineraries/{itinerary_id}", json={"title": f"Renamed {blocks_per_day}", "visibility": "public", "tags": []})
+        assert sum(len(d["blocks"]) for d in response.json()["days"]) == 2 * blocks_per_day
+        counts.append(q.count)
+    assert counts[0] == counts[1], counts
@@ -0,0 +1,72 @@
+def make_trip(client) -> tuple[int, int]:
+    itinerary = client.post("/itineraries", json={"title": "Shikoku", "description": "d", "start_date": "2025-01-01"}).json()
+    return itinerary["id"], itinerary["days"][0]["id"]
+
+
+def tree(client, itinerary_id: int) -> list:
+    body = client.get(f"/itineraries/{itinerary_id}").json()
+    return [(d["title"], [b["content"] for b in d["blocks"]]) for d in body["days"]]
+
+
+def test_ops_resolve_forward_refs_and_bump_the_version_once(client, login):
+    login("alice")
+    itinerary_id, day_id = make_trip(client)
+    version = client.get(f"/itineraries/{itinerary_id}").json()["version"]
+
+    r = client.post(f"/itineraries/{itinerary_id}/ops", json={"base_version": version, "ops": [
+        {"op": "day.create", "ref": "d2", "date": "2025-01-02", "title": "Day 2"},
+        {"op": "block.create", "ref": "a", "day_id": "d2", "type": "text", "content": "a"},
+        {"op": "block.create", "ref": "b", "day_id": "d2", "type": "text", "content": "b", "before_id": "a"},
+        {"op": "block.create", "day_id": day_id, "type": "text", "content": "c"},
+        {"op": "block.move", "block_id": "a", "day_id": day_id},
+        {"op": "block.update", "block_id": "b", "content": "B"},
+    ]})
+    assert r.status_code == 200, r.text
+    assert r.json()["version"] == version + 1
+    assert set(r.json()["refs"]) == {"d2", "a", "b"}
+    assert tree(client, itinerary_id) == [("Day 1", ["c", "a"]), ("Day 2", ["B"])]
+
+
+def test_a_failing_op_rolls_back_the_whole_list(client, login):
+    login("alice")
+    itinerary_id, day_id = make_trip(client)
+    before = client.get(f"/itineraries/{itinerary_id}").json()
+
+    r = client.post(f"/itineraries/{itinerary_id}/ops", json={"ops": [
+        {"op": "day.create", "date": "2025-01-02", "title": "Day 2"},
+        {"op": "block.create", "day_id": day_id, "type": "text", "content": "kept?"},
+        {"op": "block.delete", "block_id": 999_999},
+    ]})
+    assert r.status_code == 404
+    assert r.json()["detail"].startswith("ops[2]:")
+    after = client.get(f"/itineraries/{itinerary_id}").json()
+    assert after == before
+
+
+def test_unknown_ref_and_stale_base_version(client, login):
+    login("alice")
+    itinerary_id, day_id = make_trip(client)
+    version = client.get(f"/itineraries/{itinerary_id}").json()["version"]
+
+    r = client.post(f"/itineraries/{itinerary_id}/ops", json={"ops": [{"op": "block.create", "day_id": "nope", "type": "text", "content": "x"}]})
+    assert r.status_code == 422 and r.json()["detail"].startswith("ops[0]:")
+
+    client.post(f"/itineraries/{itinerary_id}/days/{day_id}/blocks", json={"type": "text", "content": "elsewhere"})
+    r = client.post(f"/itineraries/{itinerary_id}/ops", json={"base_version": version, "ops": [
+        {"op": "block.create", "day_id": day_id, "type": "text", "content": "late"},
+    ]})
+    assert r.status_code == 409
+    assert tree(client, itinerary_id) == [("Day 1", ["elsewhere"])]
+
+
+def test_block_create_takes_at_most_one_placement(client, login):
+    login("alice")
+    itinerary_id, day_id = make_trip(client)
+    anchor = client.post(f"/itineraries/{itinerary_id}/days/{day_id}/blocks", json={"type": "text", "content": "anchor"}).json()
+
+    r = client.post(f"/itineraries/{itinerary_id}/ops", json={"ops": [
+        {"op": "block.create", "day_id": day_id, "type": "text", "content": "x", "order": 5, "after_id": anchor["id"]},
+    ]})
+    assert r.status_code == 422
+    assert r.json()["detail"] == "ops[0]: Give at most one of order, before_id and after_id."
+    assert tree(client, itinerary_id) == [("Day 1", ["anchor"])]
@@ -0,0 +1,49 @@
+import pytest
+
+
+@pytest.fixture
+def trip(client, login):
+    """alice's two-day trip with a cover image, saved by bob and copy-on-write forked by carol."""
+    login("alice")
+    itinerary = client.post(
+        "/itineraries", json={"title": "Kyoto", "description": "d", "tags": ["food"], "start_date": "2025-03-01"}
+    ).json()
+    itinerary_id, day_id = itinerary["id"], itinerary["days"][0]["id"]
+    client.post(f"/itineraries/{itinerary_id}/days:bulk", json={"count": 1})
+    client.post(f"/itineraries/{itinerary_id}/days/{day_id}/blocks", json={"type": "text", "content": "ramen"})
+    client.post(f"/itineraries/{itinerary_id}/days/{day_id}/blocks", json={"type": "image", "content": "cover.jpg"})
+    login("bob")
+    client.post("/users/bob/bookmarks", json={"itinerary_id": itinerary_id})
+    login("carol")
+    client.post(f"/itineraries/{itinerary_id}/fork?mode=cow")
+    login("bob")
+    return itinerary_id
+
+
+LIST_ROUTES = ["/itineraries", "/users/alice/itineraries", "/users/bob/saved", "/itineraries/search?tags=food"]
+
+
+@pytest.mark.parametrize("url", LIST_ROUTES)
+def test_summary_view_is_the_card_without_days(client, trip, url):
+    (card,) = [item for item in client.get(url, params={"view": "summary"}).json() if item["id"] == trip]
+    assert card == {
+        "id": trip, "title": "Kyoto", "slug": "kyoto", "visibility": "public", "tags": ["food"],
+        "creator_id": card["creator_id"], "creator_username": "alice",
+        "day_count": 2, "start_date": "2025-03-01", "cover_image_url": "cover.jpg", "fork_count": 1,
+    }
+
+
+@pytest.mark.parametrize("url", LIST_ROUTES)
+def test_full_view_is_the_detail_tree(client, trip, url):
+    (item,) = [item for item in client.get(url, params={"view": "full"}).json() if item["id"] == trip]
+    assert item == client.get(f"/itineraries/{trip}").json()
+    assert [b["content"] for b in item["days"][0]["blocks"]] == ["ramen", "cover.jpg"]
+
+
+def test_summary_of_a_copy_on_write_fork_reads_through_its_source(client, trip):
+    (fork,) = [item for item in client.get("/users/carol/itineraries", params={"view": "summary"}).json()]
+    assert (fork["title"], fork["day_count"], fork["cover_image_url"], fork["fork_count"]) == ("Kyoto (forked)", 2, "cover.jpg", 0)
+
+
+def test_unknown_view_is_rejected(client, trip):
+    assert client.get("/itineraries", params={"view": "compact"}).status_code == 422
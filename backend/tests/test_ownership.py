@@ -0,0 +1,58 @@
+import pytest
+
+
+def make_trip(client, title: str) -> tuple[int, int, int]:
+    """(itinerary_id, day_id, block_id)"""
+    itinerary = client.post("/itineraries", json={"title": title, "description": "d", "start_date": "2025-01-01"}).json()
+    day_id = itinerary["days"][0]["id"]
+    block = client.post(f"/itineraries/{itinerary['id']}/days/{day_id}/blocks", json={"type": "text", "content": title}).json()
+    return itinerary["id"], day_id, block["id"]
+
+
+@pytest.fixture
+def trips(client, login):
+    """Two of alice's itineraries: a user owning both must still not reach one's rows through the other's path."""
+    login("alice")
+    return make_trip(client, "Kyoto"), make_trip(client, "Osaka")
+
+
+def test_days_and_blocks_of_another_itinerary_are_404(client, trips):
+    (mine, my_day, my_block), (_, other_day, other_block) = trips
+    day = {"date": "2025-01-01", "order": 1, "title": "x"}
+    for method, url, body in [
+        ("PATCH", f"/itineraries/{mine}/days/{other_day}", day),
+        ("DELETE", f"/itineraries/{mine}/days/{other_day}", None),
+        ("POST", f"/itineraries/{mine}/days/{other_day}/blocks", {"type": "text", "content": "x"}),
+        ("POST", f"/itineraries/{mine}/days/{other_day}/blocks:batch", {"blocks": [{"type": "text", "content": "x"}]}),
+        ("DELETE", f"/itineraries/{mine}/days/{other_day}/blocks/{other_block}", None),
+        ("DELETE", f"/itineraries/{mine}/days/{my_day}/blocks/{other_block}", None),
+        ("POST", f"/itineraries/{mine}/days/{my_day}/blocks/{other_block}:move", {}),
+        ("POST", f"/itineraries/{mine}/days/{my_day}/blocks/{my_block}:move", {"day_id": other_day}),
+    ]:
+        assert client.request(method, url, json=body).status_code == 404, (method, url)
+
+    osaka = client.get(f"/itineraries/{trips[1][0]}").json()
+    kyoto = client.get(f"/itineraries/{mine}").json()
+    assert [b["id"] for b in osaka["days"][0]["blocks"]] == [other_block]
+    assert [b["id"] for b in kyoto["days"][0]["blocks"]] == [my_block]
+    assert (osaka["version"], kyoto["version"]) == (2, 2)
+
+
+def test_a_copy_on_write_fork_reaches_only_its_sources_days(client, login, trips):
+    (source, source_day, _), (_, other_day, _) = trips
+    login("bob")
+    fork = client.post(f"/itineraries/{source}/fork?mode=cow").json()["id"]
+    block = {"type": "text", "content": "x"}
+    assert client.post(f"/itineraries/{fork}/days/{other_day}/blocks", json=block).status_code == 404
+    assert client.post(f"/itineraries/{fork}/days/{source_day}/blocks", json=block).status_code == 201
+
+
+def test_other_users_get_404_not_403(client, login, trips):
+    (mine, my_day, my_block), _ = trips
+    login("bob")
+    for method, url in [
+        ("PATCH", f"/itineraries/{mine}/days/{my_day}"),
+        ("DELETE", f"/itineraries/{mine}/days/{my_day}/blocks/{my_block}"),
+        ("DELETE", f"/itineraries/{mine}"),
+    ]:
+        assert client.request(method, url, json={"date": "2025-01-01", "order": 1}).status_code == 404, (method, url)
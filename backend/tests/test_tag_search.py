@@ -0,0 +1,56 @@
+import pytest
+
+
+def create(client, title: str, tags: list[str], visibility: str = "public") -> int:
+    return client.post(
+        "/itineraries", json={"title": title, "description": "d", "tags": tags, "visibility": visibility, "start_date": "2025-01-01"}
+    ).json()["id"]
+
+
+def search(client, *tags: str, **params) -> list[int]:
+    r = client.get("/itineraries/search", params={"tags": list(tags), **params})
+    assert r.status_code == 200, r.text
+    return [item["id"] for item in r.json()]
+
+
+@pytest.fixture
+def trips(client, login):
+    login("alice")
+    return {
+        "food": create(client, "Osaka", ["Food"]),
+        "food+hike": create(client, "Kyoto", ["food", " Hiking "]),
+        "hike": create(client, "Nikko", ["hiking"]),
+        "private": create(client, "Secret", ["food", "hiking"], visibility="private"),
+    }
+
+
+def test_all_is_and_any_is_or(client, trips):
+    assert search(client, "food", "hiking") == [trips["food+hike"]]
+    assert search(client, "food", "hiking", match="any") == [trips["hike"], trips["food+hike"], trips["food"]]
+    assert search(client, "food") == search(client, "food", match="any") == [trips["food+hike"], trips["food"]]
+
+
+def test_tags_are_normalized_and_may_be_comma_separated(client, trips):
+    assert search(client, "FOOD,hiking ") == [trips["food+hike"]]
+    assert search(client, "food", "Food", "food,hiking") == [trips["food+hike"]]  # repeats don't break the AND count
+    assert search(client, "sushi") == search(client, " , ") == []
+
+
+def test_retagging_updates_the_index(client, trips):
+    client.patch(f"/itineraries/{trips['food']}", json={"visibility": "public", "tags": ["hiking"]})
+    assert search(client, "food") == [trips["food+hike"]]
+    assert search(client, "hiking") == [trips["hike"], trips["food+hike"], trips["food"]]
+
+
+def test_forks_are_found_by_their_tags(client, login, trips):
+    login("bob")
+    fork = client.post(f"/itineraries/{trips['food+hike']}/fork").json()["id"]
+    assert search(client, "food", "hiking") == [fork, trips["food+hike"]]
+
+
+def test_pages_with_the_feed_cursor(client, trips):
+    first = client.get("/itineraries/search", params={"tags": "food,hiking", "match": "any", "limit": 2})
+    assert [i["id"] for i in first.json()] == [trips["hike"], trips["food+hike"]]
+    rest = client.get("/itineraries/search", params={"tags": "food,hiking", "match": "any", "limit": 2, "after": first.headers["X-Next-Cursor"]})
+    assert [i["id"] for i in rest.json()] == [trips["food"]]
+    assert "X-Next-Cursor" not in rest.headers
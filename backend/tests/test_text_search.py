@@ -0,0 +1,23 @@
+def search(client, q: str) -> list[int]:
+    return [item["id"] for item in client.get("/itineraries/search/text", params={"q": q}).json()]
+
+
+def test_edits_replace_their_documents_by_rowid(client, login, count_queries):
+    login("alice")
+    itinerary = client.post("/itineraries", json={"title": "Kyoto temples", "description": "d", "start_date": "2025-01-01"}).json()
+    url = f"/itineraries/{itinerary['id']}"
+    block = client.post(f"{url}/days/{itinerary['days'][0]['id']}/blocks", json={"type": "text", "content": "ramen"}).json()
+    assert search(client, "ramen") == search(client, "kyoto") == [itinerary["id"]]
+
+    with count_queries() as q:
+        client.post(f"{url}/ops", json={"ops": [{"op": "block.update", "block_id": block["id"], "content": "udon"}]})
+        client.patch(url, json={"title": "Nara deer", "visibility": "public", "tags": []})
+    # FTS5 only indexes `body`: a doc_key filter would scan every document
+    deletes = [s for s in q.statements if s.startswith("DELETE FROM search_document")]
+    assert len(deletes) == 2 and all("rowid" in s and "doc_key" not in s for s in deletes), deletes
+
+    assert search(client, "ramen") == search(client, "kyoto") == []
+    assert search(client, "udon") == search(client, "deer") == [itinerary["id"]]
+
+    client.delete(f"{url}/days/{itinerary['days'][0]['id']}/blocks/{block['id']}")
+    assert search(client, "udon") == []
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import crud
+
+
+def create(client, title: str):
+    return client.post("/itineraries", json={"title": title, "description": "d", "start_date": "2025-01-01"})
+
+
+def test_slugs_skip_taken_suffixes_but_not_longer_names_sharing_the_prefix(client, login):
+    login("alice")
+    assert create(client, "Kyoto 1 Day").json()["slug"] == "kyoto-1-day"
+    assert create(client, "Kyoto Trip").json()["slug"] == "kyoto-trip"
+    assert [create(client, title).json()["slug"] for title in ("Kyoto", "Kyoto!", "Kyoto?")] == ["kyoto", "kyoto-1", "kyoto-2"]
+    login("bob")  # names are per creator
+    assert create(client, "Kyoto").json()["slug"] == "kyoto"
+
+
+def test_fork_titles_count_up_per_forker(client, login):
+    login("alice")
+    source = create(client, "Kyoto").json()["id"]
+    login("bob")
+    create(client, "Kyoto (forked 2) notes")  # shares the "Kyoto (forked" prefix without taking a name
+    forks = [client.post(f"/itineraries/{source}/fork").json() for _ in range(3)]
+    assert [fork["title"] for fork in forks] == ["Kyoto (forked)", "Kyoto (forked 2)", "Kyoto (forked 3)"]
+    assert [fork["slug"] for fork in forks] == ["kyoto-forked", "kyoto-forked-2", "kyoto-forked-3"]
+
+
+def test_a_name_claimed_concurrently_is_picked_again(client, login, monkeypatch):
+    login("alice")
+    create(client, "Kyoto")
+    pick = crud.generate_unique_slug
+    stale = iter(["kyoto"])  # what a request that read before "Kyoto" was inserted would pick
+
+    monkeypatch.setattr(crud, "generate_unique_slug", lambda *args: next(stale, None) or pick(*args))
+    r = create(client, "Kyoto!")
+    assert r.status_code == 201, r.text
+    assert r.json()["slug"] == "kyoto-1"
+
+
+def test_gives_up_after_repeated_collisions(client, login, monkeypatch):
+    login("alice")
+    create(client, "Kyoto")
+    monkeypatch.setattr(crud, "generate_unique_slug", lambda *args: "kyoto")
+    with pytest.raises(IntegrityError):
+        create(client, "Kyoto!")
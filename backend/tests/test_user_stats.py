@@ -0,0 +1,70 @@
+from sqlalchemy import update
+from sqlmodel import select
+
+from app.crud import recount_user_stats
+from app.models import User
+
+
+def stats(session, username: str) -> tuple[int, int, int, int]:
+    """(trips, saved, followers, following) as stored on the user row."""
+    session.expire_all()
+    return session.exec(
+        select(User.trips_count, User.saved_count, User.followers_count, User.following_count).where(User.username == username)
+    ).one()
+
+
+def make_trip(client, title: str = "Kyoto") -> int:
+    return client.post("/itineraries", json={"title": title, "description": "d", "start_date": "2025-01-01"}).json()["id"]
+
+
+def test_counters_follow_bookmarks_follows_and_deletes(client, login, session):
+    login("alice")
+    trip = make_trip(client)
+    other = make_trip(client, "Osaka")
+    login("carol")
+    login("bob")
+    assert stats(session, "alice") == (2, 0, 0, 0)
+
+    for _ in range(2):  # the second save and follow are no-ops
+        assert client.post("/users/bob/bookmarks", json={"itinerary_id": trip}).status_code == 204
+        assert client.post("/users/bob/follow", json={"target_username": "alice"}).status_code == 204
+    client.post("/users/bob/bookmarks", json={"itinerary_id": other})
+    login("carol")
+    client.post("/users/carol/bookmarks", json={"itinerary_id": trip})
+    client.post("/users/carol/follow", json={"target_username": "alice"})
+    assert stats(session, "alice") == (2, 0, 2, 0)
+    assert stats(session, "bob") == (0, 2, 0, 1)
+    assert client.get("/users/alice/profile").json()["stats"] == {"places": 0, "followers": 2, "trips": 2, "saved": 0}
+
+    login("bob")
+    for _ in range(2):  # removing what is already gone is a no-op
+        assert client.delete(f"/users/bob/bookmarks/{other}").status_code == 204
+        assert client.delete("/users/bob/follow/alice").status_code == 204
+    assert stats(session, "bob") == (0, 1, 0, 0)
+    assert stats(session, "alice") == (2, 0, 1, 0)
+
+    # deleting a trip takes it off its creator's count and out of every saver's
+    login("alice")
+    assert client.delete(f"/itineraries/{trip}").status_code == 204
+    assert stats(session, "alice") == (1, 0, 1, 0)
+    assert stats(session, "bob") == (0, 0, 0, 0)
+    assert stats(session, "carol") == (0, 0, 0, 1)
+    assert recount_user_stats(session) == 0
+
+
+def test_recount_repairs_drift(client, login, session):
+    login("alice")
+    trip = make_trip(client)
+    login("bob")
+    client.post("/users/bob/bookmarks", json={"itinerary_id": trip})
+    client.post("/users/bob/follow", json={"target_username": "alice"})
+
+    session.exec(update(User).where(User.username == "alice").values(trips_count=7, followers_count=0))
+    session.exec(update(User).where(User.username == "bob").values(saved_count=-1))
+    session.commit()
+
+    assert recount_user_stats(session) == 2
+    session.commit()
+    assert stats(session, "alice") == (1, 0, 1, 0)
+    assert stats(session, "bob") == (0, 1, 0, 1)
+    assert recount_user_stats(session) == 0